@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark NativeHTMLParser (and the streaming SelectorExtractor) on recorded
+result pages. Pass saved SERP .html files or directories of them; without
+arguments a synthetic page full of void elements is measured at growing sizes
+so the per-KB cost shows whether parsing scales linearly.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from libs.html_parser import NativeHTMLParser
+from libs.extractor import extract, Selector
+
+SELECTORS = {'anchors': Selector('a')}
+
+RESULT_BLOCK = (
+    '<li class="result"><div class="item"><img src="/i/%(i)d.png" alt="">'
+    '<h2><a class="title" href="https://example%(i)d.org/page">Result %(i)d</a></h2>'
+    '<p class="snippet">Snippet text<br>second line <b>bold</b> end<wbr>more'
+    '<input type="hidden" name="r%(i)d" value="%(i)d"></p>'
+    '<span class="meta">cached<hr></span></div></li>\n'
+)
+
+
+def synthetic_page(results):
+    head = '<!DOCTYPE html><html><head><meta charset="utf-8"><meta name="x" content="y">'
+    head += '<link rel="stylesheet" href="/s.css"><title>results</title></head><body><ol>\n'
+    body = ''.join(RESULT_BLOCK % {'i': i} for i in range(results))
+
+    return head + body + '</ol><div class="pagination"><a href="/next">Next</a></div></body></html>'
+
+
+def load_pages(paths):
+    pages = []
+    for path in paths:
+        if os.path.isdir(path):
+            files = [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith(('.html', '.htm'))]
+        else:
+            files = [path]
+
+        for file in files:
+            with open(file, 'r', encoding='utf-8', errors='replace') as f:
+                pages.append((os.path.basename(file), f.read()))
+
+    return pages
+
+
+def tree_depth(element):
+    depth = 0
+    stack = [(element, 1)]
+    while stack:
+        node, level = stack.pop()
+        depth = max(depth, level)
+        stack.extend((child, level + 1) for child in node)
+
+    return depth
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, result
+
+
+def bench_page(name, html, repeat):
+    def parse():
+        _parser = NativeHTMLParser()
+        _parser.feed(html)
+        _parser.close()
+        return _parser.root
+
+    parse_time, root = best_of(parse, repeat)
+    find_time, anchors = best_of(lambda: root.findall('.//a'), repeat)
+    extract_time, extracted = best_of(lambda: extract(html, SELECTORS), repeat)
+    size_kb = len(html) / 1024.0
+
+    print('%-28s %8.1f %10.2f %9.3f %8.2f %10.2f %7d %6d %6d' % (
+        name[:28], size_kb, parse_time * 1000, parse_time * 1000 / size_kb, find_time * 1000,
+        extract_time * 1000, len(anchors), len(extracted['anchors']), tree_depth(root)))
+
+
+def main():
+    parser = argparse.ArgumentParser(usage='%(prog)s [options] [page.html|dir ...]')
+    # noinspection PyProtectedMember
+    parser._optionals.title = 'Options'
+    parser.add_argument('pages', nargs='*', help='Recorded SERP files or directories')
+    parser.add_argument('-r', '--repeat', dest='repeat', type=int, default=5,
+                        help='Runs per page, best time is reported (default 5)')
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = load_pages(args.pages)
+    else:
+        pages = [('synthetic-%d' % n, synthetic_page(n)) for n in (100, 200, 400, 800, 1600)]
+
+    print('%-28s %8s %10s %9s %8s %10s %7s %6s %6s' % (
+        'page', 'KB', 'parse ms', 'ms/KB', 'find ms', 'extract ms', 'anchors', 'match', 'depth'))
+    for name, html in pages:
+        bench_page(name, html, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,110 +1,70 @@
 import re
 from logging import DEBUG
 from urllib.parse import urljoin, urlencode, unquote
-from utils.blacklist import is_blacklisted
 from utils.helper import setup_logger, validate_url
-from libs.html_parser import NativeHTMLParser
+from libs.document import Document
 from libs.fetch import FetchRequest
+from libs.token_cache import default_token_cache
+from engine.base import SearchEngine
 
 logger = setup_logger(name='Aol')
 
 
-class Aol:
+class Aol(SearchEngine):
+    name = 'Aol'
+    token_key = 'Aol'
     base_url = 'https://www.aol.com'
     search_url = 'https://search.aol.com'
 
     def __init__(self, debug=False):
         self.debug = debug
         self.query = {}
-        self.fetch = FetchRequest()
+        self.fetch = FetchRequest(engine='Aol')
         self.filtering = True
 
         if self.debug:
             logger.setLevel(DEBUG)
 
-    def search(self, keyword):
+    def get_search_url(self, keyword):
         self.query.update({'q': str(keyword)})
         search_url = self.build_query()
         if search_url:
             search_url = urljoin(self.search_url, search_url)
 
-        return self.search_run(search_url)
+        return search_url
 
-    def search_run(self, url):
-        result = []
-        if not url:
-            return result
+    def build_query(self, html=None):
+        search_url = ''
+        tokens = self.get_query_tokens(html)
+        if not tokens:
+            return search_url
 
-        duplicate_page = 0
-        empty_page = 0
-        headers = {'Referer': self.base_url}
-        page = 1
-        while True:
-            if self.debug:
-                logger.debug('Page: %s %s' % (page, url))
-            else:
-                logger.info('Page: %s' % page)
-
-            html = self.fetch.get(url=url, headers=headers)
-            links = self.get_links(html)
-
-            if not links:
-                empty_page += 1
-                if page > 1:
-                    break
-            else:
-                duplicate = True
-                for link in links:
-                    if self.filtering:
-                        if is_blacklisted(link):
-                            logger.debug('[BLACKLIST] %s' % link)
-                            continue
-
-                    if link not in result:
-                        duplicate = False
-                        result.append(link)
-                        logger.info(link)
-                    else:
-                        logger.debug('[EXIST] %s' % link)
-
-                if duplicate:
-                    duplicate_page += 1
-
-            if duplicate_page >= 3:
-                break
-
-            if empty_page >= 2:
-                break
-
-            next_page = self.get_next_page(html)
-            if next_page and next_page != url:
-                headers.update({'Referer': url})
-                url = next_page
-            else:
-                break
-            page += 1
-
-        result = list(dict.fromkeys(result))
-        logger.info('Total links: %d' % len(result))
+        search_url = tokens.get('action')
+        self.query.update(tokens.get('inputs'))
 
-        return result
+        if search_url:
+            search_url = '%s?%s' % (search_url, urlencode(self.query))
+
+        return search_url
+
+    def get_query_tokens(self, html=None):
+        tokens = None if html else default_token_cache.get('Aol')
+        if tokens is not None:
+            return tokens
 
-    def build_query(self, html=None):
-        search_url = ''
         if not html:
-            html = self.fetch.get(self.base_url)
+            html = self.fetch.get(self.base_url, cache=False)
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
+        doc = Document.wrap(html)
 
-        if _parser.root is None:
-            return search_url
+        if doc.root is None:
+            return
 
-        form_header = _parser.root.find('.//form[@id="header-form"]')
+        tokens = {'action': '', 'inputs': {}}
+        form_header = doc.root.find('.//form[@id="header-form"]')
 
         if form_header:
-            search_url = form_header.get('action')
+            tokens['action'] = form_header.get('action')
             inputs = form_header.findall('.//input[@type="hidden"]')
             for inp in inputs:
                 _name = inp.get('name')
@@ -113,12 +73,13 @@ class Aol:
                     continue
 
                 if _name != 'q':
-                    self.query.update({_name: _value or ''})
+                    tokens['inputs'].update({_name: _value or ''})
 
-        if search_url:
-            search_url = '%s?%s' % (search_url, urlencode(self.query))
+        # Tokens without a form action cannot build a search URL
+        if tokens['action']:
+            default_token_cache.set('Aol', tokens)
 
-        return search_url
+        return tokens
 
     @staticmethod
     def get_links(html):
@@ -128,14 +89,12 @@ class Aol:
 
         patern_url = r'\/RU=(.*?)\/RK='
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
+        doc = Document.wrap(html)
 
-        if _parser.root is None:
+        if doc.root is None:
             return result
 
-        links = _parser.root.findall('.//a[@referrerpolicy="origin"]')
+        links = doc.root.findall('.//a[@referrerpolicy="origin"]')
 
         for link in links:
             _class = link.get('class')
@@ -161,14 +120,12 @@ class Aol:
         if not html:
             return next_page
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
+        doc = Document.wrap(html)
 
-        if _parser.root is None:
+        if doc.root is None:
             return next_page
 
-        find_next_page = _parser.root.find('.//a[@class="next"]')
+        find_next_page = doc.root.find('.//a[@class="next"]')
         if find_next_page is not None:
             _href = find_next_page.get('href')
             if _href:
@@ -1,87 +1,28 @@
-import re
 from logging import DEBUG
 from urllib.parse import urljoin, urlencode
-from utils.blacklist import is_blacklisted
-from utils.helper import setup_logger, validate_url
+from utils.helper import setup_logger
 from libs.fetch import FetchRequest
+from libs.spec import get_spec
+from engine.base import SearchEngine
 
 logger = setup_logger(name='Ask')
 
 
-class Ask:
+class Ask(SearchEngine):
+    name = 'Ask'
     base_url = 'https://www.ask.com'
 
     def __init__(self, debug=False):
         self.debug = debug
-        self.fetch = FetchRequest()
+        self.fetch = FetchRequest(engine='Ask')
         self.query = {}
         self.filtering = True
 
         if self.debug:
             logger.setLevel(DEBUG)
 
-    def search(self, keyword):
-        search_url = self.build_query(str(keyword))
-        return self.search_run(search_url)
-
-    def search_run(self, url):
-        result = []
-        if not url:
-            return result
-
-        duplicate_page = 0
-        empty_page = 0
-        headers = {'Referer': self.base_url}
-        page = 1
-        while True:
-            if self.debug:
-                logger.debug('Page: %s %s' % (page, url))
-            else:
-                logger.info('Page: %s' % page)
-
-            html = self.fetch.get(url=url, headers=headers)
-            links = self.get_links(html)
-
-            if not links:
-                empty_page += 1
-                if page > 1:
-                    break
-            else:
-                duplicate = True
-                for link in links:
-                    if self.filtering:
-                        if is_blacklisted(link):
-                            logger.debug('[BLACKLIST] %s' % link)
-                            continue
-
-                    if link not in result:
-                        duplicate = False
-                        logger.info(link)
-                        result.append(link)
-                    else:
-                        logger.debug('[EXIST] %s' % link)
-
-                if duplicate:
-                    duplicate_page += 1
-
-            if duplicate_page >= 3:
-                break
-
-            if empty_page >= 2:
-                break
-
-            next_page = self.get_next_page(html)
-            if next_page and next_page != url:
-                headers.update({'Referer': url})
-                url = next_page
-            else:
-                break
-            page += 1
-
-        result = list(dict.fromkeys(result))
-        logger.info('Total links: %d' % len(result))
-
-        return result
+    def get_search_url(self, keyword):
+        return self.build_query(str(keyword))
 
     def build_query(self, keyword):
         search_url = urljoin(self.base_url, '/web')
@@ -96,69 +37,10 @@ class Ask:
 
     @staticmethod
     def get_links(html):
-        result = []
-        if not html:
-            return result
-
-        # Try result-link pattern first (original Ask layout)
-        patern_links = r'(?:<a[^>]+result-link[^>]+>)'
-        patern_href = r'href[\s=]+(?:[\'"])([^\'"]+)'
-        patern_utm = r'\?utm_content.+$'
-
-        matches = re.findall(patern_links, str(html), re.M | re.I)
-        for match in matches:
-            href = re.search(patern_href, match, re.I)
-
-            if href and len(href.groups()) >= 3:
-                try:
-                    valid_url = validate_url(href.group(3) or href.group(2))
-                    valid_url = re.sub(patern_utm, '', valid_url)
-                    if valid_url:
-                        result.append(valid_url)
-                except IndexError:
-                    pass
-
-        # Fallback: Ask now embeds URLs in JSON as "url":"https://..." patterns
-        if not result:
-            url_pattern = r'"url":"(https?://[^"]+)",?"score"'
-            json_urls = re.findall(url_pattern, str(html), re.I)
-            for url in json_urls:
-                valid_url = validate_url(url)
-                if valid_url:
-                    valid_url = re.sub(patern_utm, '', valid_url)
-                    result.append(valid_url)
-
-        # Second fallback: extract serpIndex URLs
-        if not result:
-            serp_pattern = r'serpIndex[^"]*"url":"(https?://[^"]+)"'
-            serp_urls = re.findall(serp_pattern, str(html), re.I)
-            for url in serp_urls:
-                valid_url = validate_url(url)
-                if valid_url:
-                    valid_url = re.sub(patern_utm, '', valid_url)
-                    result.append(valid_url)
-
-        if result:
-            result = list(dict.fromkeys(result))
-
-        return result
+        return get_spec('ask').get_links(html)
 
     def get_next_page(self, html):
-        next_page = ''
-        if not html:
-            return next_page
-
-        patern_next = r'(?:<li[^>]+PartialWebPagination-next[^>]+>)(\s+)?(?:<a[^>]+>)'
-        patern_href = r'href[\s=]+((?:")(.*?)(?:")|(?:\')(.*?)(?:\'))'
-
-        matches = re.search(patern_next, str(html), re.M | re.I)
-        if matches:
-            href = re.search(patern_href, matches.group(0), re.I)
-            if href and len(href.groups()) >= 3:
-                path = href.group(3) or href.group(2)
-                next_page = validate_url(urljoin(self.base_url, path))
-
-        return next_page
+        return get_spec('ask').get_next_page(html, self.base_url)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+from utils.blacklist import is_blacklisted
+from libs.canonical import canonicalize_url, get_dedup_key
+from libs.async_fetch import AsyncFetchRequest
+from libs.token_cache import default_token_cache
+
+
+class SearchEngine:
+    """
+    Page loop shared by the scraping engines.
+
+    Subclasses set name and base_url, create self.fetch and provide
+    get_search_url(keyword), get_links(doc) and get_next_page(doc). Each page
+    is fetched once as a Document, so get_links and get_next_page share one
+    parse. Paging stops after two empty or three duplicate pages.
+
+    Engines whose query is built from homepage tokens set token_key; a blocked
+    or empty first page then drops the cached tokens.
+
+    search_async() runs the same loop with the pages fetched on the running
+    event loop. Engines that fetch more than the result pages themselves
+    (blocking, from get_links or fetch_page) set async_pages to False.
+    """
+    name = None
+    base_url = ''
+    token_key = None
+    # Text of an engine's "nothing found" page; such a page ends the search
+    no_results = None
+    async_pages = True
+
+    debug = False
+    filtering = True
+
+    @property
+    def logger(self):
+        return logging.getLogger(self.name)
+
+    def search(self, keyword):
+        # Cached tokens that no longer build a URL are useless
+        url = default_token_cache.invalidate_on_empty(self.token_key, self.get_search_url(keyword))
+
+        return self.search_run(url)
+
+    def get_search_url(self, keyword):
+        raise NotImplementedError
+
+    def get_headers(self):
+        return {'Referer': self.base_url}
+
+    def fetch_page(self, url, headers):
+        return self.fetch.get_document(url, headers=headers, store=False)
+
+    async def search_async(self, keyword):
+        # Homepage tokens are still fetched with the blocking client
+        url = await asyncio.to_thread(self.get_search_url, keyword)
+        url = default_token_cache.invalidate_on_empty(self.token_key, url)
+
+        fetch = AsyncFetchRequest(engine=self.name, user_agent=self.fetch.user_agent,
+                                  keep_alive=self.fetch.keep_alive and self.fetch.pool.enabled)
+        try:
+            return await self.search_run_async(url, fetch)
+        finally:
+            await fetch.close()
+
+    def search_run(self, url):
+        pages = self.pages(url, self.fetch)
+        try:
+            request = next(pages)
+            while True:
+                request = pages.send(self.fetch_page(*request))
+        except StopIteration as stop:
+            return stop.value
+
+    async def search_run_async(self, url, fetch):
+        pages = self.pages(url, fetch)
+        try:
+            request = next(pages)
+            while True:
+                url, headers = request
+                request = pages.send(await fetch.get_document(url, headers=headers, store=False))
+        except StopIteration as stop:
+            return stop.value
+
+    def pages(self, url, fetch):
+        """
+        The page loop, apart from fetching: yields (url, headers) of each page
+        and is sent back its Document (None on error). Returns the links.
+        """
+        result = []
+        seen = set()
+        if not url:
+            return result
+
+        logger = self.logger
+        duplicate_page = 0
+        empty_page = 0
+        headers = self.get_headers()
+        page = 1
+        while True:
+            if self.debug:
+                logger.debug('Page: %s %s' % (page, url))
+            else:
+                logger.info('Page: %s' % page)
+
+            doc = yield url, headers
+            if doc is None and fetch.last_error:
+                logger.debug('[ERROR] %s' % fetch.last_error)
+                if page == 1:
+                    # A blocked first page (captcha, 403/429) may come from stale tokens
+                    default_token_cache.invalidate_on_empty(self.token_key, doc)
+                break
+
+            if doc is not None and self.no_results and self.no_results in doc:
+                fetch.keep_pending(False)
+                logger.error('No results returned from %s' % self.name)
+                break
+
+            links = self.get_links(doc)
+            fetch.keep_pending(bool(links))
+            if page == 1:
+                # Homepage tokens may be stale (layout change or captcha)
+                default_token_cache.invalidate_on_empty(self.token_key, links)
+
+            if not links:
+                empty_page += 1
+                if page > 1:
+                    break
+            else:
+                duplicate = True
+                for link in links:
+                    if self.filtering:
+                        if is_blacklisted(link):
+                            logger.debug('[BLACKLIST] %s' % link)
+                            continue
+
+                    key = get_dedup_key(link)
+                    if key not in seen:
+                        seen.add(key)
+                        duplicate = False
+                        link = canonicalize_url(link)
+                        logger.info(link)
+                        result.append(link)
+                    else:
+                        logger.debug('[EXIST] %s' % link)
+
+                if duplicate:
+                    duplicate_page += 1
+
+            if duplicate_page >= 3:
+                break
+
+            if empty_page >= 2:
+                break
+
+            next_page = self.get_next_page(doc)
+            if next_page and next_page != url:
+                headers.update({'Referer': url})
+                url = next_page
+            else:
+                break
+            page += 1
+
+        result = list(dict.fromkeys(result))
+        logger.info('Total links: %d' % len(result))
+
+        return result
@@ -1,114 +1,77 @@
 import re
 from logging import DEBUG
 from urllib.parse import urljoin, urlencode
-from utils.blacklist import is_blacklisted
-from utils.helper import setup_logger, validate_url
+from utils.helper import setup_logger
 from libs.fetch import FetchRequest
+from libs.spec import get_spec
+from libs.token_cache import default_token_cache
+from engine.base import SearchEngine
 
 logger = setup_logger(name='Bing')
 
 
-class Bing:
+class Bing(SearchEngine):
+    name = 'Bing'
+    token_key = 'Bing'
     base_url = 'https://www.bing.com'
 
     def __init__(self, debug=False):
         self.debug = debug
-        self.fetch = FetchRequest()
+        self.fetch = FetchRequest(engine='Bing')
         self.query = {}
         self.filtering = True
 
         if self.debug:
             logger.setLevel(DEBUG)
 
-    def search(self, keyword: str) -> list:
+    def get_search_url(self, keyword):
         self.query.update({'q': keyword})
         self.build_query()
 
         search_url = urljoin(self.base_url, '/search')
         url = '%s?%s' % (search_url, urlencode(self.query))
 
-        return self.search_run(url)
-
-    def search_run(self, url):
-        result = []
-        if not url:
-            return result
-
-        duplicate_page = 0
-        empty_page = 0
-        headers = {'Referer': self.base_url}
-
-        page = 1
-        while True:
-            if self.debug:
-                logger.debug('Page: %s %s' % (page, url))
-            else:
-                logger.info('Page: %s' % page)
-
-            html = self.fetch.get(url, headers=headers)
-            links = self.get_links(html)
-
-            if not links:
-                empty_page += 1
-                if page > 1:
-                    break
-            else:
-                duplicate = True
-                for link in links:
-                    if self.filtering:
-                        if is_blacklisted(link):
-                            logger.debug('[BLACKLIST] %s' % link)
-                            continue
-
-                    if link not in result:
-                        duplicate = False
-                        logger.info(link)
-                        result.append(link)
-                    else:
-                        logger.debug('[EXIST] %s' % link)
-
-                if duplicate:
-                    duplicate_page += 1
-
-            if duplicate_page >= 3:
-                break
-
-            if empty_page >= 2:
-                break
-
-            next_page = self.get_next_page(html)
-            if next_page and next_page != url:
-                headers.update({'Referer': url})
-                url = next_page
-            else:
-                break
-            page += 1
-
-        result = list(dict.fromkeys(result))
-        logger.info('Total links: %d' % len(result))
-
-        return result
+        return url
 
     def build_query(self):
-        html = self.fetch.get(self.base_url)
+        tokens = self.get_query_tokens()
 
-        if html:
+        if tokens:
             self.query.update({'sp': -1})
             self.query.update({'qs': 'n'})
             self.query.update({'sk': ''})
 
-            form_value = self.get_query_form_value(html)
+            form_value = tokens.get('form')
             if form_value:
                 self.query.update({'form': form_value})
 
-            cvid = self.get_query_cvid(html)
+            cvid = tokens.get('cvid')
             if cvid:
                 self.query.update({'cvid': cvid})
 
+    def get_query_tokens(self):
+        tokens = default_token_cache.get('Bing')
+        if tokens is not None:
+            return tokens
+
+        html = self.fetch.get(self.base_url, cache=False)
+        if not html:
+            return
+
+        tokens = {
+            'form': self.get_query_form_value(html),
+            'cvid': self.get_query_cvid(html),
+        }
+        # A homepage without form/IG values (consent page, captcha) gives nothing to reuse
+        if tokens['form'] or tokens['cvid']:
+            default_token_cache.set('Bing', tokens)
+
+        return tokens
+
     def get_query_form_value(self, html=None):
         form_value = ''
         if not html:
-            html = self.fetch.get(self.base_url)
+            html = self.fetch.get(self.base_url, cache=False)
 
         patern_input = r'<[\s]?input\s+(.*?)[\s]?\/>'
         patern_input_form = r'name[\s=]+((?:")form(?:")|(?:\')form(?:\'))'
@@ -127,7 +90,7 @@ class Bing:
     def get_query_cvid(self, html=None):
         cvid = ''
         if not html:
-            html = self.fetch.get(self.base_url)
+            html = self.fetch.get(self.base_url, cache=False)
 
         patern_ig = r'IG[\s:]+(?:")([A-F0-9]+)(?:")|(?:\')([A-F0-9]+)(?:\')'
 
@@ -142,50 +105,10 @@ class Bing:
 
     @staticmethod
     def get_links(html):
-        result = []
-        if not html:
-            return result
-
-        # Try b_algo pattern first (classic Bing layout)
-        patern_links = r'<(li|div)\s+class=["\']b_algo["\'].*?>'
-        patern_href = r'href=["\']([^"\']+)["\']'
-
-        matches = re.findall(patern_links, str(html), re.M | re.I)
-        # We need to find the anchors after b_algo elements - use the raw links fallback directly
-
-        # Fallback: extract all external links from h2/a patterns when b_algo is gone
-        # (Bing uses JS-rendered pages that may not include b_algo)
-        if not result:
-            raw_links = re.findall(
-                r'<a[^>]*href="(https?://(?!www\.bing\.|login\.live|account\.microsoft|privacy\.microsoft|aka\.ms|go\.microsoft|support\.microsoft|office\.com|onedrive\.live|microsoft365\.com|mmt\.akadns)[^"]+)"[^>]*>',
-                str(html), re.I)
-            for match in raw_links:
-                valid_url = validate_url(match[0])
-                if valid_url:
-                    result.append(valid_url)
-
-        if result:
-            result = list(dict.fromkeys(result))
-
-        return result
-
-    def get_next_page(self, html=None):
-        next_page = ''
-        if not html:
-            return next_page
-
-        patern_sbpagn = r'(?:<a[^>]+(sb_pagN(_bp)?)+[^>]+>)'
-        patern_href = r'href[\s=]+((?:")(.*?)(?:")|(?:\')(.*?)(?:\'))'
-
-        matches = re.search(patern_sbpagn, str(html), re.M | re.I)
-        if matches:
-            href = re.search(patern_href, matches.group(0), re.I)
-
-            if href and len(href.groups()) >= 3:
-                path = href.group(3) or href.group(2)
-                next_page = validate_url(urljoin(self.base_url, path))
+        return get_spec('bing').get_links(html)
 
-        return next_page
+    def get_next_page(self, html):
+        return get_spec('bing').get_next_page(html, self.base_url)
 
 
 if __name__ == '__main__':
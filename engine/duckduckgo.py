@@ -1,93 +1,44 @@
 import re
 from logging import DEBUG
 from urllib.parse import urljoin, urlencode, urlparse, parse_qs
-from utils.blacklist import is_blacklisted
 from utils.helper import setup_logger, validate_url
-from libs.html_parser import NativeHTMLParser
+from libs.document import Document
+from libs.extractor import Selector
 from libs.fetch import FetchRequest
+from engine.base import SearchEngine
 
 logger = setup_logger(name='Duckduckgo')
 
 
-class Duckduckgo:
+class Duckduckgo(SearchEngine):
+    name = 'Duckduckgo'
     base_url = 'https://html.duckduckgo.com'
     search_url = 'https://html.duckduckgo.com/html/'
+    selectors = {
+        'links': Selector('a', attrs={'class': 'result__url'}),
+        'titles': Selector('a', attrs={'class': 'result__a'}),
+        'anchors': Selector('a'),
+        'forms': Selector('form'),
+    }
+    # Results and the pager forms both live in div#links; stop parsing after it
+    regions = [Selector('div', attrs={'id': 'links'})]
 
     def __init__(self, debug=False):
         self.debug = debug
-        self.fetch = FetchRequest()
+        self.fetch = FetchRequest(engine='Duckduckgo')
         self.query = {}
         self.filtering = True
 
         if self.debug:
             logger.setLevel(DEBUG)
 
-    def search(self, keyword):
+    def get_search_url(self, keyword):
         self.query.update({'q': str(keyword)})
         search_url = self.build_query(keyword=str(keyword))
         if search_url:
             search_url = urljoin(self.base_url, search_url)
 
-        return self.search_run(search_url)
-
-    def search_run(self, url):
-        result = []
-        if not url:
-            return result
-
-        duplicate_page = 0
-        empty_page = 0
-        headers = {'Referer': self.base_url}
-        page = 1
-        while True:
-            if self.debug:
-                logger.debug('Page: %s %s' % (page, url))
-            else:
-                logger.info('Page: %s' % page)
-
-            html = self.fetch.get(url, headers=headers)
-            links = self.get_links(html)
-
-            if not links:
-                empty_page += 1
-                if page > 1:
-                    break
-            else:
-                duplicate = True
-                for link in links:
-                    if self.filtering:
-                        if is_blacklisted(link):
-                            logger.debug('[BLACKLIST] %s' % link)
-                            continue
-
-                    if link not in result:
-                        duplicate = False
-                        logger.info(link)
-                        result.append(link)
-                    else:
-                        logger.debug('[EXIST] %s' % link)
-
-                if duplicate:
-                    duplicate_page += 1
-
-            if duplicate_page >= 3:
-                break
-
-            if empty_page >= 2:
-                break
-
-            next_page = self.get_next_page(html)
-            if next_page:
-                headers.update({'Referer': url})
-                url = next_page
-            else:
-                break
-            page += 1
-
-        result = list(dict.fromkeys(result))
-        logger.info('Total links: %d' % len(result))
-
-        return result
+        return search_url
 
     def build_query(self, keyword, html=None):
         search_url = ''
@@ -102,16 +53,12 @@ class Duckduckgo:
         if not html:
             return result
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
-
-        if _parser.root is None:
-            return result
+        doc = Document.wrap(html)
+        extracted = doc.extract(Duckduckgo.selectors, Duckduckgo.regions)
 
         # DuckDuckGo HTML lite uses a.result__url for display links with href="/l/?uddg=..."
         # The actual target URL is embedded in the "uddg" query parameter
-        links = _parser.root.findall('.//a[@class="result__url"]')
+        links = extracted.get('links')
 
         for link in links:
             _href = link.get('href')
@@ -127,7 +74,7 @@ class Duckduckgo:
 
         # Fallback: also try result__a (title links) which also have /l/?uddg= format
         if not result:
-            links = _parser.root.findall('.//a[@class="result__a"]')
+            links = extracted.get('titles')
             for link in links:
                 _href = link.get('href')
                 if _href:
@@ -149,15 +96,11 @@ class Duckduckgo:
         if not html:
             return next_page
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
-
-        if _parser.root is None:
-            return next_page
+        doc = Document.wrap(html)
+        extracted = doc.extract(self.selectors, self.regions)
 
         # DuckDuckGo HTML pagination: form with next button or link with class 'result-more'
-        more_links = _parser.root.findall('.//a')
+        more_links = extracted.get('anchors')
         for _link in more_links:
             _href = _link.get('href')
             _text = _link.text
@@ -180,7 +123,7 @@ class Duckduckgo:
 
         # Fallback: check for form with 's' (start) parameter
         if not next_page:
-            forms = _parser.root.findall('.//form')
+            forms = extracted.get('forms')
             for form in forms:
                 action = form.get('action', '')
                 if 'next' in action.lower() or ('s=' in action and '/html/' in action):
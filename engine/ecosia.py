@@ -1,93 +1,39 @@
 import re
 from logging import DEBUG
 from urllib.parse import urljoin, urlencode, urlparse, parse_qs
-from utils.blacklist import is_blacklisted
 from utils.helper import setup_logger, validate_url
-from libs.html_parser import NativeHTMLParser
+from libs.document import Document
+from libs.embedded_json import find_results
 from libs.fetch import FetchRequest
+from engine.base import SearchEngine
 
 logger = setup_logger(name='Ecosia')
 
 
-class Ecosia:
+class Ecosia(SearchEngine):
+    name = 'Ecosia'
     base_url = 'https://www.ecosia.org'
     search_url = 'https://www.ecosia.org/search'
+    # Script state holding the results, and the keys a record needs to count as one
+    state_markers = ('__NEXT_DATA__', '__INITIAL_STATE__')
+    result_keys = ('title', ('description', 'snippet'))
 
     def __init__(self, debug=False):
         self.debug = debug
-        self.fetch = FetchRequest()
+        self.fetch = FetchRequest(engine='Ecosia')
         self.query = {}
         self.filtering = True
 
         if self.debug:
             logger.setLevel(DEBUG)
 
-    def search(self, keyword):
+    def get_search_url(self, keyword):
         self.query.update({'q': str(keyword), 'method': 'index'})
         search_url = self.build_query(keyword=str(keyword))
         if search_url:
             search_url = urljoin(self.base_url, search_url)
 
-        return self.search_run(search_url)
-
-    def search_run(self, url):
-        result = []
-        if not url:
-            return result
-
-        duplicate_page = 0
-        empty_page = 0
-        headers = {'Referer': self.base_url}
-        page = 1
-        while True:
-            if self.debug:
-                logger.debug('Page: %s %s' % (page, url))
-            else:
-                logger.info('Page: %s' % page)
-
-            html = self.fetch.get(url, headers=headers)
-            links = self.get_links(html)
-
-            if not links:
-                empty_page += 1
-                if page > 1:
-                    break
-            else:
-                duplicate = True
-                for link in links:
-                    if self.filtering:
-                        if is_blacklisted(link):
-                            logger.debug('[BLACKLIST] %s' % link)
-                            continue
-
-                    if link not in result:
-                        duplicate = False
-                        logger.info(link)
-                        result.append(link)
-                    else:
-                        logger.debug('[EXIST] %s' % link)
-
-                if duplicate:
-                    duplicate_page += 1
-
-            if duplicate_page >= 3:
-                break
-
-            if empty_page >= 2:
-                break
-
-            next_page = self.get_next_page(html)
-            if next_page:
-                headers.update({'Referer': url})
-                url = next_page
-            else:
-                break
-            page += 1
-
-        result = list(dict.fromkeys(result))
-        logger.info('Total links: %d' % len(result))
-
-        return result
+        return search_url
 
     def build_query(self, keyword, html=None):
         search_url = ''
@@ -102,15 +48,18 @@ class Ecosia:
         if not html:
             return result
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
+        doc = Document.wrap(html)
+
+        # Result state shipped in the page's scripts, no tree needed
+        result = Ecosia._extract_from_state(doc)
+        if result:
+            return list(dict.fromkeys(result))
 
-        if _parser.root is None:
+        if doc.root is None:
             return result
 
         # Ecosia result links: class="result__link" or class="_2sFQ_"
-        links = _parser.root.findall('.//a[@class="result__link"]')
+        links = doc.root.findall('.//a[@class="result__link"]')
         for link in links:
             _href = link.get('href')
             if _href and _href.startswith('/search/redirect?'):
@@ -125,27 +74,24 @@ class Ecosia:
 
         # Fallback: try generic result link patterns
         if not result:
-            all_links = _parser.root.findall('.//a')
-            for link in all_links:
-                _class = link.get('class', '')
+            # Look for result-related classes
+            for link in doc.anchors.class_contains('result', 'mainline', 'title', 'heading'):
                 _href = link.get('href')
                 if not _href:
                     continue
 
-                # Look for result-related classes
-                if any(x in _class for x in ['result', 'mainline', 'title', 'heading']):
-                    # Skip internal ecosia links
-                    if _href.startswith('http') and 'ecosia.org' not in _href:
-                        valid_url = validate_url(_href)
+                # Skip internal ecosia links
+                if _href.startswith('http') and 'ecosia.org' not in _href:
+                    valid_url = validate_url(_href)
+                    if valid_url:
+                        result.append(valid_url)
+                elif _href.startswith('/search/redirect'):
+                    parsed = urlparse(_href)
+                    params = parse_qs(parsed.query)
+                    if 'url' in params:
+                        valid_url = validate_url(params['url'][0])
                         if valid_url:
                             result.append(valid_url)
-                    elif _href.startswith('/search/redirect'):
-                        parsed = urlparse(_href)
-                        params = parse_qs(parsed.query)
-                        if 'url' in params:
-                            valid_url = validate_url(params['url'][0])
-                            if valid_url:
-                                result.append(valid_url)
 
         # Final fallback: extract from __NEXT_DATA__ or embedded JSON
         if not result:
@@ -156,13 +102,26 @@ class Ecosia:
 
         return result
 
+    @staticmethod
+    def _extract_from_state(doc):
+        """Extract result URLs from the decoded __NEXT_DATA__ / embedded JSON state."""
+        links = []
+        for marker in Ecosia.state_markers:
+            for item in find_results(doc.json_payloads(marker), require=Ecosia.result_keys):
+                valid_url = validate_url(item['url'])
+                if valid_url and 'ecosia.org' not in valid_url:
+                    links.append(valid_url)
+            if links:
+                break
+        return links
+
     @staticmethod
     def _extract_from_json(html):
         """Extract result URLs from Ecosia embedded JSON data."""
         links = []
         try:
             # Try to find result URLs in embedded JSON/script data
-            for m in re.finditer(r'"url"\s*:\s*"(https?://[^"]+)"', html):
+            for m in re.finditer(r'"url"\s*:\s*"(https?://[^"]+)"', str(html)):
                 url = m.group(1).replace('\\u0026', '&').replace('\\/', '/')
                 valid_url = validate_url(url)
                 if valid_url and 'ecosia.org' not in valid_url:
@@ -176,29 +135,24 @@ class Ecosia:
         if not html:
             return next_page
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
+        doc = Document.wrap(html)
 
-        if _parser.root is None:
+        if doc.root is None:
             return next_page
 
         # Look for pagination / "Next" button
-        pagination_links = _parser.root.findall('.//a')
-        for _link in pagination_links:
+        for _link in doc.anchors.text_matches(r'next|more|further'):
             _href = _link.get('href')
-            _text = _link.text
             if not _href:
                 continue
 
-            if _text and re.search(r'next|more|further', _text, re.I):
-                next_page = validate_url(urljoin(self.base_url, _href))
-                if next_page:
-                    break
+            next_page = validate_url(urljoin(self.base_url, _href))
+            if next_page:
+                break
 
         # Fallback: check for 'next' or 'page' parameter in embedded data
         if not next_page:
-            match = re.search(r'"page"\s*:\s*(\d+)', html)
+            match = re.search(r'"page"\s*:\s*(\d+)', str(html))
             if match:
                 current_page = int(match.group(1))
                 next_page_num = current_page + 1
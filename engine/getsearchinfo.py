@@ -2,114 +2,83 @@ import re
 from logging import DEBUG
 from urllib.parse import urljoin, urlencode
 from html import unescape as unquote_html
-from utils.blacklist import is_blacklisted
 from utils.helper import setup_logger, validate_url
-from libs.html_parser import NativeHTMLParser
+from libs.document import Document
+from libs.embedded_json import find_results
 from libs.fetch import FetchRequest
+from libs.token_cache import default_token_cache
+from engine.base import SearchEngine
 
 logger = setup_logger(name='GetSearchInfo')
 
 
-class GetSearchInfo:
+class GetSearchInfo(SearchEngine):
+    name = 'GetSearchInfo'
+    token_key = 'GetSearchInfo'
     base_url = 'https://www.getsearchinfo.com'
+    # Script state holding the results, and the keys a record needs to count as one
+    state_markers = ('__NEXT_DATA__', '__INITIAL_STATE__')
+    result_keys = ('title', ('description', 'snippet'))
 
     def __init__(self, debug=False):
         self.debug = debug
-        self.fetch = FetchRequest()
+        self.fetch = FetchRequest(engine='GetSearchInfo')
         self.query = {}
         self.filtering = True
 
         if self.debug:
             logger.setLevel(DEBUG)
 
-    def search(self, keyword):
+    def get_search_url(self, keyword):
         self.query.update({'q': str(keyword)})
         search_url = self.build_query()
         if search_url:
             search_url = urljoin(self.base_url, search_url)
 
-        return self.search_run(search_url)
+        return search_url
 
-    def search_run(self, url):
-        result = []
-        if not url:
-            return result
+    def build_query(self, html=None):
+        search_url = ''
+        tokens = self.get_query_tokens(html)
+        if not tokens:
+            return search_url
 
-        duplicate_page = 0
-        empty_page = 0
-        headers = {'Referer': self.base_url}
-        page = 1
-        while True:
-            if self.debug:
-                logger.debug('Page: %s %s' % (page, url))
-            else:
-                logger.info('Page: %s' % page)
-
-            html = self.fetch.get(url, headers=headers)
-            links = self.get_links(html)
-
-            if not links:
-                empty_page += 1
-                if page > 1:
-                    break
-            else:
-                duplicate = True
-                for link in links:
-                    if self.filtering:
-                        if is_blacklisted(link):
-                            logger.debug('[BLACKLIST] %s' % link)
-                            continue
-
-                    if link not in result:
-                        duplicate = False
-                        logger.info(link)
-                        result.append(link)
-                    else:
-                        logger.debug('[EXIST] %s' % link)
-
-                if duplicate:
-                    duplicate_page += 1
-
-            if duplicate_page >= 3:
-                break
+        search_url = tokens.get('action')
+        self.query.update(tokens.get('inputs'))
 
-            if empty_page >= 2:
-                break
+        if not search_url:
+            # Fallback: use /web endpoint directly
+            search_url = '/web'
 
-            next_page = self.get_next_page(html)
-            if next_page and next_page != url:
-                headers.update({'Referer': url})
-                url = next_page
-            else:
-                break
-            page += 1
+        if search_url:
+            search_url = '%s?%s' % (search_url, urlencode(self.query))
 
-        result = list(dict.fromkeys(result))
-        logger.info('Total links: %d' % len(result))
+        return search_url
 
-        return result
+    def get_query_tokens(self, html=None):
+        tokens = None if html else default_token_cache.get('GetSearchInfo')
+        if tokens is not None:
+            return tokens
 
-    def build_query(self, html=None):
-        search_url = ''
         if not html:
-            html = self.fetch.get(self.base_url)
+            html = self.fetch.get(self.base_url, cache=False)
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
+        doc = Document.wrap(html)
 
-        if _parser.root is None:
-            return search_url
+        if doc.root is None:
+            return
+
+        tokens = {'action': '', 'inputs': {}}
 
         # Try legacy form first
-        form_header = _parser.root.find('.//form[@name="searchform-top"]')
+        form_header = doc.root.find('.//form[@name="searchform-top"]')
         if not form_header:
-            form_header = _parser.root.find('.//form[@id="searchForm"]')
+            form_header = doc.root.find('.//form[@id="searchForm"]')
         if not form_header:
-            form_header = _parser.root.find('.//form[@action="/web"]')
+            form_header = doc.root.find('.//form[@action="/web"]')
 
         if form_header:
-            search_url = form_header.get('action')
+            tokens['action'] = form_header.get('action')
             inputs = form_header.findall('.//input[@type="hidden"]')
             for inp in inputs:
                 _name = inp.get('name')
@@ -118,16 +87,13 @@ class GetSearchInfo:
                     continue
 
                 if _name != 'q':
-                    self.query.update({_name: _value or ''})
+                    tokens['inputs'].update({_name: _value or ''})
 
-        if not search_url:
-            # Fallback: use /web endpoint directly
-            search_url = '/web'
-
-        if search_url:
-            search_url = '%s?%s' % (search_url, urlencode(self.query))
+        # Tokens without a form action cannot build a search URL
+        if tokens['action']:
+            default_token_cache.set('GetSearchInfo', tokens)
 
-        return search_url
+        return tokens
 
     @staticmethod
     def get_links(html):
@@ -135,15 +101,25 @@ class GetSearchInfo:
         if not html:
             return result
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
+        doc = Document.wrap(html)
+
+        # Results decoded from the JSON state the page embeds for React
+        for marker in GetSearchInfo.state_markers:
+            for item in find_results(doc.json_payloads(marker), require=GetSearchInfo.result_keys):
+                valid_url = GetSearchInfo._clean_json_url(item['url'])
+                if valid_url:
+                    result.append(valid_url)
+            if result:
+                break
+
+        if result:
+            return list(dict.fromkeys(result))
 
-        if _parser.root is None:
+        if doc.root is None:
             return result
 
-        # Try legacy XPath pattern first
-        links = _parser.root.findall('.//div[@class="PartialSearchResults-item-title"]//a')
+        # Try legacy XPath pattern
+        links = doc.root.findall('.//div[@class="PartialSearchResults-item-title"]//a')
         
         for link in links:
             _class = link.get('class')
@@ -156,30 +132,15 @@ class GetSearchInfo:
 
         # Fallback: Extract URLs from embedded JSON (React-rendered results)
         if not result:
-            # The page embeds results as JSON in the HTML
-            urls = re.findall(r'"url":"(https?://[^"]+)"', html)
-            titles = re.findall(r'"title":"([^"]+)"', html)
-            
-            for url in urls:
-                # Filter out non-result URLs (tracking, assets, etc)
-                if any(x in url.lower() for x in ['getsearchinfo.com/static', 'getsearchinfo.com/web?ad=',
-                                                   'fonts.gstatic', 'fonts.googleapis', 'jquery']):
-                    continue
-                
-                valid_url = validate_url(url)
+            # The page embeds results as JSON in the HTML; scan for it when it does not decode
+            for url in re.findall(r'"url":"(https?://[^"]+)"', str(html)):
+                valid_url = GetSearchInfo._clean_json_url(url)
                 if valid_url:
-                    # Clean up query parameters but keep essentials
-                    valid_url = re.sub(r'\?utm_content=.+$', '', valid_url)
                     result.append(valid_url)
 
         # Fallback: try related search links
         if not result:
-            links = []
-            for a in _parser.root.findall('.//a'):
-                cls = a.get('class', '')
-                if 'related-search' in cls:
-                    links.append(a)
-            for link in links:
+            for link in doc.anchors.class_contains('related-search'):
                 _href = link.get('href')
                 valid_url = validate_url(_href)
                 if valid_url:
@@ -190,20 +151,32 @@ class GetSearchInfo:
 
         return result
 
+    @staticmethod
+    def _clean_json_url(url):
+        # Filter out non-result URLs (tracking, assets, etc)
+        if any(x in url.lower() for x in ['getsearchinfo.com/static', 'getsearchinfo.com/web?ad=',
+                                           'fonts.gstatic', 'fonts.googleapis', 'jquery']):
+            return
+
+        valid_url = validate_url(url)
+        if valid_url:
+            # Clean up query parameters but keep essentials
+            valid_url = re.sub(r'\?utm_content=.+$', '', valid_url)
+
+        return valid_url
+
     def get_next_page(self, html):
         next_page = ''
         if not html:
             return next_page
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
+        doc = Document.wrap(html)
 
-        if _parser.root is None:
+        if doc.root is None:
             return next_page
 
         # Try legacy pattern
-        find_next_page = _parser.root.find('.//li[@class="PartialWebPagination-next"]//a')
+        find_next_page = doc.root.find('.//li[@class="PartialWebPagination-next"]//a')
         if find_next_page is not None:
             _href = find_next_page.get('href')
             if _href:
@@ -212,12 +185,12 @@ class GetSearchInfo:
         # Fallback: try React-rendered pagination
         if not next_page:
             # Find "Next" link in pagination
-            next_link = _parser.root.find('.//a[@title="Next"]')
+            next_link = doc.root.find('.//a[@title="Next"]')
             if not next_link:
-                next_link = _parser.root.find('.//a[@data-testid="pagination-item-next"]')
+                next_link = doc.root.find('.//a[@data-testid="pagination-item-next"]')
             if not next_link:
                 # Find the first pagination item that isn't page 1
-                items = _parser.root.findall('.//a[@data-testid="pagination-item"]')
+                items = doc.root.findall('.//a[@data-testid="pagination-item"]')
                 for item in items:
                     _href = item.get('href')
                     _class = item.get('class') or ''
@@ -1,108 +1,59 @@
 import re
 from logging import DEBUG
 from urllib.parse import urljoin, urlencode
-from utils.blacklist import is_blacklisted
 from utils.helper import setup_logger, validate_url
-from libs.html_parser import NativeHTMLParser
+from libs.document import Document
+from libs.extractor import Selector
 from libs.fetch import FetchRequest
+from engine.base import SearchEngine
 
 logger = setup_logger(name='Gigablast')
 
 
-class Gigablast:
+class Gigablast(SearchEngine):
+    name = 'Gigablast'
     base_url = 'https://www.gigablast.com'
+    # Results come before the pager box; nothing after it is needed
+    regions = [Selector('div', attrs={'id': 'box'})]
+    # fetch_page follows the uxrl link with the blocking client
+    async_pages = False
 
     def __init__(self, debug=False):
         self.debug = debug
-        self.fetch = FetchRequest()
+        self.fetch = FetchRequest(engine='Gigablast')
         self.query = {}
         self.filtering = True
 
         if self.debug:
             logger.setLevel(DEBUG)
 
-    def search(self, keyword):
+    def get_search_url(self, keyword):
         self.query.update({'q': str(keyword)})
         search_url = self.build_query(keyword=str(keyword))
         if search_url:
             search_url = urljoin(self.base_url, search_url)
 
-        return self.search_run(search_url)
-
-    def search_run(self, url):
-        result = []
-        if not url:
-            return result
+        return search_url
 
-        duplicate_page = 0
-        empty_page = 0
-        headers = {'Referer': self.base_url}
-        page = 1
-        while True:
-            if self.debug:
-                logger.debug('Page: %s %s' % (page, url))
-            else:
-                logger.info('Page: %s' % page)
-
-            html = self.fetch.get(url, headers=headers)
-            html_link = self.get_html_link(html, url)
-            links = self.get_links(html_link)
-
-            if not links:
-                empty_page += 1
-                if page > 1:
-                    break
-            else:
-                duplicate = True
-                for link in links:
-                    if self.filtering:
-                        if is_blacklisted(link):
-                            logger.debug('[BLACKLIST] %s' % link)
-                            continue
-
-                    if link not in result:
-                        duplicate = False
-                        logger.info(link)
-                        result.append(link)
-                    else:
-                        logger.debug('[EXIST] %s' % link)
-
-                if duplicate:
-                    duplicate_page += 1
-
-            if duplicate_page >= 3:
-                break
-
-            if empty_page >= 2:
-                break
-
-            next_page = self.get_next_page(html_link)
-            if next_page and next_page != url:
-                headers.update({'Referer': url})
-                url = next_page
-            else:
-                break
-            page += 1
-
-        result = list(dict.fromkeys(result))
-        logger.info('Total links: %d' % len(result))
+    def fetch_page(self, url, headers):
+        doc = self.fetch.get_document(url, headers=headers, store=False)
+        if doc is None:
+            return doc
 
-        return result
+        return Document.wrap(self.get_html_link(doc, url))
 
     def build_query(self, keyword):
         search_url = ''
-        html = self.fetch.get(self.base_url)
+        html = self.fetch.get(self.base_url, cache=False)
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
+        doc = Document.wrap(html)
 
-        if _parser.root is None:
+        if doc.root is None:
             return search_url
 
         query = dict(self.query)
 
-        mainform = _parser.root.find('.//form[@action="search"]')
+        mainform = doc.root.find('.//form[@action="search"]')
         if mainform:
             action = mainform.get('action')
             if action:
@@ -133,14 +84,13 @@ class Gigablast:
 
         html = self.get_html_link(html)
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
+        doc = Document.wrap(html)
+        root = doc.parse(self.regions)
 
-        if _parser.root is None:
+        if root is None:
             return result
 
-        links = _parser.root.findall('.//font//a')
+        links = root.findall('.//font//a')
 
         for link in links:
             if link is not None:
@@ -169,7 +119,7 @@ class Gigablast:
                     search_link = urljoin(self.base_url, search_path)
 
         if search_link:
-            html = self.fetch.get(search_link, headers={'Referer': referer})
+            html = self.fetch.get(search_link, headers={'Referer': referer}, store=False)
         return html
 
     def get_next_page(self, html, recheck=False):
@@ -177,14 +127,13 @@ class Gigablast:
         if not html:
             return next_page
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
+        doc = Document.wrap(html)
+        root = doc.parse(self.regions)
 
-        if _parser.root is None:
+        if root is None:
             return next_page
 
-        div_box = _parser.root.find('.//div[@id="box"]')
+        div_box = root.find('.//div[@id="box"]')
         if div_box:
             center_tags = div_box.findall('.//center/a')
 
@@ -1,20 +1,21 @@
-import re
 import random
 from logging import DEBUG
 from urllib.parse import urljoin, urlencode
-from utils.blacklist import is_blacklisted
-from utils.helper import setup_logger, validate_url, random_agent
+from utils.helper import setup_logger, random_agent
 from libs.fetch import FetchRequest
+from libs.spec import get_spec
+from engine.base import SearchEngine
 
 logger = setup_logger(name='Google')
 
 
-class Google:
+class Google(SearchEngine):
+    name = 'Google'
     base_url = 'https://www.google.com'
 
     def __init__(self, debug=False):
         self.debug = debug
-        self.fetch = FetchRequest()
+        self.fetch = FetchRequest(engine='Google')
         self.query = {}
         self.filtering = True
         self.user_agent = random_agent()
@@ -22,68 +23,11 @@ class Google:
         if self.debug:
             logger.setLevel(DEBUG)
 
-    def search(self, keyword):
-        search_url = self.build_query(str(keyword))
-        return self.search_run(search_url)
-
-    def search_run(self, url):
-        result = []
-        if not url:
-            return result
-
-        duplicate_page = 0
-        empty_page = 0
-        headers = {'Referer': self.base_url, 'User-Agent': self.user_agent}
-        page = 1
-        while True:
-            if self.debug:
-                logger.debug('Page: %s %s' % (page, url))
-            else:
-                logger.info('Page: %s' % page)
-
-            html = self.fetch.get(url, headers=headers)
-            links = self.get_links(html)
-
-            if not links:
-                empty_page += 1
-                if page > 1:
-                    break
-            else:
-                duplicate = True
-                for link in links:
-                    if self.filtering:
-                        if is_blacklisted(link):
-                            logger.debug('[BLACKLIST] %s' % link)
-                            continue
-
-                    if link not in result:
-                        duplicate = False
-                        logger.info(link)
-                        result.append(link)
-                    else:
-                        logger.debug('[EXIST] %s' % link)
-
-                if duplicate:
-                    duplicate_page += 1
-
-            if duplicate_page >= 3:
-                break
-
-            if empty_page >= 2:
-                break
-
-            next_page = self.get_next_page(html)
-            if next_page and next_page != url:
-                headers.update({'Referer': url})
-                url = next_page
-            else:
-                break
-            page += 1
-
-        result = list(dict.fromkeys(result))
-        logger.info('Total links: %d' % len(result))
-
-        return result
+    def get_search_url(self, keyword):
+        return self.build_query(str(keyword))
+
+    def get_headers(self):
+        return {'Referer': self.base_url, 'User-Agent': self.user_agent}
 
     def build_query(self, keyword):
         self.build_clients(keyword)
@@ -143,61 +87,10 @@ class Google:
 
     @staticmethod
     def get_links(html):
-        result = []
-        if not html:
-            return result
-
-        patern_google_cache = r'(https?://)webcache\.googleusercontent\.[^\/]+/search\?q=cache:[^:]+:' \
-                              r'(https?://)?(.+?)(\+?(&cd=[^&]+)(&hl=[^&]+)?(&ct=[^&]+)?(&gl=[^&]+)?.*)'
-
-        # Modern Google: extract URLs from /url?q= links
-        url_q = re.findall(r'href="/url\?q=([^&"]+)', str(html), re.I)
-        for url_part in url_q:
-            try:
-                import urllib.parse
-                valid_url = urllib.parse.unquote(url_part)
-                if valid_url:
-                    cache_link = re.search(patern_google_cache, valid_url, re.I)
-                    if cache_link:
-                        result.append('%s%s' % (cache_link.group(1), cache_link.group(3)))
-                    else:
-                        result.append(valid_url)
-            except Exception:
-                pass
-
-        # Final fallback: extract any external anchor links from Google pages
-        if not result:
-            raw_links = re.findall(r'href="(https?://(?!www\.google\.|accounts\.google\.|support\.google\.|policies\.google\.|www\.gstatic\.)[^"]+)"', str(html), re.I)
-            for match in raw_links:
-                valid_url = validate_url(match[0])
-                if valid_url:
-                    cache_link = re.search(patern_google_cache, valid_url, re.I)
-                    if cache_link:
-                        result.append('%s%s' % (cache_link.group(1), cache_link.group(3)))
-                    else:
-                        result.append(valid_url)
-
-        if result:
-            result = list(dict.fromkeys(result))
-
-        return result
+        return get_spec('google').get_links(html)
 
     def get_next_page(self, html):
-        next_page = ''
-        if not html:
-            return next_page
-
-        patern_next = r'(?:<a[^>]+id[\s=]+((?:")pnnext(?:")|(?:\')pnnext(?:\'))[^>]+>)'
-        patern_href = r'href[\s=]+((?:")(.*?)(?:")|(?:\')(.*?)(?:\'))'
-
-        matches = re.search(patern_next, str(html), re.M | re.I)
-        if matches:
-            href = re.search(patern_href, matches.group(0), re.I)
-            if href and len(href.groups()) >= 3:
-                path = href.group(3) or href.group(2)
-                next_page = validate_url(urljoin(self.base_url, path))
-
-        return next_page
+        return get_spec('google').get_next_page(html, self.base_url)
 
 
 if __name__ == '__main__':
@@ -1,141 +1,91 @@
 import re
 from logging import DEBUG
 from urllib.parse import urljoin, urlencode, urlparse, parse_qs
-from utils.blacklist import is_blacklisted
 from utils.helper import setup_logger, validate_url, split_url
-from libs.html_parser import NativeHTMLParser
+from libs.document import Document
 from libs.fetch import FetchRequest
+from libs.token_cache import default_token_cache
+from engine.base import SearchEngine
 
 logger = setup_logger(name='Lycos')
 
 
-class Lycos:
+class Lycos(SearchEngine):
+    name = 'Lycos'
+    token_key = 'Lycos'
     base_url = 'https://www.lycos.com'
     search_url = 'https://search.lycos.com/web'
+    no_results = 'There were no results for your search query'
 
     def __init__(self, debug=False):
         self.debug = debug
-        self.fetch = FetchRequest()
+        self.fetch = FetchRequest(engine='Lycos')
         self.query = {}
         self.filtering = True
 
         if self.debug:
             logger.setLevel(DEBUG)
 
-    def search(self, keyword):
+    def get_search_url(self, keyword):
         search_url = self.build_query(keyword=str(keyword))
-        return self.search_run(search_url)
+        return search_url
 
-    def search_run(self, url):
-        result = []
-        if not url:
-            return result
+    def build_query(self, keyword, html=None):
+        search_url = ''
+        tokens = self.get_query_tokens(html)
+        if not tokens:
+            return search_url
 
-        duplicate_page = 0
-        empty_page = 0
-        headers = {'Referer': self.base_url}
-        page = 1
-        while True:
-            if self.debug:
-                logger.debug('Page: %s %s' % (page, url))
-            else:
-                logger.info('Page: %s' % page)
-
-            html = self.fetch.get(url, headers=headers)
-            
-            # Check for no results page
-            if html and 'There were no results for your search query' in html:
-                logger.error('No results returned from Lycos')
-                break
-
-            links = self.get_links(html)
-
-            if not links:
-                empty_page += 1
-                if page > 1:
-                    break
-            else:
-                duplicate = True
-                for link in links:
-                    if self.filtering:
-                        if is_blacklisted(link):
-                            logger.debug('[BLACKLIST] %s' % link)
-                            continue
-
-                    if link not in result:
-                        duplicate = False
-                        logger.info(link)
-                        result.append(link)
-                    else:
-                        logger.debug('[EXIST] %s' % link)
-
-                if duplicate:
-                    duplicate_page += 1
-
-            if duplicate_page >= 3:
-                break
-
-            if empty_page >= 2:
-                break
-
-            next_page = self.get_next_page(html)
-            if next_page and next_page != url:
-                headers.update({'Referer': url})
-                url = next_page
-            else:
-                break
-            page += 1
-
-        result = list(dict.fromkeys(result))
-        logger.info('Total links: %d' % len(result))
+        if tokens.get('keyvol'):
+            self.query.update({
+                'q': keyword,
+                'keyvol': tokens.get('keyvol')
+            })
 
-        return result
+        search_url = tokens.get('action')
+
+        if search_url and self.query:
+            self.search_url = search_url
+            search_url = '%s?%s' % (search_url, urlencode(self.query))
+        elif self.query:
+            search_url = '%s?%s' % (self.search_url, urlencode(self.query))
+
+        return search_url
+
+    def get_query_tokens(self, html=None):
+        tokens = None if html else default_token_cache.get('Lycos')
+        if tokens is not None:
+            return tokens
 
-    def build_query(self, keyword, html=None):
-        search_url = ''
         if not html:
-            html = self.fetch.get(self.base_url)
+            html = self.fetch.get(self.base_url, cache=False)
+
+        tokens = {'action': '', 'keyvol': ''}
 
         patern_keyvol = r'\#keyvol[.)"\'\s]+val[("\'\s]+([a-f0-9]+)[)"\'\s]+;'
         match_keyvol = re.search(patern_keyvol, str(html), re.I)
         if match_keyvol:
-            try:
-                self.query.update({
-                    'q': keyword,
-                    'keyvol': match_keyvol.group(1)
-                })
-            except IndexError:
-                pass
-
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
-
-        if _parser.root is None:
-            return search_url
+            tokens['keyvol'] = match_keyvol.group(1)
+
+        doc = Document.wrap(html)
 
-        form_search = _parser.root.find('.//form[@id="form_query"]')
+        if doc.root is None:
+            return
+
+        form_search = doc.root.find('.//form[@id="form_query"]')
 
         if form_search:
-            search_url = form_search.get('action')
+            tokens['action'] = form_search.get('action')
             _input = form_search.find('.//input[@id="keyvol"]')
-            if _input:
-                _name = _input.get('name')
-                _value = _input.get('value')
-                if _name == 'keyvol':
-                    if 'keyvol' not in self.query:
-                        self.query.update({
-                            'q': keyword,
-                            'keyvol': _value
-                        })
+            if _input is not None and not tokens['keyvol']:
+                if _input.get('name') == 'keyvol':
+                    tokens['keyvol'] = _input.get('value')
 
-        if search_url and self.query:
-            self.search_url = search_url
-            search_url = '%s?%s' % (search_url, urlencode(self.query))
-        elif self.query:
-            search_url = '%s?%s' % (self.search_url, urlencode(self.query))
+        # Lycos drops queries that lack the keyvol token
+        if tokens['keyvol']:
+            default_token_cache.set('Lycos', tokens)
 
-        return search_url
+        return tokens
 
     @staticmethod
     def get_links(html):
@@ -143,25 +93,23 @@ class Lycos:
         if not html:
             return result
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
+        doc = Document.wrap(html)
 
-        if _parser.root is None:
+        if doc.root is None:
             return result
 
         # Updated pattern - Lycos now uses different structure
         # Try legacy pattern first
-        links = _parser.root.findall('.//li//a[@class="result-link"]')
+        links = doc.root.findall('.//li//a[@class="result-link"]')
         
         if not links:
             # Fallback: try any result links
-            links = _parser.root.findall('.//a[@class="result-link"]')
+            links = doc.root.findall('.//a[@class="result-link"]')
         
         if not links:
             # Fallback: try to find search result containers
             # Look for result blocks with href patterns
-            no_results = _parser.root.find('.//div[@class="no-results"]')
+            no_results = doc.root.find('.//div[@class="no-results"]')
             if no_results:
                 return result
         
@@ -201,14 +149,12 @@ class Lycos:
         if not html:
             return next_page
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
+        doc = Document.wrap(html)
 
-        if _parser.root is None:
+        if doc.root is None:
             return next_page
 
-        page_items = _parser.root.find('.//ul[@class="pagination"]')
+        page_items = doc.root.find('.//ul[@class="pagination"]')
         if not page_items:
             return next_page
 
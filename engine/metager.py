@@ -2,100 +2,114 @@ import re
 import base64
 from logging import DEBUG
 from urllib.parse import urljoin, urlencode, urlparse, unquote, parse_qs
-from utils.blacklist import is_blacklisted
 from utils.helper import setup_logger, validate_url, decode_bytes, split_url
+from libs.document import Document
 from libs.html_parser import NativeHTMLParser
 from libs.fetch import FetchRequest
+from libs.strategy import StrategyChain
+from libs.token_cache import default_token_cache
+from engine.base import SearchEngine
 
 logger = setup_logger(name='MetaGer')
 
 
-class MetaGer:
+# Result anchor lookups, legacy layout first; no contains() since stdlib ElementTree doesn't support it
+def links_by_result_link(doc):
+    return doc.root.findall('.//a[@class="result-link"]')
+
+
+def links_by_result_class(doc):
+    return doc.anchors.class_contains('result')
+
+
+def links_in_result_divs(doc):
+    links = []
+    for div in doc.root.findall('.//div'):
+        if 'result' in div.get('class', ''):
+            links.extend(div.findall('.//a'))
+    return links
+
+
+def links_by_data_url(doc):
+    # Try to find any result URLs in the page
+    return doc.root.findall('.//a[@data-url]')
+
+
+link_strategies = StrategyChain('MetaGer.links', [
+    ('result-link', links_by_result_link),
+    ('result-class', links_by_result_class),
+    ('result-div', links_in_result_divs),
+    ('data-url', links_by_data_url),
+])
+
+
+class MetaGer(SearchEngine):
+    name = 'MetaGer'
+    token_key = 'MetaGer'
     base_url = 'https://metager.org'
     next_page = ''
+    # get_links follows the results iframe with the blocking client
+    async_pages = False
 
     def __init__(self, debug=False):
         self.debug = debug
-        self.fetch = FetchRequest()
+        self.fetch = FetchRequest(engine='MetaGer')
         self.query = {}
         self.filtering = True
 
         if self.debug:
             logger.setLevel(DEBUG)
 
-    def search(self, keyword):
+    def get_search_url(self, keyword):
         search_url = self.build_query(keyword=keyword)
-        return self.search_run(search_url)
+        return search_url
 
-    def search_run(self, url):
-        result = []
-        if not url:
-            return result
+    def fetch_page(self, url, headers):
+        # Parsed while the (often slow) page downloads
+        return self.fetch.get_parsed(url, headers=headers, store=False)
 
-        duplicate_page = 0
-        empty_page = 0
-        headers = {'Referer': self.base_url}
-        page = 1
-        while True:
-            if self.debug:
-                logger.debug('Page: %s %s' % (page, url))
-            else:
-                logger.info('Page: %s' % page)
+    def build_query(self, keyword, html=None):
+        search_url = ''
+        tokens = self.get_query_tokens(html)
+        if not tokens:
+            return search_url
 
-            html = self.fetch.get(url, headers=headers)
-            links = self.get_links(html)
+        if tokens.get('action'):
+            search_url = tokens.get('action')
 
-            if not links:
-                empty_page += 1
-                if page > 1:
-                    break
-            else:
-                duplicate = True
-                for link in links:
-                    if self.filtering:
-                        if is_blacklisted(link):
-                            logger.debug('[BLACKLIST] %s' % link)
-                            continue
-
-                    if link not in result:
-                        duplicate = False
-                        logger.info(link)
-                        result.append(link)
-                    else:
-                        logger.debug('[EXIST] %s' % link)
-
-                if duplicate:
-                    duplicate_page += 1
-
-            if duplicate_page >= 3:
-                break
+        self.query.update(tokens.get('inputs'))
+        for _name in tokens.get('keyword_inputs'):
+            self.query.update({_name: keyword})
 
-            if empty_page >= 2:
-                break
+        if not search_url:
+            # Fallback: use direct search URL
+            search_url = 'https://metager.org/meta/meta.ger3'
+            self.query = {'eingabe': keyword}
 
-            if self.next_page and self.next_page != url:
-                headers.update({'Referer': url})
-                url = self.next_page
-            else:
-                break
-            page += 1
+        if search_url:
+            if self.query:
+                search_url = '%s?%s' % (search_url, urlencode(self.query))
+            elif not search_url.startswith('http'):
+                search_url = urljoin(self.base_url, search_url)
 
-        result = list(dict.fromkeys(result))
-        logger.info('Total links: %d' % len(result))
+        return search_url
 
-        return result
+    def get_query_tokens(self, html=None):
+        tokens = None if html else default_token_cache.get('MetaGer')
+        if tokens is not None:
+            return tokens
 
-    def build_query(self, keyword, html=None):
-        search_url = ''
         if not html:
-            html = self.fetch.get(self.base_url)
+            html = self.fetch.get(self.base_url, cache=False)
 
         _parser = NativeHTMLParser()
         _parser.feed(str(html))
         _parser.close()
 
         if _parser.root is None:
-            return search_url
+            return
+
+        tokens = {'action': '', 'inputs': {}, 'keyword_inputs': []}
 
         # Try multiple form patterns (no contains() - stdlib ElementTree doesn't support it)
         for xpath in ['.//form[@id="searchForm"]', './/form[@id="mainSearchForm"]']:
@@ -114,7 +128,7 @@ class MetaGer:
         if form_search:
             action = form_search.get('action')
             if action:
-                search_url = action.strip()
+                tokens['action'] = action.strip()
 
             inputs = form_search.findall('.//input')
             for inp in inputs:
@@ -125,61 +139,35 @@ class MetaGer:
                     continue
 
                 if _name in ('eingabe', 'q', 'query'):
-                    self.query.update({_name: keyword})
+                    tokens['keyword_inputs'].append(_name)
                 else:
-                    self.query.update({_name: _value or ''})
+                    tokens['inputs'].update({_name: _value or ''})
 
-        if not search_url:
-            # Fallback: use direct search URL
-            search_url = 'https://metager.org/meta/meta.ger3'
-            self.query = {'eingabe': keyword}
+        # Tokens without a form action cannot build a search URL
+        if tokens['action']:
+            default_token_cache.set('MetaGer', tokens)
 
-        if search_url:
-            if self.query:
-                search_url = '%s?%s' % (search_url, urlencode(self.query))
-            elif not search_url.startswith('http'):
-                search_url = urljoin(self.base_url, search_url)
-
-        return search_url
+        return tokens
 
     def get_links(self, html):
         result = []
         if not html:
             return result
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
+        doc = Document.wrap(html)
+        root = doc.root
 
-        if _parser.root is None:
+        if root is None:
             return result
 
-        # Try legacy pattern first
-        iframe = _parser.root.find('.//iframe[@id="mg-framed"]')
-        links = _parser.root.findall('.//a[@class="result-link"]')
-
-        # New patterns for updated MetaGer (no contains() - stdlib ElementTree doesn't support it)
-        if not links:
-            links = []
-            for a in _parser.root.findall('.//a'):
-                cls = a.get('class', '')
-                if 'result' in cls:
-                    links.append(a)
-        if not links:
-            links = []
-            for div in _parser.root.findall('.//div'):
-                cls = div.get('class', '')
-                if 'result' in cls:
-                    links.extend(div.findall('.//a'))
-        if not links:
-            # Try to find any result URLs in the page
-            links = _parser.root.findall('.//a[@data-url]')
+        iframe = root.find('.//iframe[@id="mg-framed"]')
+        links = link_strategies.run(doc)
 
         if not links and iframe is not None:
             iframe_src = iframe.get('src')
             iframe_url = validate_url(iframe_src)
             if iframe_url:
-                iframe_html = self.fetch.get(iframe_url)
+                iframe_html = self.fetch.get_parsed(iframe_url, store=False)
                 return self.get_links(iframe_html)
 
         for link in links:
@@ -196,24 +184,27 @@ class MetaGer:
             if url and not re.search(r'metager\.org/partner/', url, re.I):
                 result.append(url)
 
-        self.get_next_page(_parser.root)
+        self.find_next_page(doc)
 
         if result:
             result = list(dict.fromkeys(result))
 
         return result
 
-    def get_next_page(self, root):
+    def get_next_page(self, doc):
+        # Found by get_links, which may have followed the results iframe
+        return self.next_page
+
+    def find_next_page(self, doc):
         self.next_page = ''
+        root = doc.root
         # Try legacy pattern
         next_search_link = root.find('.//div[@id="next-search-link"]')
         if next_search_link is None:
             # Try alternative pagination patterns (no contains() - stdlib ElementTree)
-            for a in root.findall('.//a'):
-                cls = a.get('class', '')
-                if 'next' in cls:
-                    next_search_link = a
-                    break
+            next_links = doc.anchors.class_contains('next')
+            if next_links:
+                next_search_link = next_links[0]
         if next_search_link is None:
             next_search_link = root.find('.//a[@data-page="next"]')
 
@@ -1,110 +1,50 @@
 import re
 from logging import DEBUG
 from urllib.parse import urljoin, urlencode
-from utils.blacklist import is_blacklisted
 from utils.helper import setup_logger, validate_url
-from libs.html_parser import NativeHTMLParser
+from libs.document import Document
+from libs.extractor import Selector
 from libs.fetch import FetchRequest
+from libs.token_cache import default_token_cache
+from engine.base import SearchEngine
 
 logger = setup_logger(name='Mojeek')
 
 
-class Mojeek:
+class Mojeek(SearchEngine):
+    name = 'Mojeek'
+    token_key = 'Mojeek'
     base_url = 'https://www.mojeek.com'
+    selectors = {
+        'links': Selector('a', attrs={'class': 'ob'}),
+        'pagination': Selector('a', ancestor=Selector('li', ancestor=Selector('div', attrs={'class': 'pagination'}))),
+    }
 
     def __init__(self, debug=False):
         self.debug = debug
-        self.fetch = FetchRequest()
+        self.fetch = FetchRequest(engine='Mojeek')
         self.query = {}
         self.filtering = True
 
         if self.debug:
             logger.setLevel(DEBUG)
 
-    def search(self, keyword):
+    def get_search_url(self, keyword):
         self.query.update({'q': str(keyword)})
         search_url = self.build_query(keyword=str(keyword))
         if search_url:
             search_url = urljoin(self.base_url, search_url)
 
-        return self.search_run(search_url)
-
-    def search_run(self, url):
-        result = []
-        if not url:
-            return result
-
-        duplicate_page = 0
-        empty_page = 0
-        headers = {'Referer': self.base_url}
-        page = 1
-        while True:
-            if self.debug:
-                logger.debug('Page: %s %s' % (page, url))
-            else:
-                logger.info('Page: %s' % page)
-
-            html = self.fetch.get(url, headers=headers)
-            links = self.get_links(html)
-
-            if not links:
-                empty_page += 1
-                if page > 1:
-                    break
-            else:
-                duplicate = True
-                for link in links:
-                    if self.filtering:
-                        if is_blacklisted(link):
-                            logger.debug('[BLACKLIST] %s' % link)
-                            continue
-
-                    if link not in result:
-                        duplicate = False
-                        logger.info(link)
-                        result.append(link)
-                    else:
-                        logger.debug('[EXIST] %s' % link)
-
-                if duplicate:
-                    duplicate_page += 1
-
-            if duplicate_page >= 3:
-                break
-
-            if empty_page >= 2:
-                break
-
-            next_page = self.get_next_page(html)
-            if next_page:
-                headers.update({'Referer': url})
-                url = next_page
-            else:
-                break
-            page += 1
-
-        result = list(dict.fromkeys(result))
-        logger.info('Total links: %d' % len(result))
-
-        return result
+        return search_url
 
     def build_query(self, keyword, html=None):
         search_url = ''
-        if not html:
-            html = self.fetch.get(self.base_url)
-
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
-
-        if _parser.root is None:
+        tokens = self.get_query_tokens(html)
+        if not tokens:
             return search_url
 
-        form_search = _parser.root.find('.//form[@action="/search"]')
-
-        if form_search:
-            action = form_search.get('action')
-            search_url = urljoin(self.base_url, action)
+        if tokens.get('action'):
+            search_url = urljoin(self.base_url, tokens.get('action'))
         else:
             search_url = urljoin(self.base_url, '/search')
 
@@ -114,20 +54,39 @@ class Mojeek:
 
         return search_url
 
+    def get_query_tokens(self, html=None):
+        tokens = None if html else default_token_cache.get('Mojeek')
+        if tokens is not None:
+            return tokens
+
+        if not html:
+            html = self.fetch.get(self.base_url, cache=False)
+
+        doc = Document.wrap(html)
+
+        if doc.root is None:
+            return
+
+        tokens = {'action': ''}
+        form_search = doc.root.find('.//form[@action="/search"]')
+
+        if form_search:
+            tokens['action'] = form_search.get('action')
+
+        # Tokens without a form action cannot build a search URL
+        if tokens['action']:
+            default_token_cache.set('Mojeek', tokens)
+
+        return tokens
+
     @staticmethod
     def get_links(html):
         result = []
         if not html:
             return result
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
-
-        if _parser.root is None:
-            return result
-
-        links = _parser.root.findall('.//a[@class="ob"]')
+        doc = Document.wrap(html)
+        links = doc.extract(Mojeek.selectors).get('links')
 
         for link in links:
             _href = link.get('href')
@@ -145,30 +104,19 @@ class Mojeek:
         if not html:
             return next_page
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
+        doc = Document.wrap(html)
+        list_pagination = doc.extract(self.selectors).get('pagination')
 
-        if _parser.root is None:
-            return next_page
+        for _link in list_pagination:
+            _href = _link.get('href')
+            _text = _link.text
+            if not _text or _href is None:
+                continue
 
-        pagination = _parser.root.find('.//div[@class="pagination"]')
-        if not pagination:
-            return next_page
-
-        list_pagination = pagination.findall('.//li')
-        for li in list_pagination:
-            _link = li.find('.//a')
-            if _link is not None:
-                _href = _link.get('href')
-                _text = _link.text
-                if _text is None or _href is None:
-                    continue
-
-                if re.search(r'next', _text, re.I):
-                    next_page = validate_url(urljoin(self.base_url, _href))
-                    if next_page:
-                        break
+            if re.search(r'next', _text, re.I):
+                next_page = validate_url(urljoin(self.base_url, _href))
+                if next_page:
+                    break
 
         return next_page
 
@@ -1,114 +1,71 @@
-import re
 from logging import DEBUG
 from urllib.parse import urljoin, urlencode
-from utils.blacklist import is_blacklisted
-from utils.helper import setup_logger, validate_url
-from libs.html_parser import NativeHTMLParser
+from utils.helper import setup_logger
+from libs.document import Document
 from libs.fetch import FetchRequest
+from libs.spec import get_spec
+from libs.token_cache import default_token_cache
+from engine.base import SearchEngine
 
 logger = setup_logger(name='Naver')
 
 
-class Naver:
+class Naver(SearchEngine):
+    name = 'Naver'
+    token_key = 'Naver'
     base_url = 'https://www.naver.com'
     search_url = 'https://search.naver.com/search.naver'
 
     def __init__(self, debug=False):
         self.debug = debug
-        self.fetch = FetchRequest()
+        self.fetch = FetchRequest(engine='Naver')
         self.query = {}
         self.filtering = True
 
         if self.debug:
             logger.setLevel(DEBUG)
 
-    def search(self, keyword):
+    def get_search_url(self, keyword):
         search_url = self.build_query(keyword=str(keyword))
         if search_url:
             search_url = urljoin(self.search_url, search_url)
 
-        return self.search_run(search_url)
-
-    def search_run(self, url):
-        result = []
-        if not url:
-            return result
-
-        duplicate_page = 0
-        empty_page = 0
-        headers = {'Referer': self.base_url}
-        page = 1
-        while True:
-            if self.debug:
-                logger.debug('Page: %s %s' % (page, url))
-            else:
-                logger.info('Page: %s' % page)
-
-            html = self.fetch.get(url, headers=headers)
-            links = self.get_links(html)
-
-            if not links:
-                empty_page += 1
-                if page > 1:
-                    break
-            else:
-                duplicate = True
-                for link in links:
-                    if self.filtering:
-                        if is_blacklisted(link):
-                            logger.debug('[BLACKLIST] %s' % link)
-                            continue
-
-                    if link not in result:
-                        duplicate = False
-                        logger.info(link)
-                        result.append(link)
-                    else:
-                        logger.debug('[EXIST] %s' % link)
-
-                if duplicate:
-                    duplicate_page += 1
-
-            if duplicate_page >= 3:
-                break
-
-            if empty_page >= 2:
-                break
-
-            next_page = self.get_next_page(html)
-            if next_page:
-                headers.update({'Referer': url})
-                url = next_page
-            else:
-                break
-            page += 1
-
-        result = list(dict.fromkeys(result))
-        logger.info('Total links: %d' % len(result))
-
-        return result
+        return search_url
 
     def build_query(self, keyword, html=None):
         search_url = ''
-        if not html:
-            html = self.fetch.get(self.base_url)
+        tokens = self.get_query_tokens(html)
+        if not tokens:
+            return search_url
+
+        search_url = tokens.get('action')
+        if search_url:
+            self.query.update({'where': 'web'})
+            self.query.update(tokens.get('inputs'))
+            self.query.update({'query': keyword})
+            search_url = '%s?%s' % (search_url, urlencode(self.query))
 
-        _parser = NativeHTMLParser()
-        _parser.feed(str(html))
-        _parser.close()
+        return search_url
 
-        if _parser.root is None:
-            return search_url
+    def get_query_tokens(self, html=None):
+        tokens = None if html else default_token_cache.get('Naver')
+        if tokens is not None:
+            return tokens
 
-        form_search = _parser.root.find('.//form[@id="sform"]')
+        if not html:
+            html = self.fetch.get(self.base_url, cache=False)
 
-        if form_search:
-            search_url = form_search.get('action')
+        doc = Document.wrap(html)
 
-            self.query.update({'where': 'web'})
+        if doc.root is None:
+            return
 
-            inputs = form_search.findall('.//input[@type="hidden"]')
+        tokens = {'action': '', 'inputs': {}}
+        form_search = doc.root.find('.//form[@id="sform"]')
 
+        if form_search:
+            tokens['action'] = form_search.get('action')
+            inputs = form_search.findall('.//input[@type="hidden"]')
             for inp in inputs:
                 _name = inp.get('name')
                 _value = inp.get('value')
@@ -120,85 +77,20 @@ class Naver:
                     continue
 
                 if _name != 'query':
-                    self.query.update({_name: _value or ''})
+                    tokens['inputs'].update({_name: _value or ''})
 
-        if search_url:
-            self.query.update({'query': keyword})
-            search_url = '%s?%s' % (search_url, urlencode(self.query))
+        # Tokens without a form action cannot build a search URL
+        if tokens['action']:
+            default_token_cache.set('Naver', tokens)
 
-        return search_url
+        return tokens
 
     @staticmethod
     def get_links(html):
-        result = []
-        if not html:
-            return result
-
-        _parser = NativeHTMLParser()
-        _parser.feed(html)
-        _parser.close()
-
-        if _parser.root is None:
-            return result
-
-        # Try old pattern: lst_total with link_tit
-        search_result = _parser.root.find('.//ul[@class="lst_total"]')
-        if search_result:
-            links = search_result.findall('li//a[@class="link_tit"]')
-            for link in links:
-                _href = link.get('href')
-                valid_url = validate_url(_href)
-                if valid_url:
-                    result.append(valid_url)
-
-        # Fallback: extract external links with target="_blank" (modern Naver layout)
-        # Uses regex since XPath with target="_blank" and non-naver domains is complex
-        if not result:
-            raw_links = re.findall(
-                r'<a[^>]*target="_blank"[^>]*href="(https?://[^"]+)"', str(html), re.I)
-            for url in raw_links:
-                if 'naver.com' not in url.lower() and 'pstatic' not in url.lower():
-                    valid_url = validate_url(url)
-                    if valid_url:
-                        result.append(valid_url)
-
-            # Extra fallback: find external links in any <a> tag
-            if not result:
-                raw_links = re.findall(
-                    r'<a[^>]*nocr="1"[^>]*href="(https?://[^"]+)"', str(html), re.I)
-                for url in raw_links:
-                    if 'naver.com' not in url.lower() and 'pstatic' not in url.lower():
-                        valid_url = validate_url(url)
-                        if valid_url:
-                            result.append(valid_url)
-
-        if result:
-            result = list(dict.fromkeys(result))
-
-        return result
+        return get_spec('naver').get_links(html)
 
     def get_next_page(self, html):
-        next_page = ''
-        if not html:
-            return next_page
-
-        _parser = NativeHTMLParser()
-        _parser.feed(html)
-        _parser.close()
-
-        if _parser.root is None:
-            return next_page
-
-        page_items = _parser.root.find('.//div[@class="sc_page"]')
-        if not page_items:
-            return next_page
-
-        btn_next = page_items.find('a[@class="btn_next"]')
-        _href = btn_next.get('href')
-        if _href:
-            next_page = validate_url(urljoin(self.search_url, _href))
-
-        return next_page
+        return get_spec('naver').get_next_page(html, self.search_url)
 
 
 if __name__ == '__main__':
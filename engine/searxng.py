@@ -5,6 +5,7 @@ from logging import DEBUG
 from urllib.parse import urljoin, urlencode
 from utils.blacklist import is_blacklisted
 from utils.helper import setup_logger, validate_url
+from libs.canonical import unique_links
 from libs.fetch import FetchRequest
 
 logger = setup_logger(name='SearXNG')
@@ -61,7 +62,7 @@ class Searxng:
 
     def __init__(self, debug=False, host=None, api_key=None):
         self.debug = debug
-        self.fetch = FetchRequest()
+        self.fetch = FetchRequest(engine='SearXNG')
         self.filtering = True
         self._host_index = 0
         self._broken_hosts = set()
@@ -142,9 +143,10 @@ class Searxng:
                 logger.debug('Trying host: %s' % host)
             logger.info('SearXNG host: %s' % host.split('/')[2])
 
+            results = None
             try:
                 headers = self._get_headers()
-                html = self.fetch.get(search_url, headers=headers)
+                html = self.fetch.get(search_url, headers=headers, store=False)
                 if not html:
                     self._broken_hosts.add(host)
                     tried_hosts.append(host)
@@ -165,6 +167,9 @@ class Searxng:
                     logger.debug('Host %s failed: %s' % (host, e))
                 self._broken_hosts.add(host)
                 tried_hosts.append(host)
+            finally:
+                # Only a host's answer with results goes into the response cache
+                self.fetch.keep_pending(bool(results))
 
         return []
 
@@ -202,7 +207,8 @@ class Searxng:
                 result.append(valid_url)
 
         if result:
-            result = list(dict.fromkeys(result))
+            # Same page from several spellings counts once
+            result = unique_links(result)
 
         logger.info('Total links: %d (host: %s)' % (len(result), host.split('/')[2]))
         return result
@@ -226,7 +232,8 @@ class Searxng:
                 result.append(valid_url)
 
         if result:
-            result = list(dict.fromkeys(result))
+            # Same page from several spellings counts once
+            result = unique_links(result)
             logger.info('Total links: %d (host: %s, HTML fallback)' % (
                 len(result), host.split('/')[2]))
 
@@ -1,112 +1,77 @@
 import re
 from logging import DEBUG
 from urllib.parse import urljoin, urlencode
-from utils.blacklist import is_blacklisted
 from utils.helper import setup_logger, validate_url
-from libs.html_parser import NativeHTMLParser
+from libs.document import Document
+from libs.extractor import Selector
 from libs.fetch import FetchRequest
+from libs.token_cache import default_token_cache
+from engine.base import SearchEngine
 
 logger = setup_logger(name='Seznam')
 
 
-class Seznam:
+class Seznam(SearchEngine):
+    name = 'Seznam'
+    token_key = 'Seznam'
     base_url = 'https://www.seznam.cz'
     search_url = 'https://search.seznam.cz'
+    # Parsing stops once the results container and the pager have been closed
+    regions = [
+        Selector('div', attrs={'data-dot': 'results'}),
+        Selector('ul', attrs={'id': 'paging'}),
+    ]
 
     def __init__(self, debug=False):
         self.debug = debug
-        self.fetch = FetchRequest()
+        self.fetch = FetchRequest(engine='Seznam')
         self.query = {}
         self.filtering = True
 
         if self.debug:
             logger.setLevel(DEBUG)
 
-    def search(self, keyword):
+    def get_search_url(self, keyword):
         self.query.update({'q': str(keyword)})
         search_url = self.build_query()
         if search_url:
             search_url = urljoin(self.search_url, search_url)
 
-        return self.search_run(search_url)
+        return search_url
 
-    def search_run(self, url):
-        result = []
-        if not url:
-            return result
+    def build_query(self, html=None):
+        search_url = ''
+        tokens = self.get_query_tokens(html)
+        if not tokens:
+            return search_url
 
-        duplicate_page = 0
-        empty_page = 0
-        headers = {'Referer': self.base_url}
-        page = 1
-        while True:
-            if self.debug:
-                logger.debug('Page: %s %s' % (page, url))
-            else:
-                logger.info('Page: %s' % page)
-
-            html = self.fetch.get(url, headers=headers)
-            links = self.get_links(html)
-
-            if not links:
-                empty_page += 1
-                if page > 1:
-                    break
-            else:
-                duplicate = True
-                for link in links:
-                    if self.filtering:
-                        if is_blacklisted(link):
-                            logger.debug('[BLACKLIST] %s' % link)
-                            continue
-
-                    if link not in result:
-                        duplicate = False
-                        logger.info(link)
-                        result.append(link)
-                    else:
-                        logger.debug('[EXIST] %s' % link)
-
-                if duplicate:
-                    duplicate_page += 1
-
-            if duplicate_page >= 3:
-                break
-
-            if empty_page >= 2:
-                break
-
-            next_page = self.get_next_page(html)
-            if next_page:
-                headers.update({'Referer': url})
-                url = next_page
-            else:
-                break
-            page += 1
-
-        result = list(dict.fromkeys(result))
-        logger.info('Total links: %s' % len(result))
+        search_url = tokens.get('action')
+        self.query.update(tokens.get('inputs'))
 
-        return result
+        if search_url:
+            search_url = '%s?%s' % (search_url, urlencode(self.query))
+
+        return search_url
+
+    def get_query_tokens(self, html=None):
+        tokens = None if html else default_token_cache.get('Seznam')
+        if tokens is not None:
+            return tokens
 
-    def build_query(self, html=None):
-        search_url = ''
         if not html:
-            html = self.fetch.get(self.base_url)
+            html = self.fetch.get(self.base_url, cache=False)
 
-        _parser = NativeHTMLParser()
-        _parser.feed(html)
-        _parser.close()
+        doc = Document.wrap(html)
 
-        if _parser.root is None:
-            return search_url
+        if doc.root is None:
+            return
 
-        form_search = _parser.root.find('.//form[@class="sticky-header-search__form"]')
+        tokens = {'action': '', 'inputs': {}}
+        form_search = doc.root.find('.//form[@class="sticky-header-search__form"]')
 
         if form_search:
-            search_url = form_search.get('action')
+            tokens['action'] = form_search.get('action')
             inputs = form_search.findall('.//input[@type="hidden"]')
-
             for inp in inputs:
                 _name = inp.get('name')
                 _value = inp.get('value')
@@ -114,12 +79,13 @@ class Seznam:
                     continue
 
                 if _name != 'q':
-                    self.query.update({_name: _value or ''})
+                    tokens['inputs'].update({_name: _value or ''})
 
-        if search_url:
-            search_url = '%s?%s' % (search_url, urlencode(self.query))
+        # Tokens without a form action cannot build a search URL
+        if tokens['action']:
+            default_token_cache.set('Seznam', tokens)
 
-        return search_url
+        return tokens
 
     @staticmethod
     def get_links(html):
@@ -127,15 +93,14 @@ class Seznam:
         if not html:
             return result
 
-        _parser = NativeHTMLParser()
-        _parser.feed(html)
-        _parser.close()
+        doc = Document.wrap(html)
+        root = doc.parse(Seznam.regions)
 
-        if _parser.root is None:
+        if root is None:
             return result
 
         # Try old pattern: data-dot="results" container
-        search_result = _parser.root.find('.//div[@data-dot="results"]')
+        search_result = root.find('.//div[@data-dot="results"]')
         if search_result:
             links = search_result.findall('.//a[@data-l-id]')
             for link in links:
@@ -170,14 +135,13 @@ class Seznam:
         if not html:
             return next_page
 
-        _parser = NativeHTMLParser()
-        _parser.feed(html)
-        _parser.close()
+        doc = Document.wrap(html)
+        root = doc.parse(self.regions)
 
-        if _parser.root is None:
+        if root is None:
             return next_page
 
-        page_items = _parser.root.find('.//ul[@id="paging"]')
+        page_items = root.find('.//ul[@id="paging"]')
         if not page_items:
             return next_page
 
@@ -1,128 +1,91 @@
 import re
 from logging import DEBUG
 from urllib.parse import urljoin, urlencode, unquote
-from utils.blacklist import is_blacklisted
 from utils.helper import setup_logger, validate_url
 from libs.fetch import FetchRequest
+from libs.token_cache import default_token_cache
+from engine.base import SearchEngine
 
 logger = setup_logger(name='Yahoo')
 
 
-class Yahoo:
+class Yahoo(SearchEngine):
+    name = 'Yahoo'
+    token_key = 'Yahoo'
     base_url = 'https://search.yahoo.com'
 
     def __init__(self, debug=False):
         self.debug = debug
-        self.fetch = FetchRequest()
+        self.fetch = FetchRequest(engine='Yahoo')
         self.query = {}
         self.filtering = True
 
         if self.debug:
             logger.setLevel(DEBUG)
 
-    def search(self, keyword: str) -> list:
+    def get_search_url(self, keyword):
         self.query.update({'p': keyword})
         search_url = self.build_query()
         if search_url:
             search_url = urljoin(self.base_url, search_url)
 
-        return self.search_run(search_url)
+        return search_url
 
-    def search_run(self, url):
-        result = []
-        if not url:
-            return result
+    def build_query(self, html=None):
+        search_url = ''
+        tokens = self.get_query_tokens(html)
+        if tokens:
+            search_url = tokens.get('action')
+            self.query.update(tokens.get('inputs'))
 
-        duplicate_page = 0
-        empty_page = 0
-        headers = {'Referer': self.base_url}
-        page = 1
-        while True:
-            if self.debug:
-                logger.debug('Page: %s %s' % (page, url))
-            else:
-                logger.info('Page: %s' % page)
-
-            html = self.fetch.get(url, headers=headers)
-            links = self.get_links(html)
-
-            if not links:
-                empty_page += 1
-                if page > 1:
-                    break
-            else:
-                duplicate = True
-                for link in links:
-                    if self.filtering:
-                        if is_blacklisted(link):
-                            logger.debug('[BLACKLIST] %s' % link)
-                            continue
-
-                    if link not in result:
-                        duplicate = False
-                        logger.info(link)
-                        result.append(link)
-                    else:
-                        logger.debug('[EXIST] %s' % link)
-
-                if duplicate:
-                    duplicate_page += 1
-
-            if duplicate_page >= 3:
-                break
-
-            if empty_page >= 2:
-                break
-
-            next_page = self.get_next_page(html)
-            if next_page:
-                headers.update({'Referer': url})
-                url = next_page
-            else:
-                break
-            page += 1
-
-        result = list(dict.fromkeys(result))
-        logger.info('Total links: %d' % len(result))
+        if search_url:
+            search_url = '%s?%s' % (search_url, urlencode(self.query))
 
-        return result
+        return search_url
 
-    def build_query(self, html=None):
+    def get_query_tokens(self, html=None):
         patern_form = r'(?:<form[^>]+role[\s=]+((?:")search(?:")|(?:\')search(?:\'))[^>]+>)[\s\S]+<\/form>'
         patern_action = r'action[\s=]+((?:")(.*?)(?:")|(?:\')(.*?)(?:\'))'
         patern_input = r'(?:<input[^>]+/?>)'
         patern_name = r'name[\s=]+((?:")(.*?)(?:")|(?:\')(.*?)(?:\'))'
         patern_value = r'value[\s=]+((?:")(.*?)(?:")|(?:\')(.*?)(?:\'))'
 
-        if not html:
-            html = self.fetch.get(self.base_url)
+        tokens = None if html else default_token_cache.get('Yahoo')
+        if tokens is not None:
+            return tokens
 
-        search_url = ''
-        if html:
-            get_form = re.search(patern_form, str(html), re.M | re.I)
-            if get_form:
-                form_str = get_form.group(0)
-                action_val = re.search(patern_action, form_str, re.I)
-                if action_val and len(action_val.groups()) >= 3:
-                    search_url = action_val.group(3) or action_val.group(2)
-                inputs = re.findall(patern_input, form_str, re.I)
-                for _input in inputs:
-                    name = None
-                    value = None
-                    get_name = re.search(patern_name, _input, re.I)
-                    get_value = re.search(patern_value, _input, re.I)
-                    if get_name and len(get_name.groups()) >= 3:
-                        name = get_name.group(3) or get_name.group(2)
-                    if get_value and len(get_value.groups()) >= 3:
-                        value = get_value.group(3) or get_value.group(2)
-
-                    if name and name != 'p':
-                        self.query.update({name: value or ''})
-
-        if search_url:
-            search_url = '%s?%s' % (search_url, urlencode(self.query))
+        if not html:
+            html = self.fetch.get(self.base_url, cache=False)
 
-        return search_url
+        if not html:
+            return
+
+        tokens = {'action': '', 'inputs': {}}
+        get_form = re.search(patern_form, str(html), re.M | re.I)
+        if get_form:
+            form_str = get_form.group(0)
+            action_val = re.search(patern_action, form_str, re.I)
+            if action_val and len(action_val.groups()) >= 3:
+                tokens['action'] = action_val.group(3) or action_val.group(2)
+            inputs = re.findall(patern_input, form_str, re.I)
+            for _input in inputs:
+                name = None
+                value = None
+                get_name = re.search(patern_name, _input, re.I)
+                get_value = re.search(patern_value, _input, re.I)
+                if get_name and len(get_name.groups()) >= 3:
+                    name = get_name.group(3) or get_name.group(2)
+                if get_value and len(get_value.groups()) >= 3:
+                    value = get_value.group(3) or get_value.group(2)
+
+                if name and name != 'p':
+                    tokens['inputs'].update({name: value or ''})
+
+        # Tokens without a form action cannot build a search URL
+        if tokens['action']:
+            default_token_cache.set('Yahoo', tokens)
+
+        return tokens
 
     @staticmethod
     def get_links(html):
@@ -134,7 +97,7 @@ class Yahoo:
         patern_href = r'href[\s=]+((?:")(.*?)(?:")|(?:\')(.*?)(?:\'))'
         patern_url = r'\/RU=(.*?)\/RK='
 
-        matches = re.findall(patern_links, html, re.M | re.I)
+        matches = re.findall(patern_links, str(html), re.M | re.I)
         for match in matches:
             href = re.search(patern_href, match, re.I)
 
@@ -162,7 +125,7 @@ class Yahoo:
         patern_next = r'(?:<a[^>]+class[\s=]+((?:")next(?:")|(?:\')next(?:\'))[^>]+>)'
         patern_href = r'href[\s=]+((?:")(.*?)(?:")|(?:\')(.*?)(?:\'))'
 
-        matches = re.search(patern_next, html, re.M | re.I)
+        matches = re.search(patern_next, str(html), re.M | re.I)
         if matches:
             href = re.search(patern_href, matches.group(0), re.I)
             if href and len(href.groups()) >= 3:
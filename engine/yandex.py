@@ -1,92 +1,85 @@
 import re
 from logging import DEBUG
 from urllib.parse import urljoin, urlencode
-from utils.blacklist import is_blacklisted
 from utils.helper import setup_logger, validate_url
-from libs.html_parser import NativeHTMLParser
+from libs.document import Document
+from libs.extractor import Selector
 from libs.fetch import FetchRequest
+from libs.strategy import StrategyChain
+from engine.base import SearchEngine
 
 
 logger = setup_logger(name='Yandex')
 
 
-class Yandex:
+# Result anchor lookups by layout; ElementTree has no contains(), so class substrings are filtered by hand
+def links_in_search_list(root):
+    # ul#search-result with li.serp-item (legacy)
+    search_result = root.find('.//ul[@id="search-result"]')
+    if search_result:
+        return search_result.findall('li[@class="serp-item"]//h2/a')
+    return []
+
+
+def links_in_main_content(root):
+    search_result = root.find('.//div[@class="main__content"]')
+    if not search_result:
+        search_result = root.find('.//div[@id="search-result"]')
+    if search_result:
+        return [a for a in search_result.iterfind('.//a') if 'organic__url' in a.get('class', '')]
+    return []
+
+
+def links_by_organic_class(root):
+    links = [a for a in root.iterfind('.//a') if 'OrganicTitle-Link' in a.get('class', '')]
+    if not links:
+        links = [a for a in root.iterfind('.//a') if 'serp-item' in a.get('class', '')]
+    return links
+
+
+link_strategies = StrategyChain('Yandex.links', [
+    ('search-list', links_in_search_list),
+    ('main-content', links_in_main_content),
+    ('organic-class', links_by_organic_class),
+])
+
+
+class Yandex(SearchEngine):
+    name = 'Yandex'
     base_url = 'https://yandex.com'
+    # Parsing stops once a results container and the pager have been closed.
+    # Pages without div.pager__items are parsed to the end, since the fallback
+    # next link (a[data-event-required][data-counter]) also occurs in results.
+    regions = [
+        [
+            Selector('ul', attrs={'id': 'search-result'}),
+            Selector('div', attrs={'id': 'search-result'}),
+            Selector('div', attrs={'class': 'main__content'}),
+        ],
+        [
+            Selector('div', attrs={'class': 'pager__items'}),
+        ],
+    ]
 
     def __init__(self, debug=False):
         self.debug = debug
-        self.fetch = FetchRequest()
+        self.fetch = FetchRequest(engine='Yandex')
         self.query = {}
         self.filtering = True
 
         if self.debug:
             logger.setLevel(DEBUG)
 
-    def search(self, keyword):
+    def get_search_url(self, keyword):
         search_url = self.build_query(keyword=str(keyword))
         if search_url:
             search_url = urljoin(self.base_url, search_url)
 
-        return self.search_run(search_url)
-
-    def search_run(self, url):
-        result = []
-        if not url:
-            return result
-
-        duplicate_page = 0
-        empty_page = 0
-        headers = {'Referer': self.base_url}
-        page = 1
-        while True:
-            if self.debug:
-                logger.debug('Page: %s %s' % (page, url))
-            else:
-                logger.info('Page: %s' % page)
-
-            html = self.fetch.get(url, headers=headers)
-            links = self.get_links(html)
-
-            if not links:
-                empty_page += 1
-                if page > 1:
-                    break
-            else:
-                duplicate = True
-                for link in links:
-                    if self.filtering:
-                        if is_blacklisted(link):
-                            logger.debug('[BLACKLIST] %s' % link)
-                            continue
-
-                    if link not in result:
-                        duplicate = False
-                        logger.info(link)
-                        result.append(link)
-                    else:
-                        logger.debug('[EXIST] %s' % link)
-
-                if duplicate:
-                    duplicate_page += 1
-
-            if duplicate_page >= 3:
-                break
-
-            if empty_page >= 2:
-                break
-
-            next_page = self.get_next_page(html)
-            if next_page:
-                headers.update({'Referer': url})
-                url = next_page
-            else:
-                break
-            page += 1
-
-        result = list(dict.fromkeys(result))
-        logger.info('Total links: %d' % len(result))
+        return search_url
 
-        return result
+    def fetch_page(self, url, headers):
+        # Parsed while it downloads; the rest of the page is dropped after the pager
+        return self.fetch.get_parsed(url, headers=headers, stop_after=self.regions, store=False)
 
     def build_query(self, keyword, html=None):
         # Yandex search URL can be built directly without parsing homepage
@@ -100,36 +93,19 @@ class Yandex:
         if not html:
             return result
 
-        _parser = NativeHTMLParser()
-        _parser.feed(html)
-        _parser.close()
+        doc = Document.wrap(html)
+        root = doc.parse(Yandex.regions)
 
-        if _parser.root is None:
+        if root is None:
             return result
 
         patern_captcha = r'/(?:support|checkcaptcha)'
 
-        if re.search(patern_captcha, html, re.I):
+        if re.search(patern_captcha, str(html), re.I):
             logger.error('Error captcha')
             return result
 
-        # Try multiple patterns for search results
-        # Pattern 1: ul#search-result with li.serp-item (legacy)
-        search_result = _parser.root.find('.//ul[@id="search-result"]')
-        if search_result:
-            links = search_result.findall('li[@class="serp-item"]//h2/a')
-        else:
-            # Pattern 2: Try organic results with class-based
-            search_result = _parser.root.find('.//div[@class="main__content"]')
-            if not search_result:
-                search_result = _parser.root.find('.//div[@id="search-result"]')
-            if search_result:
-                links = search_result.findall('.//a[contains(@class, "organic__url")]')
-            else:
-                # Pattern 3: Fallback - find links with organic URL class
-                links = _parser.root.findall('.//a[contains(@class, "OrganicTitle-Link")]')
-                if not links:
-                    links = _parser.root.findall('.//a[contains(@class, "serp-item")]')
+        links = link_strategies.run(root)
 
         for link in links:
             _class = link.get('class')
@@ -155,19 +131,18 @@ class Yandex:
 
         patern_captcha = r'/(?:support|checkcaptcha)'
 
-        if re.search(patern_captcha, html, re.I):
+        if re.search(patern_captcha, str(html), re.I):
             logger.error('Error captcha')
             return next_page
 
-        _parser = NativeHTMLParser()
-        _parser.feed(html)
-        _parser.close()
+        doc = Document.wrap(html)
+        root = doc.parse(self.regions)
 
-        if _parser.root is None:
+        if root is None:
             return next_page
 
         # Pattern 1: pager__items with pager__item_kind_next (legacy)
-        page_items = _parser.root.find('.//div[@class="pager__items"]')
+        page_items = root.find('.//div[@class="pager__items"]')
         if page_items:
             page_links = page_items.findall('a')
             for link in page_links:
@@ -180,7 +155,7 @@ class Yandex:
 
         # Pattern 2: Try data-arrow attribute on next link
         if not next_page:
-            next_link = _parser.root.find('.//a[@data-event-required][@data-counter]')
+            next_link = root.find('.//a[@data-event-required][@data-counter]')
             if next_link and next_link.get('href'):
                 next_page = validate_url(urljoin(self.base_url, next_link.get('href')))
 
@@ -0,0 +1,109 @@
+import re
+import sys
+from array import array
+
+
+class AnchorIndex:
+    """
+    Every <a> of a parsed page as parallel columns (element, href, class,
+    text, depth, ids of enclosing elements), built in one walk of the tree.
+
+    href and class strings are interned, so the many repeats on a results
+    page share one object, and depths and the row lists behind class tokens
+    and ancestor ids are array('I') rather than lists of ints. The usual
+    "links whose class contains X" or "links inside #Y" questions are
+    dictionary lookups instead of another findall('.//a') over the tree.
+    Lookups return the elements in document order.
+    """
+
+    def __init__(self, root=None):
+        self.elements = []
+        self.hrefs = []
+        self.classes = []
+        self.texts = []
+        self.depths = array('I')
+        self.ancestors = []
+        self.by_class = {}
+        self.by_ancestor = {}
+        self.class_rows = {}
+
+        if root is not None:
+            self.build(root)
+
+    def build(self, root):
+        stack = [(root, 0, ())]
+        while stack:
+            element, depth, ids = stack.pop()
+            if element.tag == 'a':
+                self.add(element, depth, ids)
+
+            _id = element.get('id')
+            if _id:
+                ids = ids + (_id,)
+            stack.extend((child, depth + 1, ids) for child in reversed(element))
+
+    def add(self, element, depth, ids):
+        row = len(self.elements)
+        _class = sys.intern(element.get('class') or '')
+        href = element.get('href')
+        self.elements.append(element)
+        self.hrefs.append(sys.intern(href) if href else href)
+        self.classes.append(_class)
+        self.texts.append(' '.join(''.join(element.itertext()).split()))
+        self.depths.append(depth)
+        self.ancestors.append(ids)
+
+        for token in set(_class.split()):
+            self.by_class.setdefault(token, array('I')).append(row)
+        for _id in set(ids):
+            self.by_ancestor.setdefault(_id, array('I')).append(row)
+
+    def rows(self, rows):
+        return [self.elements[row] for row in rows]
+
+    def with_class(self, token):
+        """Anchors carrying class token exactly."""
+        return self.rows(self.by_class.get(token, []))
+
+    def class_rows_containing(self, substring):
+        if substring not in self.class_rows:
+            if any(c.isspace() for c in substring):
+                # Spans tokens, so only the raw attribute can tell
+                rows = [row for row, _class in enumerate(self.classes) if substring in _class]
+            else:
+                rows = set()
+                for token, token_rows in self.by_class.items():
+                    if substring in token:
+                        rows.update(token_rows)
+                rows = sorted(rows)
+            self.class_rows[substring] = array('I', rows)
+
+        return self.class_rows[substring]
+
+    def class_contains(self, *substrings):
+        """Anchors whose class attribute contains any of substrings."""
+        if len(substrings) == 1:
+            return self.rows(self.class_rows_containing(substrings[0]))
+
+        rows = set()
+        for substring in substrings:
+            rows.update(self.class_rows_containing(substring))
+
+        return self.rows(sorted(rows))
+
+    def inside(self, _id):
+        """Anchors enclosed by the element with id _id."""
+        return self.rows(self.by_ancestor.get(_id, []))
+
+    def text_matches(self, pattern, flags=re.I):
+        """Anchors whose text matches pattern."""
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern, flags)
+
+        return [self.elements[row] for row, text in enumerate(self.texts) if text and pattern.search(text)]
+
+    def __len__(self):
+        return len(self.elements)
+
+    def __iter__(self):
+        return iter(self.elements)
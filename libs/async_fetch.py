@@ -0,0 +1,497 @@
+import io
+import ssl
+import time
+import asyncio
+import weakref
+import http.client
+import urllib.request
+import urllib.parse
+from urllib.parse import urljoin
+from utils.helper import random_agent, decode_bytes
+from libs.cookie import get_cookie_store
+from libs.cache import ResponseCache, get_default_cache
+from libs.compression import ACCEPT_ENCODING, CHUNK_SIZE, StreamDecoder
+from libs.ratelimit import default_limiter
+from libs.retry import default_retry_policy
+from libs.errors import classify_error, error_from_status, FetchError, ProtocolError
+from libs.singleflight import default_async_flight
+from libs.document import Document
+
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+
+class AsyncResponse:
+    """
+    Minimal stand-in for http.client.HTTPResponse so cookie extraction and
+    body decoding work the same as with the blocking backend.
+
+    body has already had its Content-Encoding undone while it was read;
+    received is the number of bytes that came over the wire.
+    """
+
+    def __init__(self, url, status, reason, headers, body, received=0):
+        self.url = url
+        self.status = status
+        self.code = status
+        self.reason = reason
+        self.msg = reason
+        self.headers = headers
+        self.body = io.BytesIO(body)
+        self.received = received
+
+    def info(self):
+        return self.headers
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name, default)
+
+    def geturl(self):
+        return self.url
+
+    def read(self, amt=None):
+        return self.body.read(amt)
+
+    def close(self):
+        self.body.close()
+
+
+class LoopState:
+    """
+    Semaphores and idle streams of an AsyncFetchRequest on one event loop;
+    neither may be shared with another loop.
+    """
+
+    def __init__(self, concurrency, max_per_host):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.max_per_host = max_per_host
+        self.slots = {}
+        self.connections = {}
+
+    def slot(self, key):
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = self.slots[key] = asyncio.Semaphore(self.max_per_host)
+
+        return slot
+
+
+class AsyncFetchRequest:
+    """
+    asyncio-streams counterpart of FetchRequest.
+
+    Exposes the same get/get_document/post surface as coroutines, shares the
+    cookie store and response cache, coalesces identical GETs in flight and keeps
+    User-Agent, compression and charset handling identical, so many page fetches
+    can run concurrently in a single thread.
+
+    At most concurrency requests run at once and at most max_per_host of them
+    hold a connection to the same host. Both limits and the idle connections
+    are kept per event loop.
+    """
+
+    def __init__(self, **kwargs):
+        self.debug = kwargs.get('debug') or False
+        self.user_agent = kwargs.get('user_agent') or random_agent()
+        self.timeout = kwargs.get('timeout') or 10
+        self.cookie_dir = kwargs.get('cookie_dir') or 'cookie'
+        self.cookie_ext = kwargs.get('cookie_ext') or '_cookie'
+        self.cookie_store = kwargs.get('cookie_store') or get_cookie_store(self.cookie_dir, self.cookie_ext)
+        self.max_redirects = kwargs.get('max_redirects') or 10
+        self.concurrency = kwargs.get('concurrency') or 100
+        self.keep_alive = kwargs.get('keep_alive', True)
+        self.max_per_host = kwargs.get('max_per_host') or 4
+        self.idle_timeout = kwargs.get('idle_timeout') or 30
+        self.ssl_context = kwargs.get('ssl_context') or ssl.create_default_context()
+        self.engine = kwargs.get('engine')
+        self.rate_limiter = kwargs.get('rate_limiter') or default_limiter
+        self.retry_policy = kwargs.get('retry_policy') or default_retry_policy
+        self.raise_errors = kwargs.get('raise_errors') or False
+        self.cache = kwargs.get('cache') or get_default_cache()
+        self.single_flight = kwargs.get('single_flight', True)
+        self.flight = kwargs.get('flight') or default_async_flight
+        self.pending = []
+        self.last_error = None
+        self.loops = weakref.WeakKeyDictionary()
+        self.last_transfer = {}
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+
+    @property
+    def state(self):
+        loop = asyncio.get_running_loop()
+        state = self.loops.get(loop)
+        if state is None:
+            state = self.loops[loop] = LoopState(self.concurrency, self.max_per_host)
+
+        return state
+
+    @property
+    def connections(self):
+        return self.state.connections
+
+    async def get(self, url, headers=None, cache=True, store=True):
+        document = await self.get_document(url, headers=headers, cache=cache, store=store)
+        if document is None:
+            return
+
+        return document.text
+
+    async def get_document(self, url, headers=None, cache=True, store=True):
+        """See FetchRequest.get_document()."""
+        cache_key = None
+        if self.cache and cache:
+            cache_key = self.cache.get_key('GET', url, headers)
+            cached = self.cache.get(cache_key)
+            if cached:
+                body, content_type = cached
+                self.last_error = None
+
+                return Document(raw=body, content_type=content_type, url=url)
+
+        store_key = cache_key if store else None
+        if self.single_flight:
+            fetched = await self.fetch_shared(cache_key or ResponseCache.get_key('GET', url, headers),
+                                              url, headers=headers, cache_key=store_key)
+        else:
+            fetched = await self.fetch_cached(url, headers=headers, cache_key=store_key)
+
+        if not fetched:
+            return
+
+        body, content_type = fetched
+        if cache_key and not store:
+            self.pending.append((cache_key, body, content_type))
+
+        return Document(raw=body, content_type=content_type, url=url)
+
+    def keep_pending(self, keep=True):
+        """See FetchRequest.keep_pending()."""
+        pending, self.pending = self.pending, []
+        if keep:
+            for cache_key, body, content_type in pending:
+                self.cache.set(cache_key, body, content_type=content_type, engine=self.engine)
+
+    async def fetch_cached(self, url, headers=None, cache_key=None):
+        response = await self.request(url=url, method='GET', headers=headers)
+        body = self.read_body(response)
+        if body is None:
+            return
+
+        content_type = response.getheader('Content-Type')
+        if cache_key:
+            self.cache.set(cache_key, body, content_type=content_type, engine=self.engine)
+
+        return body, content_type
+
+    async def fetch_shared(self, key, url, headers=None, cache_key=None):
+        """
+        fetch_cached() coalesced with identical requests already in flight on
+        this event loop; only the first caller touches the network.
+        """
+        async def fetch():
+            return await self.fetch_cached(url, headers=headers, cache_key=cache_key), self.last_error
+
+        try:
+            (fetched, error), shared = await self.flight.do(key, fetch)
+        except FetchError as err:
+            # The leading caller raised; only re-raise if this fetcher wants errors too
+            self.last_error = err
+            if self.raise_errors:
+                raise
+            return
+
+        if shared:
+            self.last_error = error
+
+        return fetched
+
+    async def post(self, url, headers=None, data=None):
+        response = await self.request(url=url, method='POST', headers=headers, data=data)
+
+        return self.get_response(response)
+
+    async def get_many(self, urls, headers=None):
+        return await asyncio.gather(*[self.get(url, headers=headers) for url in urls])
+
+    async def request(self, url, **kwargs):
+        method = kwargs.get('method') or 'GET'
+        headers = kwargs.get('headers') or {}
+        data = kwargs.get('data') or {}
+        state = self.state
+
+        self.last_error = None
+        attempt = 0
+        waited = 0.0
+
+        while True:
+            try:
+                async with state.semaphore:
+                    return await self.follow(url, method, headers, data)
+            except Exception as err:
+                error = classify_error(err, url)
+
+            delay = self.retry_policy.get_delay(attempt, error, waited)
+            if delay is None:
+                break
+
+            await asyncio.sleep(delay)
+            waited += delay
+            attempt += 1
+
+        self.last_error = error
+        if self.raise_errors:
+            raise error
+
+        print(error)
+
+        return
+
+    async def follow(self, url, method, headers, data):
+        for _ in range(self.max_redirects + 1):
+            request = self.build_request(url, method, headers, data)
+            response = await self.open(request)
+
+            location = response.getheader('Location')
+            if response.status in REDIRECT_CODES and location:
+                url = urljoin(response.url, location)
+                if response.status == 303 or (response.status in (301, 302) and method == 'POST'):
+                    method = 'GET'
+                    data = {}
+                continue
+
+            if response.status >= 400:
+                raise error_from_status(response.status, response.reason, response.headers, url)
+
+            return response
+
+        raise ProtocolError('too many redirects', url=url)
+
+    def build_request(self, url, method, headers, data):
+        request = urllib.request.Request(url=url, method=method)
+
+        if isinstance(headers, dict):
+            for k, v in headers.items():
+                request.add_header(k, v)
+
+        if not request.has_header('User-Agent') and self.user_agent:
+            request.add_header('User-Agent', self.user_agent)
+
+        if not request.has_header('Accept-encoding'):
+            request.add_header('Accept-Encoding', ACCEPT_ENCODING)
+
+        if isinstance(data, dict) and data:
+            request.data = urllib.parse.urlencode(data).encode()
+            if not request.has_header('Content-type'):
+                request.add_unredirected_header('Content-type', 'application/x-www-form-urlencoded')
+
+        return request
+
+    async def open(self, request):
+        await self.rate_limiter.wait_async(request.host.split(':')[0], self.engine)
+
+        cookie_key, cookie = self.cookie_store.get(request.full_url)
+        cookie.add_cookie_header(request)
+
+        key = (request.type, request.host)
+        # Held from connect to release, so it caps open connections and not only idle ones
+        async with self.state.slot(key):
+            stream = self.acquire(key)
+            reused = stream is not None
+
+            while True:
+                if stream is None:
+                    stream = await self.connect(request)
+                try:
+                    response, reusable = await self.send(stream, request)
+                    break
+                except (ConnectionError, asyncio.IncompleteReadError, http.client.BadStatusLine):
+                    stream[1].close()
+                    if not reused:
+                        raise
+                    stream = None
+                    reused = False
+                except BaseException:
+                    # Timeouts and cancellation leave the response half read
+                    stream[1].close()
+                    raise
+
+            if reusable:
+                self.release(key, stream)
+            else:
+                stream[1].close()
+
+        cookie.extract_cookies(response, request)
+        self.cookie_store.mark_dirty(cookie_key)
+
+        return response
+
+    async def connect(self, request):
+        host, _, port = request.host.partition(':')
+        if request.type == 'https':
+            coro = asyncio.open_connection(host, int(port or 443), ssl=self.ssl_context, server_hostname=host)
+        else:
+            coro = asyncio.open_connection(host, int(port or 80))
+
+        return await asyncio.wait_for(coro, self.timeout)
+
+    async def send(self, stream, request):
+        reader, writer = stream
+
+        headers = dict(request.unredirected_hdrs)
+        headers.update({k: v for k, v in request.headers.items() if k not in headers})
+        headers = {name.title(): val for name, val in headers.items()}
+        headers.setdefault('Host', request.host)
+        headers['Connection'] = 'keep-alive' if self.keep_alive else 'close'
+        if request.data is not None:
+            headers['Content-Length'] = str(len(request.data))
+
+        lines = ['%s %s HTTP/1.1' % (request.get_method(), request.selector)]
+        lines.extend('%s: %s' % (k, v) for k, v in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if request.data:
+            writer.write(request.data)
+        await writer.drain()
+
+        status_line = await self.read(reader.readline())
+        if not status_line:
+            raise http.client.RemoteDisconnected('Remote end closed connection without response')
+
+        try:
+            version, status, reason = status_line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+        except ValueError:
+            version, status = status_line.decode('latin-1').rstrip('\r\n').split(' ', 1)
+            reason = ''
+        if not version.startswith('HTTP/') or not status.isdigit():
+            raise http.client.BadStatusLine(status_line)
+        status = int(status)
+
+        raw_headers = b''
+        while True:
+            line = await self.read(reader.readline())
+            raw_headers += line
+            if line in (b'\r\n', b'\n', b''):
+                break
+        message = http.client.parse_headers(io.BytesIO(raw_headers))
+
+        will_close = version == 'HTTP/1.0' or 'close' in message.get('Connection', '').lower()
+        length = message.get('Content-Length')
+        chunked = 'chunked' in message.get('Transfer-Encoding', '').lower()
+
+        # Decoded as it arrives, so the compressed body is never held whole
+        decoder = StreamDecoder(message.get('Content-Encoding'))
+        if request.get_method() == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            body, received = b'', 0
+        elif chunked:
+            body, received = await self.read_chunked(reader, decoder)
+        elif length and length.strip().isdigit():
+            body, received = await self.read_length(reader, int(length), decoder)
+        else:
+            body, received = await self.read_length(reader, None, decoder)
+            will_close = True
+
+        response = AsyncResponse(request.full_url, status, reason.strip(), message, body, received)
+
+        return response, self.keep_alive and not will_close
+
+    async def read_length(self, reader, length, decoder):
+        """Decoded body of length bytes (up to EOF when length is None) and the bytes received."""
+        body = []
+        received = 0
+        while length is None or received < length:
+            size = CHUNK_SIZE if length is None else min(CHUNK_SIZE, length - received)
+            chunk = await self.read(reader.read(size))
+            if not chunk:
+                if length is None:
+                    break
+                raise asyncio.IncompleteReadError(b'', length - received)
+            received += len(chunk)
+            body.append(decoder.decompress(chunk))
+        body.append(decoder.flush())
+
+        return b''.join(body), received
+
+    async def read_chunked(self, reader, decoder):
+        body = []
+        received = 0
+        while True:
+            size_line = await self.read(reader.readline())
+            size = int(size_line.split(b';', 1)[0].strip() or b'0', 16)
+            if size == 0:
+                # Skip trailer headers
+                while True:
+                    line = await self.read(reader.readline())
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                break
+            while size:
+                chunk = await self.read(reader.readexactly(min(CHUNK_SIZE, size)))
+                size -= len(chunk)
+                received += len(chunk)
+                body.append(decoder.decompress(chunk))
+            await self.read(reader.readexactly(2))
+        body.append(decoder.flush())
+
+        return b''.join(body), received
+
+    async def read(self, coro):
+        return await asyncio.wait_for(coro, self.timeout)
+
+    def acquire(self, key):
+        now = time.monotonic()
+        idle = self.connections.get(key) or []
+        while idle:
+            stream, last_used = idle.pop()
+            reader, writer = stream
+            if now - last_used <= self.idle_timeout and not reader.at_eof() and not writer.is_closing():
+                return stream
+            writer.close()
+
+        return
+
+    def release(self, key, stream):
+        idle = self.connections.setdefault(key, [])
+        if len(idle) < self.max_per_host:
+            idle.append((stream, time.monotonic()))
+        else:
+            stream[1].close()
+
+    async def close(self):
+        for idle in self.connections.values():
+            for (_, writer), _ in idle:
+                writer.close()
+        self.connections.clear()
+
+    def read_body(self, response):
+        if response:
+            try:
+                body = response.read()
+                self.record_transfer(response, response.received, len(body))
+
+                return body
+            except Exception as err:
+                print('_response error', err)
+            finally:
+                response.close()
+
+        return
+
+    def record_transfer(self, response, received, decoded):
+        self.last_transfer = {
+            'url': response.geturl(),
+            'encoding': response.getheader('Content-Encoding') or 'identity',
+            'compressed': received,
+            'uncompressed': decoded,
+        }
+        self.bytes_received += received
+        self.bytes_decoded += decoded
+
+    def get_response(self, response):
+        body = self.read_body(response)
+        if body is not None:
+            result, _ = decode_bytes(body, content_type=response.getheader('Content-Type'),
+                                     host=urllib.parse.urlsplit(response.geturl()).hostname)
+
+            return result
+
+        return
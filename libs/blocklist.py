@@ -0,0 +1,267 @@
+import os
+import re
+import mmap
+import heapq
+import time
+import threading
+
+
+HEADER = b'#blocklist 1'
+
+# Entries held in memory at once while compiling a list
+SORT_CHUNK = 500000
+
+RE_SCHEME = re.compile(r'^[a-z][a-z0-9+.-]*://', re.I)
+
+
+def normalize_entry(line):
+    """
+    Blocklist line to its stored form: a lowercase domain, or domain/path for
+    URL prefixes. Hosts-file lines ("0.0.0.0 example.com") keep their last
+    field; comments and blank lines give None.
+    """
+    line = line.split('#', 1)[0].strip()
+    if not line:
+        return
+
+    line = RE_SCHEME.sub('', line.split()[-1])
+    host, slash, path = line.partition('/')
+    host = host.lower().lstrip('*.').rstrip('.')
+    if not host:
+        return
+
+    return '%s/%s' % (host, path) if slash else host
+
+
+def write_run(entries, path):
+    with open(path, 'wb') as f:
+        for entry in sorted(entries):
+            f.write(entry + b'\n')
+
+    return path
+
+
+def compile_blocklist(source, target, chunk_size=SORT_CHUNK):
+    """
+    Writes source's entries to target sorted and deduplicated, one per line
+    after a header line recording the source's mtime. Lists longer than
+    chunk_size entries are sorted in runs spilled next to target and merged,
+    so memory stays bounded. The file is replaced atomically.
+    """
+    mtime = os.stat(source).st_mtime_ns
+    tmp_file = '%s.%d.tmp' % (target, os.getpid())
+    runs = []
+    files = []
+    try:
+        chunk = set()
+        with open(source, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                entry = normalize_entry(line)
+                if entry:
+                    chunk.add(entry.encode('utf-8'))
+                    if len(chunk) >= chunk_size:
+                        runs.append(write_run(chunk, '%s.%d' % (tmp_file, len(runs))))
+                        chunk = set()
+
+        if runs:
+            if chunk:
+                runs.append(write_run(chunk, '%s.%d' % (tmp_file, len(runs))))
+            files = [open(run, 'rb') for run in runs]
+            entries = heapq.merge(*[(line.rstrip(b'\n') for line in run) for run in files])
+        else:
+            entries = sorted(chunk)
+
+        # The prefix count is only known after the merge; a fixed-width field lets it be patched in
+        prefixes = 0
+        with open(tmp_file, 'wb') as f:
+            f.write(b'%s %012d %d\n' % (HEADER, prefixes, mtime))
+            last = None
+            for entry in entries:
+                if entry == last:
+                    continue
+                last = entry
+                if b'/' in entry:
+                    prefixes += 1
+                f.write(entry + b'\n')
+
+            f.seek(0)
+            f.write(b'%s %012d %d\n' % (HEADER, prefixes, mtime))
+
+        os.replace(tmp_file, target)
+    finally:
+        for run in files:
+            run.close()
+        for path in runs + [tmp_file]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class Blocklist:
+    """
+    Domains and URL prefixes from one file, looked up in a sorted,
+    memory-mapped copy so worker processes share the pages instead of each
+    holding millions of strings.
+
+    A domain entry blocks the domain and its subdomains; an entry with a path
+    (example.com/ads/) blocks URLs on that host under the path. The source is
+    recompiled to <path>.sorted when it changes and the new map swapped in;
+    lookups in progress keep the old one.
+    """
+
+    def __init__(self, path, check_interval=2.0):
+        self.path = path
+        self.compiled_path = '%s.sorted' % path
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.state = None
+        self.next_check = 0.0
+        self.reload()
+
+    def reload(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        with self.lock:
+            if self.state and self.state['mtime'] == mtime:
+                return
+
+            try:
+                state = self.open_compiled()
+            except (OSError, ValueError):
+                state = None
+            if not state or state['mtime'] != mtime:
+                compile_blocklist(self.path, self.compiled_path)
+                state = self.open_compiled()
+
+            self.state = state
+
+    def open_compiled(self):
+        with open(self.compiled_path, 'rb') as f:
+            header = f.readline()
+            fields = header.split()
+            if not header.startswith(HEADER) or len(fields) != 4:
+                raise ValueError('%s: not a compiled blocklist' % self.compiled_path)
+
+            data = None
+            if os.fstat(f.fileno()).st_size > len(header):
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return {
+            'mtime': int(fields[3]),
+            'data': data,
+            'start': len(header),
+            'prefixes': int(fields[2]),
+            'memo': {},
+        }
+
+    def check(self):
+        now = time.monotonic()
+        if now < self.next_check:
+            return
+
+        self.next_check = now + self.check_interval
+        try:
+            self.reload()
+        except (OSError, ValueError) as err:
+            # Keep serving the last good list while the file is being replaced
+            print('blocklist %s: %s' % (self.path, err))
+
+    @staticmethod
+    def seek(state, key):
+        """First entry >= key (bytes), found by binary search over the mapped lines."""
+        data = state['data']
+        if data is None:
+            return
+
+        found = None
+        lo = state['start']
+        hi = len(data)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = data.rfind(b'\n', lo, mid) + 1 or lo
+            end = data.find(b'\n', start)
+            line = data[start:end]
+            if line < key:
+                lo = end + 1
+            else:
+                found = line
+                hi = start
+
+        return found
+
+    def lookup(self, state, key):
+        key = key.encode('utf-8')
+
+        return self.seek(state, key) == key
+
+    def check_domain(self, state, domain):
+        """(blocked, has URL prefix entries) for domain."""
+        suffix = domain
+        while suffix:
+            if self.lookup(state, suffix):
+                return True, False
+            suffix = suffix.partition('.')[2]
+
+        if not state['prefixes']:
+            return False, False
+
+        key = ('%s/' % domain).encode('utf-8')
+        line = self.seek(state, key)
+
+        return False, bool(line and line.startswith(key))
+
+    def is_blocked(self, domain, path=None):
+        self.check()
+        state = self.state
+
+        memo = state['memo']
+        decision = memo.get(domain)
+        if decision is None:
+            decision = self.check_domain(state, domain)
+            if len(memo) >= 65536:
+                memo.clear()
+            memo[domain] = decision
+
+        blocked, has_prefixes = decision
+        if blocked or not has_prefixes:
+            return blocked
+
+        # URL prefixes end at a path segment boundary, with or without the slash
+        path = path or '/'
+        pos = path.find('/')
+        while pos != -1:
+            if self.lookup(state, '%s%s' % (domain, path[:pos + 1])) or \
+                    (pos and self.lookup(state, '%s%s' % (domain, path[:pos]))):
+                return True
+            pos = path.find('/', pos + 1)
+
+        return self.lookup(state, '%s%s' % (domain, path))
+
+
+class BlocklistStore:
+    """The external blocklists in use; a URL is blocked if any of them lists it."""
+
+    def __init__(self):
+        self.blocklists = []
+
+    def add(self, path, check_interval=2.0):
+        blocklist = Blocklist(path, check_interval=check_interval)
+        self.blocklists.append(blocklist)
+
+        return blocklist
+
+    def clear(self):
+        self.blocklists = []
+
+    def is_blocked(self, domain, path=None):
+        for blocklist in self.blocklists:
+            if blocklist.is_blocked(domain, path):
+                return True
+
+        return False
+
+    def __bool__(self):
+        return bool(self.blocklists)
+
+
+default_blocklist = BlocklistStore()
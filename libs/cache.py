@@ -0,0 +1,195 @@
+import os
+import time
+import gzip
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import parse_qsl, urlencode
+from utils.helper import split_url, validate_path
+
+
+# Request headers that change what a server sends back. Referer and the
+# (randomised) User-Agent are left out so repeated runs share entries.
+CACHE_HEADERS = ('accept', 'accept-language')
+
+
+class ResponseCache:
+    """
+    On-disk SERP response cache.
+
+    Bodies are gzip-compressed and stored once per content hash under
+    ``<cache_dir>/objects``; a small sqlite index maps request keys to bodies with
+    an expiry time and last access time. When the stored bytes exceed
+    ``max_bytes`` the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir='cache', max_bytes=256 * 1024 * 1024, ttl=3600, engine_ttl=None):
+        self.cache_dir = validate_path(cache_dir, isdir=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.engine_ttl = dict(engine_ttl or {})
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(self.cache_dir, 'index.sqlite'), check_same_thread=False)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                content_type TEXT,
+                expires REAL NOT NULL,
+                accessed REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+            CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest);
+            CREATE TABLE IF NOT EXISTS objects (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL
+            );
+        ''')
+        self.db.commit()
+        self.total_bytes = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM objects').fetchone()[0]
+
+    @staticmethod
+    def get_key(method, url, headers=None):
+        spliturl = split_url(url, allow_fragments=False)
+        normalized = spliturl.get('url') or str(url)
+        if spliturl.get('query'):
+            query = urlencode(sorted(parse_qsl(spliturl.get('query'), keep_blank_values=True)))
+            normalized = '%s?%s' % (normalized.split('?', 1)[0], query)
+
+        parts = [str(method).upper(), normalized]
+        if isinstance(headers, dict):
+            for k, v in sorted(headers.items(), key=lambda x: x[0].lower()):
+                if k.lower() in CACHE_HEADERS:
+                    parts.append('%s:%s' % (k.lower(), v))
+
+        return hashlib.sha256('\n'.join(parts).encode('utf-8', 'replace')).hexdigest()
+
+    def get_ttl(self, engine=None):
+        return self.engine_ttl.get(engine, self.ttl)
+
+    def get_object_file(self, digest):
+        return os.path.join(self.cache_dir, 'objects', digest[:2], '%s.gz' % digest)
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.db.execute('SELECT digest, content_type, expires FROM entries WHERE key = ?',
+                                  (key,)).fetchone()
+            if not row:
+                return
+
+            digest, content_type, expires = row
+            if expires < now:
+                self.delete_entries([key])
+                self.db.commit()
+                return
+
+            self.db.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+            self.db.commit()
+
+        try:
+            with open(self.get_object_file(digest), 'rb') as f:
+                body = gzip.decompress(f.read())
+        except (OSError, EOFError) as err:
+            print('cache read error', err)
+            with self.lock:
+                self.delete_entries([key])
+                self.db.commit()
+            return
+
+        return body, content_type
+
+    def set(self, key, body, content_type=None, engine=None):
+        ttl = self.get_ttl(engine)
+        if not ttl or body is None:
+            return
+
+        digest = hashlib.sha256(body).hexdigest()
+        object_file = self.get_object_file(digest)
+        now = time.time()
+
+        with self.lock:
+            known = self.db.execute('SELECT 1 FROM objects WHERE digest = ?', (digest,)).fetchone()
+            if not known or not os.path.exists(object_file):
+                data = gzip.compress(body)
+                try:
+                    validate_path(object_file)
+                    temp_file = '%s.%d.tmp' % (object_file, threading.get_ident())
+                    with open(temp_file, 'wb') as f:
+                        f.write(data)
+                    os.replace(temp_file, object_file)
+                except OSError as err:
+                    print('cache write error', err)
+                    return
+
+                if not known:
+                    self.db.execute('INSERT INTO objects (digest, size) VALUES (?, ?)', (digest, len(data)))
+                    self.total_bytes += len(data)
+
+            old = self.db.execute('SELECT digest FROM entries WHERE key = ?', (key,)).fetchone()
+            self.db.execute('INSERT OR REPLACE INTO entries (key, digest, content_type, expires, accessed) '
+                            'VALUES (?, ?, ?, ?, ?)', (key, digest, content_type, now + ttl, now))
+            if old and old[0] != digest:
+                self.delete_orphans([old[0]])
+
+            if self.total_bytes > self.max_bytes:
+                self.evict(now)
+
+            self.db.commit()
+
+    def evict(self, now=None):
+        now = now or time.time()
+        expired = [row[0] for row in self.db.execute('SELECT key FROM entries WHERE expires < ?', (now,))]
+        self.delete_entries(expired)
+
+        while self.total_bytes > self.max_bytes:
+            keys = [row[0] for row in self.db.execute('SELECT key FROM entries ORDER BY accessed LIMIT 64')]
+            if not keys:
+                break
+            self.delete_entries(keys)
+
+    def delete_entries(self, keys):
+        if not keys:
+            return
+
+        digests = set()
+        for key in keys:
+            row = self.db.execute('SELECT digest FROM entries WHERE key = ?', (key,)).fetchone()
+            if row:
+                digests.add(row[0])
+                self.db.execute('DELETE FROM entries WHERE key = ?', (key,))
+
+        self.delete_orphans(digests)
+
+    def delete_orphans(self, digests):
+        for digest in digests:
+            if self.db.execute('SELECT 1 FROM entries WHERE digest = ?', (digest,)).fetchone():
+                continue
+
+            row = self.db.execute('SELECT size FROM objects WHERE digest = ?', (digest,)).fetchone()
+            if row:
+                self.total_bytes -= row[0]
+                self.db.execute('DELETE FROM objects WHERE digest = ?', (digest,))
+
+            try:
+                os.remove(self.get_object_file(digest))
+            except OSError:
+                pass
+
+    def clear(self):
+        with self.lock:
+            keys = [row[0] for row in self.db.execute('SELECT key FROM entries')]
+            self.delete_entries(keys)
+            self.db.commit()
+
+
+default_cache = None
+
+
+def set_default_cache(cache):
+    global default_cache
+    default_cache = cache
+
+
+def get_default_cache():
+    return default_cache
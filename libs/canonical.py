@@ -0,0 +1,194 @@
+import re
+import threading
+from urllib.parse import urlsplit, quote, unquote
+
+
+# Query parameters that only track where a click came from; a trailing * matches a prefix
+TRACKING_PARAMS = [
+    'utm_*', 'fbclid', 'gclid', 'gclsrc', 'dclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', 'igshid', 'ref_src', 'spm', 'cmpid', 'wt.mc_id',
+]
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# RFC 3986 unreserved characters never need escaping, the rest keep their escape
+RE_PERCENT = re.compile(r'%([0-9a-fA-F]{2})')
+UNRESERVED = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+SAFE_PATH = "/%:@!$&'()*+,;=-._~"
+SAFE_QUERY = "/?%:@!$'()*+,;=-._~"
+
+
+def normalize_escapes(value, safe):
+    """Decodes escaped unreserved characters, uppercases the other escapes and quotes what must be."""
+    def replace(match):
+        char = chr(int(match.group(1), 16))
+        return char if char in UNRESERVED else '%%%s' % match.group(1).upper()
+
+    return quote(RE_PERCENT.sub(replace, value), safe=safe)
+
+
+class UrlCanonicalizer:
+    """
+    Rewrites the spellings engines return for one page into a single form.
+
+    canonicalize() keeps the URL usable: lowercase scheme and host, punycode
+    for IDN hosts, no default port, normalized percent-escapes, tracking
+    parameters removed, query sorted and fragment dropped. get_key() goes
+    further for deduplication only (scheme, "www." and a trailing slash are
+    ignored), so http://www.example.com/a/ and https://example.com/a share
+    a key.
+
+    Each rule can be turned off with the keyword of the same name.
+    """
+
+    def __init__(self, **kwargs):
+        strip_params = kwargs.get('strip_params')
+        if strip_params is None:
+            strip_params = TRACKING_PARAMS
+        self.strip_exact = frozenset(p.lower() for p in strip_params if not p.endswith('*'))
+        self.strip_prefixes = tuple(p[:-1].lower() for p in strip_params if p.endswith('*'))
+        self.sort_query = kwargs.get('sort_query', True)
+        self.drop_fragment = kwargs.get('drop_fragment', True)
+        self.ignore_scheme = kwargs.get('ignore_scheme', True)
+        self.ignore_www = kwargs.get('ignore_www', True)
+        self.ignore_trailing_slash = kwargs.get('ignore_trailing_slash', True)
+        self.max_memo = kwargs.get('max_memo') or 65536
+        self.lock = threading.Lock()
+        self.memo = {}
+
+    def is_stripped(self, name):
+        name = name.lower()
+
+        return name in self.strip_exact or (bool(self.strip_prefixes) and name.startswith(self.strip_prefixes))
+
+    def get_host(self, parts):
+        host = parts.hostname
+        if not host:
+            return
+
+        host = host.rstrip('.')
+        if not host.isascii():
+            try:
+                host = host.encode('idna').decode('ascii')
+            except UnicodeError:
+                pass
+        if ':' in host:
+            host = '[%s]' % host
+
+        port = parts.port
+        if port and port != DEFAULT_PORTS.get(parts.scheme.lower()):
+            host = '%s:%d' % (host, port)
+        if parts.username:
+            userinfo = parts.username if parts.password is None else '%s:%s' % (parts.username, parts.password)
+            host = '%s@%s' % (userinfo, host)
+
+        return host
+
+    def get_query(self, query):
+        pairs = []
+        for pair in query.split('&'):
+            if not pair:
+                continue
+            name = pair.split('=', 1)[0]
+            if self.is_stripped(unquote(name)):
+                continue
+            pairs.append(normalize_escapes(pair, SAFE_QUERY + '=&'))
+
+        if self.sort_query:
+            pairs.sort()
+
+        return '&'.join(pairs)
+
+    def split(self, url):
+        """(scheme, host, path, query, fragment) in canonical form, or None if url has no host."""
+        try:
+            parts = urlsplit(str(url).strip())
+            host = self.get_host(parts)
+        except ValueError:
+            return
+
+        if not host or not parts.scheme:
+            return
+
+        path = normalize_escapes(parts.path, SAFE_PATH) or '/'
+        query = self.get_query(parts.query) if parts.query else ''
+        fragment = '' if self.drop_fragment else parts.fragment
+
+        return parts.scheme.lower(), host, path, query, fragment
+
+    def canonicalize(self, url):
+        """Canonical spelling of url; url itself when it cannot be parsed."""
+        return self.get(url)[0]
+
+    def get_key(self, url):
+        """Dedup key: equal for URLs that are the same page under this canonicalizer's rules."""
+        return self.get(url)[1]
+
+    def get(self, url):
+        cached = self.memo.get(url)
+        if cached is not None:
+            return cached
+
+        split = self.split(url)
+        if split is None:
+            result = (url, url)
+        else:
+            scheme, host, path, query, fragment = split
+            canonical = '%s://%s%s' % (scheme, host, path)
+            if query:
+                canonical = '%s?%s' % (canonical, query)
+            if fragment:
+                canonical = '%s#%s' % (canonical, fragment)
+
+            if self.ignore_www and host.startswith('www.'):
+                host = host[4:]
+            if self.ignore_trailing_slash and len(path) > 1:
+                path = path.rstrip('/') or '/'
+            key = '%s%s' % (host, path)
+            if not self.ignore_scheme:
+                key = '%s://%s' % (scheme, key)
+            if query:
+                key = '%s?%s' % (key, query)
+            if fragment:
+                key = '%s#%s' % (key, fragment)
+
+            result = (canonical, key)
+
+        with self.lock:
+            if len(self.memo) >= self.max_memo:
+                self.memo.clear()
+            self.memo[url] = result
+
+        return result
+
+    def unique(self, links):
+        """Canonical forms of links with duplicates (by key) removed, first spelling's order kept."""
+        seen = set()
+        result = []
+        for link in links:
+            canonical, key = self.get(link)
+            if key not in seen:
+                seen.add(key)
+                result.append(canonical)
+
+        return result
+
+
+default_canonicalizer = UrlCanonicalizer()
+
+
+def set_default_canonicalizer(canonicalizer):
+    global default_canonicalizer
+    default_canonicalizer = canonicalizer
+
+
+def canonicalize_url(url):
+    return default_canonicalizer.canonicalize(url)
+
+
+def get_dedup_key(url):
+    return default_canonicalizer.get_key(url)
+
+
+def unique_links(links):
+    return default_canonicalizer.unique(links)
@@ -0,0 +1,166 @@
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+
+CHUNK_SIZE = 64 * 1024
+
+if brotli is not None:
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+else:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+
+class GzipDecoder:
+    def __init__(self):
+        self.decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def decompress(self, data):
+        result = []
+        while data:
+            result.append(self.decoder.decompress(data))
+            # Concatenated gzip members: restart on the trailing bytes
+            data = self.decoder.unused_data
+            if data:
+                self.decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        return b''.join(result)
+
+    def flush(self):
+        return self.decoder.flush()
+
+
+class DeflateDecoder:
+    """
+    "deflate" is meant to be zlib-wrapped, but some servers send a raw stream;
+    the first chunk decides which one it is.
+    """
+
+    def __init__(self):
+        self.decoder = zlib.decompressobj()
+        self.first = b''
+        self.raw = None
+
+    def decompress(self, data):
+        if self.raw is not None:
+            return self.decoder.decompress(data)
+
+        self.first += data
+        try:
+            result = self.decoder.decompress(self.first)
+            self.raw = False
+            return result
+        except zlib.error:
+            self.raw = True
+            self.decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self.decoder.decompress(self.first)
+        finally:
+            if self.raw is not None:
+                self.first = b''
+
+    def flush(self):
+        return self.decoder.flush()
+
+
+class BrotliDecoder:
+    def __init__(self):
+        self.decoder = brotli.Decompressor()
+
+    def decompress(self, data):
+        if hasattr(self.decoder, 'process'):
+            return self.decoder.process(data)
+
+        return self.decoder.decompress(data)
+
+    def flush(self):
+        return b''
+
+
+class IdentityDecoder:
+    @staticmethod
+    def decompress(data):
+        return data
+
+    @staticmethod
+    def flush():
+        return b''
+
+
+DECODERS = {
+    'gzip': GzipDecoder,
+    'x-gzip': GzipDecoder,
+    'deflate': DeflateDecoder,
+    'identity': IdentityDecoder,
+}
+
+if brotli is not None:
+    DECODERS['br'] = BrotliDecoder
+
+
+class StreamDecoder:
+    """
+    Incremental decoder for a Content-Encoding header value. Multiple codings
+    ("gzip, br") are undone in reverse order of application.
+    """
+
+    def __init__(self, content_encoding=None):
+        self.decoders = []
+        codings = [c.strip().lower() for c in str(content_encoding or '').split(',') if c.strip()]
+        for coding in reversed(codings):
+            decoder = DECODERS.get(coding)
+            if decoder is None:
+                raise ValueError('Unsupported Content-Encoding: %s' % coding)
+            self.decoders.append(decoder())
+
+    def decompress(self, data):
+        for decoder in self.decoders:
+            data = decoder.decompress(data)
+
+        return data
+
+    def flush(self):
+        data = b''
+        for decoder in self.decoders:
+            if data:
+                data = decoder.decompress(data)
+            data += decoder.flush()
+
+        return data
+
+
+def read_stream(response, chunk_size=CHUNK_SIZE, on_chunk=None):
+    """
+    Read a response body chunk by chunk, undoing its Content-Encoding as it arrives.
+    Returns the decoded body and the number of bytes received on the wire.
+
+    on_chunk gets each decoded piece as soon as it is off the socket; reading
+    stops early (leaving the body partial) when it returns True.
+    """
+    decoder = StreamDecoder(response.getheader('Content-Encoding'))
+    # read1() hands back what has arrived instead of waiting for a full chunk
+    read = response.read1 if on_chunk and hasattr(response, 'read1') else response.read
+    received = 0
+    body = []
+
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        received += len(chunk)
+        data = decoder.decompress(chunk)
+        body.append(data)
+        if on_chunk and on_chunk(data):
+            return b''.join(body), received
+
+    data = decoder.flush()
+    body.append(data)
+    if on_chunk and data:
+        on_chunk(data)
+
+    return b''.join(body), received
@@ -0,0 +1,113 @@
+import os
+import atexit
+import hashlib
+import threading
+import http.cookiejar
+from utils.helper import split_url, file_exist, validate_path
+
+
+class CookieStore:
+    """
+    Process-wide in-memory cookie jars keyed by scheme and domain.
+    Jars are loaded from disk once per domain and written back in the
+    background (write-behind) and at interpreter exit.
+    """
+
+    def __init__(self, cookie_dir='cookie', cookie_ext='_cookie', flush_interval=30):
+        self.cookie_dir = cookie_dir
+        self.cookie_ext = cookie_ext
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.jars = {}
+        self.dirty = set()
+        self.stopped = threading.Event()
+        self.flusher = None
+
+        atexit.register(self.close)
+
+    @staticmethod
+    def get_key(url):
+        spliturl = split_url(url)
+        if spliturl.get('url'):
+            return '%s%s' % (spliturl.get('scheme'), spliturl.get('domain'))
+
+        return ''
+
+    def get_file(self, key):
+        cookie_name = hashlib.md5(key.encode()).hexdigest()
+        return os.path.join(self.cookie_dir, '%s%s' % (cookie_name, self.cookie_ext))
+
+    def get(self, url):
+        key = self.get_key(url)
+
+        with self.lock:
+            jar = self.jars.get(key)
+            if jar is None:
+                jar = self.load(key)
+                self.jars[key] = jar
+
+        return key, jar
+
+    def load(self, key):
+        cookie_file = self.get_file(key)
+        jar = http.cookiejar.MozillaCookieJar(cookie_file)
+
+        # https://developpaper.com/python-cookie-read-and-save-method/
+        if file_exist(cookie_file):
+            try:
+                jar.load(ignore_discard=True, ignore_expires=True)
+            except (OSError, http.cookiejar.LoadError) as err:
+                print('cookie load error', err)
+
+        return jar
+
+    def mark_dirty(self, key):
+        with self.lock:
+            self.dirty.add(key)
+            if self.flusher is None and self.flush_interval:
+                self.flusher = threading.Thread(target=self.run_flusher, name='CookieStoreFlusher', daemon=True)
+                self.flusher.start()
+
+    def run_flusher(self):
+        while not self.stopped.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            dirty = [(key, self.jars.get(key)) for key in self.dirty]
+            self.dirty.clear()
+
+        if not dirty:
+            return
+
+        if not validate_path(self.cookie_dir, isdir=True):
+            return
+
+        for key, jar in dirty:
+            if jar is None:
+                continue
+            try:
+                jar.save(ignore_discard=True, ignore_expires=True)
+            except (OSError, RuntimeError) as err:
+                # RuntimeError: the jar changed while being written; retry on the next flush.
+                print('cookie save error', err)
+                with self.lock:
+                    self.dirty.add(key)
+
+    def close(self):
+        self.stopped.set()
+        self.flush()
+
+
+cookie_stores = {}
+cookie_stores_lock = threading.Lock()
+
+
+def get_cookie_store(cookie_dir='cookie', cookie_ext='_cookie'):
+    with cookie_stores_lock:
+        store = cookie_stores.get((cookie_dir, cookie_ext))
+        if store is None:
+            store = CookieStore(cookie_dir=cookie_dir, cookie_ext=cookie_ext)
+            cookie_stores[(cookie_dir, cookie_ext)] = store
+
+    return store
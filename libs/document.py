@@ -0,0 +1,161 @@
+from urllib.parse import urlsplit
+from utils.helper import decode_bytes, get_content_type_charset, get_bom_charset, get_meta_charset, try_decode
+from libs.html_parser import NativeHTMLParser
+from libs.extractor import extract
+from libs.embedded_json import iter_payloads
+from libs.anchors import AnchorIndex
+
+
+class Document:
+    """
+    A fetched page parsed at most once.
+
+    Carries the raw text, the ElementTree root (built on first access) and any
+    derived views computed from it, so get_links and get_next_page can share a
+    single parse. str() gives back the text for the regex based fallbacks.
+
+    A document built from the raw response bytes only decodes them when .text
+    is first needed; until then byte-level scans can run on raw directly.
+    """
+
+    def __init__(self, text=None, raw=None, content_type=None, url=None):
+        if isinstance(text, bytes):
+            raw, text = text, None
+        if text is None and raw is None:
+            text = ''
+
+        self._text = text if text is None or isinstance(text, str) else str(text)
+        self.raw = raw
+        self.content_type = content_type
+        self.url = url
+        self.parsed = False
+        self._root = None
+        self.views = {}
+
+    @classmethod
+    def wrap(cls, html):
+        if isinstance(html, cls):
+            return html
+
+        return cls(html)
+
+    @property
+    def text(self):
+        if self._text is None:
+            host = urlsplit(self.url).hostname if self.url else None
+            self._text, _ = decode_bytes(self.raw, content_type=self.content_type, host=host)
+
+        return self._text
+
+    @property
+    def decoded(self):
+        return self._text is not None
+
+    @property
+    def raw_charset(self):
+        """Charset for decoding slices of raw, or None when raw is not ASCII-compatible."""
+        if 'raw_charset' not in self.views:
+            charset = None
+            if self.raw is not None:
+                charset = get_content_type_charset(self.content_type) or get_bom_charset(self.raw) \
+                    or get_meta_charset(self.raw) or 'utf-8'
+                if charset.startswith(('utf-16', 'utf-32')):
+                    charset = None
+            self.views['raw_charset'] = charset
+
+        return self.views['raw_charset']
+
+    def can_scan_raw(self):
+        return not self.decoded and self.raw_charset is not None
+
+    def decode_slice(self, value):
+        return try_decode(value, self.raw_charset) or value.decode('utf-8', 'replace')
+
+    def contains(self, marker):
+        """Substring test that stays on the raw bytes while the page is undecoded."""
+        if self.can_scan_raw():
+            return marker.encode(self.raw_charset, 'replace') in self.raw
+
+        return marker in self.text
+
+    @property
+    def root(self):
+        if not self.parsed:
+            self.parsed = True
+            if self.text:
+                _parser = NativeHTMLParser()
+                _parser.feed(self.text)
+                _parser.close()
+                self._root = _parser.root
+
+        return self._root
+
+    @property
+    def anchors(self):
+        """AnchorIndex of the full tree, built on first use."""
+        return self.view('anchors', lambda doc: AnchorIndex(doc.root))
+
+    def set_tree(self, root, stop_after=None):
+        """
+        Adopts a tree built elsewhere (e.g. while the page downloaded): the
+        full root, or the parse(stop_after) tree when it stopped early.
+        """
+        if stop_after is None:
+            self.parsed = True
+            self._root = root
+        else:
+            self.views[('parse', id(stop_after))] = root
+
+    def view(self, name, func):
+        """Returns func(self), computed once per document and remembered under name."""
+        if name not in self.views:
+            self.views[name] = func(self)
+
+        return self.views[name]
+
+    def parse(self, stop_after):
+        """
+        Tree of the page up to the end of the stop_after regions (see
+        NativeHTMLParser); the full root instead when it was already built.
+        """
+        if self.parsed:
+            return self._root
+
+        return self.view(('parse', id(stop_after)), lambda doc: doc.parse_regions(stop_after))
+
+    def parse_regions(self, stop_after):
+        if not self.text:
+            return
+
+        _parser = NativeHTMLParser(stop_after=stop_after)
+        _parser.feed(self.text)
+        _parser.close()
+
+        return _parser.root
+
+    def extract(self, selectors, stop_after=None):
+        """
+        Streaming SelectorExtractor results for a selectors dict, run once per
+        document; does not build the tree.
+        """
+        return self.view(('extract', id(selectors), id(stop_after)),
+                         lambda doc: extract(doc.text, selectors, stop_after))
+
+    def json_payloads(self, marker=None):
+        """JSON values embedded in the page's scripts (see libs.embedded_json), decoded once."""
+        return self.view(('json', marker), lambda doc: list(iter_payloads(doc.text, marker)))
+
+    def __str__(self):
+        return self.text
+
+    def __bool__(self):
+        if self.decoded:
+            return bool(self._text)
+
+        return bool(self.raw)
+
+    def __len__(self):
+        return len(self.text)
+
+    def __contains__(self, item):
+        return self.contains(item)
@@ -0,0 +1,97 @@
+import re
+import json
+
+
+SCRIPT_OPEN = re.compile(r'<script\b[^>]*>', re.I)
+SCRIPT_CLOSE = re.compile(r'</script\s*>', re.I)
+JSON_START = re.compile(r'[{\[]')
+
+# How far into a script body the payload may start (past "window.__STATE__ = " and the like)
+PREFIX_LIMIT = 256
+
+decoder = json.JSONDecoder()
+
+
+def decode_at(text, pos):
+    """Decodes the JSON value starting at the first { or [ from pos; returns (value, end) or None."""
+    match = JSON_START.search(text, pos)
+    if not match:
+        return
+
+    try:
+        return decoder.raw_decode(text, match.start())
+    except ValueError:
+        return
+
+
+def iter_payloads(text, marker=None):
+    """
+    Yields JSON values embedded in a page. With a marker, decoding starts right
+    after each occurrence of it; otherwise at the start of every <script> body
+    whose first { or [ comes within PREFIX_LIMIT characters.
+    """
+    if not text:
+        return
+
+    if marker:
+        pos = text.find(marker)
+        while pos != -1:
+            decoded = decode_at(text, pos + len(marker))
+            if decoded:
+                yield decoded[0]
+                pos = text.find(marker, decoded[1])
+            else:
+                pos = text.find(marker, pos + len(marker))
+        return
+
+    for script in SCRIPT_OPEN.finditer(text):
+        start = script.end()
+        close = SCRIPT_CLOSE.search(text, start)
+        end = close.start() if close else len(text)
+        match = JSON_START.search(text, start, min(end, start + PREFIX_LIMIT))
+        if not match:
+            continue
+
+        decoded = decode_at(text, match.start())
+        if decoded and decoded[1] <= end:
+            yield decoded[0]
+
+
+def iter_objects(value):
+    """Every dict nested anywhere in a decoded payload, depth first."""
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            yield item
+            stack.extend(reversed(list(item.values())))
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+
+
+def has_key(item, key):
+    if isinstance(key, tuple):
+        return any(k in item for k in key)
+
+    return key in item
+
+
+def find_results(payloads, url_key='url', require=None, title_key='title'):
+    """
+    Result records ({'url', 'title'}) from dicts in payloads that carry an
+    absolute http(s) URL under url_key and every key in require. A tuple in
+    require accepts any one of its keys, e.g. ('title', ('snippet', 'description')).
+    """
+    results = []
+    for payload in payloads:
+        for item in iter_objects(payload):
+            url = item.get(url_key)
+            if not isinstance(url, str) or not url.startswith(('http://', 'https://')):
+                continue
+            if require and not all(has_key(item, key) for key in require):
+                continue
+
+            title = item.get(title_key)
+            results.append({'url': url, 'title': title if isinstance(title, str) else None})
+
+    return results
@@ -0,0 +1,124 @@
+import ssl
+import socket
+import asyncio
+import http.client
+import email.utils
+from datetime import datetime, timezone
+from urllib.error import URLError, HTTPError
+
+
+class FetchError(Exception):
+    """Base class for failed fetches; retryable tells the retry policy whether to try again."""
+    retryable = False
+
+    def __init__(self, message, url=None, status=None, retry_after=None, cause=None):
+        super().__init__(message)
+        self.message = message
+        self.url = url
+        self.status = status
+        self.retry_after = retry_after
+        self.cause = cause
+
+    def __str__(self):
+        if self.url:
+            return '%s: %s (%s)' % (self.__class__.__name__, self.message, self.url)
+
+        return '%s: %s' % (self.__class__.__name__, self.message)
+
+
+class DNSError(FetchError):
+    pass
+
+
+class TemporaryDNSError(DNSError):
+    retryable = True
+
+
+class ConnectError(FetchError):
+    retryable = True
+
+
+class TLSError(FetchError):
+    pass
+
+
+class FetchTimeout(FetchError):
+    retryable = True
+
+
+class ProtocolError(FetchError):
+    retryable = True
+
+
+class HTTPStatusError(FetchError):
+    pass
+
+
+class ClientError(HTTPStatusError):
+    pass
+
+
+class RateLimited(ClientError):
+    retryable = True
+
+
+class ServerError(HTTPStatusError):
+    retryable = True
+
+
+def parse_retry_after(value):
+    """Retry-After is either delta-seconds or an HTTP-date; returns seconds or None."""
+    if not value:
+        return
+
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return
+
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+def error_from_status(status, reason='', headers=None, url=None):
+    retry_after = parse_retry_after(headers.get('Retry-After')) if headers is not None else None
+    message = 'HTTP Error %d: %s' % (status, reason)
+
+    if status == 429:
+        return RateLimited(message, url=url, status=status, retry_after=retry_after)
+    if status >= 500:
+        return ServerError(message, url=url, status=status, retry_after=retry_after)
+
+    return ClientError(message, url=url, status=status, retry_after=retry_after)
+
+
+def classify_error(err, url=None):
+    if isinstance(err, FetchError):
+        return err
+
+    if isinstance(err, HTTPError):
+        return error_from_status(err.code, err.reason, err.headers, url)
+
+    reason = err.reason if isinstance(err, URLError) else err
+    message = str(reason)
+
+    if isinstance(reason, socket.gaierror):
+        if reason.errno == socket.EAI_AGAIN:
+            return TemporaryDNSError(message, url=url, cause=err)
+        return DNSError(message, url=url, cause=err)
+    if isinstance(reason, (ssl.SSLError, ssl.CertificateError)):
+        return TLSError(message, url=url, cause=err)
+    if isinstance(reason, (socket.timeout, asyncio.TimeoutError, TimeoutError)):
+        return FetchTimeout(message or 'timed out', url=url, cause=err)
+    if isinstance(reason, (http.client.HTTPException, asyncio.IncompleteReadError)):
+        return ProtocolError(message or reason.__class__.__name__, url=url, cause=err)
+    if isinstance(reason, (ConnectionError, OSError)):
+        return ConnectError(message, url=url, cause=err)
+
+    return FetchError(message, url=url, cause=err)
@@ -0,0 +1,209 @@
+from html.parser import HTMLParser
+from libs.html_parser import VOID_ELEMENTS, IMPLIED_END_TAGS, P_CLOSERS, P_SCOPE, FEED_CHUNK_SIZE
+
+
+class Selector:
+    """
+    Compiled element test: tag name, attribute equality (a value of None only
+    checks presence), required class tokens and an optional ancestor Selector
+    that must enclose the element.
+    """
+
+    def __init__(self, tag, attrs=None, classes=None, ancestor=None):
+        self.tag = tag.lower()
+        self.attrs = tuple((attrs or {}).items())
+        if isinstance(classes, str):
+            classes = classes.split()
+        self.classes = frozenset(classes or [])
+        self.ancestor = ancestor
+
+    def matches(self, attrs):
+        for name, value in self.attrs:
+            if name not in attrs:
+                return False
+            if value is not None and attrs[name] != value:
+                return False
+
+        if self.classes and not self.classes.issubset((attrs.get('class') or '').split()):
+            return False
+
+        return True
+
+
+class Match:
+    """Attributes and whitespace-collapsed text of an element a Selector matched."""
+    __slots__ = ('tag', 'attrs', 'text', 'parts')
+
+    def __init__(self, tag, attrs):
+        self.tag = tag
+        self.attrs = attrs
+        self.text = ''
+        self.parts = []
+
+    def get(self, name, default=None):
+        value = self.attrs.get(name)
+
+        return default if value is None else value
+
+
+class SelectorExtractor(HTMLParser):
+    """
+    Event-driven alternative to NativeHTMLParser for pages where only a few
+    elements matter. Keeps a stack of open tag names and nothing else; elements
+    whose tag no selector mentions are never turned into objects.
+
+    selectors maps a result name to a Selector; results maps the same names to
+    lists of Match in document order. stop_after works as in NativeHTMLParser:
+    input after the last needed region closes is not parsed.
+    """
+
+    def __init__(self, selectors, stop_after=None):
+        HTMLParser.__init__(self)
+        self.results = {name: [] for name in selectors}
+        self.checks = {}
+        self.open_count = {}
+        self.stack = []
+        self.scopes = []
+        self.capturing = []
+        self.pending = [list(g) if isinstance(g, (list, tuple)) else [g] for g in stop_after or []]
+        self.stop_early = bool(self.pending)
+        self.done = False
+
+        for name, selector in selectors.items():
+            self.checks.setdefault(selector.tag, []).append((selector, name))
+            self.track(selector.ancestor)
+
+        for group in self.pending:
+            for region in group:
+                self.track(region)
+
+    def track(self, selector):
+        """Registers selector (and its ancestors) for open/close bookkeeping."""
+        while selector is not None:
+            if id(selector) not in self.open_count:
+                self.open_count[id(selector)] = 0
+                self.checks.setdefault(selector.tag, []).append((selector, None))
+            selector = selector.ancestor
+
+    def feed(self, data):
+        if not self.stop_early:
+            HTMLParser.feed(self, data)
+            return
+
+        for i in range(0, len(data), FEED_CHUNK_SIZE):
+            if self.done:
+                break
+            HTMLParser.feed(self, data[i:i + FEED_CHUNK_SIZE])
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+
+        self.close_implied(tag)
+        checks = self.checks.get(tag)
+        void = tag in VOID_ELEMENTS
+        if checks is None:
+            if not void:
+                self.stack.append(tag)
+            return
+
+        attrs = dict(attrs)
+        matched = []
+        for selector, name in checks:
+            if selector.ancestor is not None and not self.open_count[id(selector.ancestor)]:
+                continue
+            if selector.matches(attrs):
+                matched.append((selector, name))
+
+        # Applied after all checks so an element never counts as its own ancestor
+        depth = len(self.stack)
+        for selector, name in matched:
+            if name is None:
+                if not void:
+                    self.open_count[id(selector)] += 1
+                    self.scopes.append((depth, selector, None))
+            else:
+                match = Match(tag, attrs)
+                self.results[name].append(match)
+                if not void:
+                    self.capturing.append(match)
+                    self.scopes.append((depth, None, match))
+
+        if not void:
+            self.stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+
+        stack = self.stack
+        if stack and stack[-1] == tag:
+            depth = len(stack) - 1
+        else:
+            # Implicitly closes anything left open inside it; stray end tags are ignored
+            for depth in range(len(stack) - 2, -1, -1):
+                if stack[depth] == tag:
+                    break
+            else:
+                return
+
+        del stack[depth:]
+        self.close_scopes(depth)
+
+    def close_implied(self, tag):
+        """Closes what tag ends implicitly (an open <li>, <p>, <td>, ...), as NativeHTMLParser does."""
+        if tag in IMPLIED_END_TAGS:
+            closes, boundaries = IMPLIED_END_TAGS[tag]
+        elif tag in P_CLOSERS:
+            closes, boundaries = ('p',), P_SCOPE
+        else:
+            return
+
+        found = None
+        for depth in range(len(self.stack) - 1, -1, -1):
+            _tag = self.stack[depth]
+            if _tag in boundaries:
+                break
+            if _tag in closes:
+                found = depth
+
+        if found is not None:
+            del self.stack[found:]
+            self.close_scopes(found)
+
+    def handle_data(self, data):
+        for match in self.capturing:
+            match.parts.append(data)
+
+    def close_scopes(self, depth):
+        scopes = self.scopes
+        while scopes and scopes[-1][0] >= depth:
+            _, selector, match = scopes.pop()
+            if selector is not None:
+                self.open_count[id(selector)] -= 1
+                if self.pending:
+                    self.pending = [group for group in self.pending if selector not in group]
+                    self.done = not self.pending
+            else:
+                self.capturing.pop()
+                match.text = ' '.join(''.join(match.parts).split())
+                match.parts = None
+
+    def close(self):
+        HTMLParser.close(self)
+        self.stack = []
+        self.close_scopes(0)
+
+        return self.results
+
+
+def extract(html, selectors, stop_after=None):
+    extractor = SelectorExtractor(selectors, stop_after)
+    extractor.feed(str(html))
+
+    return extractor.close()
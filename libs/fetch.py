@@ -1,10 +1,19 @@
-import os
-import gzip
-import hashlib
-import http.cookiejar
+import time
 import urllib.request
 import urllib.parse
-from utils.helper import split_url, dir_exist, file_exist, random_agent, decode_bytes
+from urllib.error import HTTPError
+from utils.helper import random_agent, decode_bytes
+from libs.pool import default_pool, PooledHTTPHandler, PooledHTTPSHandler
+from libs.cookie import get_cookie_store
+from libs.cache import ResponseCache, get_default_cache
+from libs.compression import ACCEPT_ENCODING, read_stream
+from libs.ratelimit import default_limiter
+from libs.retry import default_retry_policy
+from libs.errors import classify_error, FetchError
+from libs.singleflight import default_flight
+from libs.document import Document
+from libs.html_parser import NativeHTMLParser
+from libs.stream import ParserFeed
 
 
 class FetchRequest:
@@ -14,53 +23,200 @@ class FetchRequest:
         self.timeout = kwargs.get('timeout') or 10
         self.cookie_dir = kwargs.get('cookie_dir') or 'cookie'
         self.cookie_ext = kwargs.get('cookie_ext') or '_cookie'
-        self.cookie_file = None
+        self.keep_alive = kwargs.get('keep_alive', True)
+        self.pool = kwargs.get('pool') or default_pool
+        self.cookie_store = kwargs.get('cookie_store') or get_cookie_store(self.cookie_dir, self.cookie_ext)
         self.cookie = None
+        self.engine = kwargs.get('engine')
+        self.cache = kwargs.get('cache') or get_default_cache()
+        self.rate_limiter = kwargs.get('rate_limiter') or default_limiter
+        self.retry_policy = kwargs.get('retry_policy') or default_retry_policy
+        self.raise_errors = kwargs.get('raise_errors') or False
+        self.single_flight = kwargs.get('single_flight', True)
+        self.flight = kwargs.get('flight') or default_flight
+        self.pending = []
+        self.last_error = None
+        self.last_wait = 0.0
+        self.last_transfer = {}
+        self.bytes_received = 0
+        self.bytes_decoded = 0
 
-    def set_cookie_file(self, url):
-        cookieStr = self.cookie_file
+    def get(self, url, headers=None, cache=True, store=True):
+        document = self.get_document(url, headers=headers, cache=cache, store=store)
+        if document is None:
+            return
 
-        spliturl = split_url(url)
-        if spliturl.get('url'):
-            cookieStr = '%s%s' % (spliturl.get('scheme'), spliturl.get('domain'))
+        return document.text
 
-        cookieName = hashlib.md5(cookieStr.encode()).hexdigest()
-        cookieFile = '%s%s' % (cookieName, self.cookie_ext)
+    def get_document(self, url, headers=None, cache=True, store=True):
+        """
+        Like get(), but returns a Document over the raw body; the page is only
+        decoded once something asks for its text.
 
-        if file_exist(self.cookie_dir):
-            os.remove(self.cookie_dir)
+        cache=False bypasses the response cache (homepages and form tokens).
+        store=False looks the page up but leaves storing it to keep_pending(),
+        once the caller has seen that it holds results.
+        """
+        cache_key = None
+        if self.cache and cache:
+            cache_key = self.cache.get_key('GET', url, headers)
+            cached = self.cache.get(cache_key)
+            if cached:
+                body, content_type = cached
+                self.last_error = None
 
-        if not dir_exist(self.cookie_dir):
-            os.mkdir(self.cookie_dir)
+                return Document(raw=body, content_type=content_type, url=url)
 
-        self.cookie_file = os.path.join(self.cookie_dir, cookieFile)
+        store_key = cache_key if store else None
+        if self.single_flight:
+            fetched = self.fetch_shared(cache_key or ResponseCache.get_key('GET', url, headers),
+                                        url=url, method='GET', headers=headers, cache_key=store_key)
+        else:
+            fetched = self.fetch_cached(url=url, method='GET', headers=headers, cache_key=store_key)
+
+        if not fetched:
+            return
+
+        body, content_type = fetched
+        if cache_key and not store:
+            self.pending.append((cache_key, body, content_type))
+
+        return Document(raw=body, content_type=content_type, url=url)
+
+    def get_parsed(self, url, headers=None, stop_after=None, cache=True, store=True):
+        """
+        Like get_document(), but the page is parsed while it downloads and the
+        returned Document already holds the tree. With stop_after (see
+        NativeHTMLParser) the download is abandoned once those regions are
+        complete; such a partial body is not cached.
+
+        Streamed requests are not coalesced through single_flight, as every
+        caller needs its own parse. cache and store are as for get_document().
+        """
+        cache_key = None
+        if self.cache and cache:
+            cache_key = self.cache.get_key('GET', url, headers)
+            cached = self.cache.get(cache_key)
+            if cached:
+                body, content_type = cached
+                self.last_error = None
 
-    def get(self, url, headers=None):
-        response = self.request(url=url, method='GET', headers=headers)
+                return Document(raw=body, content_type=content_type, url=url)
 
-        return self.get_response(response)
+        fetched = self.with_retries(self.open_parsed, url, method='GET', headers=headers, stop_after=stop_after)
+        if not fetched:
+            return
+
+        body, content_type, root, feed = fetched
+        if cache_key and not feed.stopped:
+            if store:
+                self.cache.set(cache_key, body, content_type=content_type, engine=self.engine)
+            else:
+                self.pending.append((cache_key, body, content_type))
+
+        document = Document(raw=body, content_type=content_type, url=url)
+        if root is not None:
+            document.set_tree(root, stop_after if feed.stopped else None)
+
+        return document
+
+    def keep_pending(self, keep=True):
+        """
+        Stores the pages fetched with store=False since the last call, or drops
+        them when keep is false (no results, a captcha or an error page).
+        """
+        pending, self.pending = self.pending, []
+        if keep:
+            for cache_key, body, content_type in pending:
+                self.cache.set(cache_key, body, content_type=content_type, engine=self.engine)
 
     def post(self, url, headers=None, data=None):
-        response = self.request(url=url, method='POST', headers=headers, data=data)
+        fetched = self.fetch_body(url=url, method='POST', headers=headers, data=data)
+        if not fetched:
+            return
+
+        body, content_type = fetched
 
-        return self.get_response(response)
+        return self.decode_body(body, content_type, url)
 
     def request(self, url, **kwargs):
+        """Open url, retrying per retry_policy. Returns the response, or None with last_error set."""
+        return self.with_retries(self.open, url, **kwargs)
+
+    def fetch_body(self, url, **kwargs):
+        """Like request(), but also reads the body so failures while reading are retried too."""
+        return self.with_retries(self.open_body, url, **kwargs)
+
+    def fetch_cached(self, url, cache_key=None, **kwargs):
+        fetched = self.fetch_body(url, **kwargs)
+        if fetched and cache_key:
+            body, content_type = fetched
+            self.cache.set(cache_key, body, content_type=content_type, engine=self.engine)
+
+        return fetched
+
+    def fetch_shared(self, key, url, **kwargs):
+        """
+        fetch_cached() coalesced with identical requests already in flight from
+        other threads; only the first caller touches the network.
+        """
+        def fetch():
+            return self.fetch_cached(url, **kwargs), self.last_error
+
+        try:
+            (fetched, error), shared = self.flight.do(key, fetch)
+        except FetchError as err:
+            # The leading caller raised; only re-raise if this fetcher wants errors too
+            self.last_error = err
+            if self.raise_errors:
+                raise
+            return
+
+        if shared:
+            self.last_error = error
+
+        return fetched
+
+    def with_retries(self, func, url, **kwargs):
+        self.last_error = None
+        attempt = 0
+        waited = 0.0
+
+        while True:
+            try:
+                return func(url, **kwargs)
+            except Exception as err:
+                error = classify_error(err, url)
+
+            delay = self.retry_policy.get_delay(attempt, error, waited)
+            if delay is None:
+                break
+
+            time.sleep(delay)
+            waited += delay
+            attempt += 1
+
+        self.last_error = error
+        if self.raise_errors:
+            raise error
+
+        print(error)
+
+        return
+
+    def open(self, url, **kwargs):
         method = kwargs.get('method') or 'GET'
         headers = kwargs.get('headers') or {}
         data = kwargs.get('data') or {}
 
-        self.set_cookie_file(url)
+        cookie_key, cookie = self.cookie_store.get(url)
+        self.cookie = cookie
 
-        # https://developpaper.com/python-cookie-read-and-save-method/
-        if file_exist(self.cookie_file):
-            cookie = http.cookiejar.MozillaCookieJar()
-            cookie.load(self.cookie_file, ignore_discard=True, ignore_expires=True)
-        else:
-            cookie = http.cookiejar.MozillaCookieJar(self.cookie_file)
+        handlers = [urllib.request.HTTPCookieProcessor(cookie)]
+        if self.keep_alive and self.pool.enabled:
+            handlers.extend([PooledHTTPHandler(self.pool), PooledHTTPSHandler(self.pool)])
 
-        handler = urllib.request.HTTPCookieProcessor(cookie)
-        opener = urllib.request.build_opener(handler)
+        opener = urllib.request.build_opener(*handlers)
         request = urllib.request.Request(url=url, method=method)
 
         if isinstance(headers, dict):
@@ -70,31 +226,84 @@ class FetchRequest:
         if not request.has_header('User-Agent') and self.user_agent:
             request.add_header('User-Agent', self.user_agent)
 
+        if not request.has_header('Accept-encoding'):
+            request.add_header('Accept-Encoding', ACCEPT_ENCODING)
+
         if isinstance(data, dict):
             request.data = urllib.parse.urlencode(data).encode()
 
+        self.last_wait = self.rate_limiter.wait(request.host.split(':')[0], self.engine)
+
         try:
-            response = opener.open(request, timeout=self.timeout)
-            cookie.save(self.cookie_file, ignore_discard=True, ignore_expires=True)
+            return opener.open(request, timeout=self.timeout)
+        except HTTPError as err:
+            # Drops the connection behind the unread error body
+            err.close()
+            raise
+        finally:
+            self.cookie_store.mark_dirty(cookie_key)
 
-            return response
-        except Exception as err:
-            print(err)
+    def open_body(self, url, **kwargs):
+        response = self.open(url, **kwargs)
+        try:
+            body, received = read_stream(response)
+        finally:
+            # Hands a kept-alive connection back to the pool once the body is drained
+            response.close()
 
-        return
+        self.record_transfer(response, received, len(body))
+
+        return body, response.getheader('Content-Type')
+
+    def open_parsed(self, url, **kwargs):
+        response = self.open(url, **kwargs)
+        content_type = response.getheader('Content-Type')
+        feed = ParserFeed(NativeHTMLParser(stop_after=kwargs.get('stop_after')), content_type)
+        try:
+            body, received = read_stream(response, on_chunk=feed.feed)
+        finally:
+            # An abandoned body is not drained, so the pool drops that connection
+            response.close()
+
+        self.record_transfer(response, received, len(body))
+
+        return body, content_type, feed.close(), feed
 
     @staticmethod
-    def get_response(response):
+    def decode_body(body, content_type=None, url=None):
+        result, _ = decode_bytes(body, content_type=content_type,
+                                 host=urllib.parse.urlsplit(url).hostname if url else None)
+
+        return result
+
+    def read_body(self, response):
         if response:
             try:
-                content_encoding = response.getheader('Content-Encoding')
-                if content_encoding and content_encoding.lower() == 'gzip':
-                    result, _ = decode_bytes(gzip.decompress(response.read()))
-                else:
-                    result, _ = decode_bytes(response.read())
+                body, received = read_stream(response)
+                self.record_transfer(response, received, len(body))
 
-                return result
+                return body
             except Exception as err:
                 print('_response error', err)
+            finally:
+                # Hands a kept-alive connection back to the pool once the body is drained
+                response.close()
+
+        return
+
+    def record_transfer(self, response, received, decoded):
+        self.last_transfer = {
+            'url': response.geturl(),
+            'encoding': response.getheader('Content-Encoding') or 'identity',
+            'compressed': received,
+            'uncompressed': decoded,
+        }
+        self.bytes_received += received
+        self.bytes_decoded += decoded
+
+    def get_response(self, response):
+        body = self.read_body(response)
+        if body is not None:
+            return self.decode_body(body, response.getheader('Content-Type'), response.geturl())
 
         return
@@ -3,41 +3,157 @@ from html.parser import HTMLParser
 from xml.etree import ElementTree
 
 
+VOID_ELEMENTS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen',
+    'link', 'meta', 'param', 'source', 'track', 'wbr',
+])
+
+
+# Start tag -> (open elements it implicitly closes, elements that stop the search)
+IMPLIED_END_TAGS = {
+    'li': ({'li'}, {'ul', 'ol', 'menu'}),
+    'dt': ({'dt', 'dd'}, {'dl'}),
+    'dd': ({'dt', 'dd'}, {'dl'}),
+    'tr': ({'tr', 'td', 'th'}, {'table', 'thead', 'tbody', 'tfoot'}),
+    'td': ({'td', 'th'}, {'tr', 'table'}),
+    'th': ({'td', 'th'}, {'tr', 'table'}),
+    'thead': ({'thead', 'tbody', 'tfoot', 'tr', 'td', 'th'}, {'table'}),
+    'tbody': ({'thead', 'tbody', 'tfoot', 'tr', 'td', 'th'}, {'table'}),
+    'tfoot': ({'thead', 'tbody', 'tfoot', 'tr', 'td', 'th'}, {'table'}),
+    'option': ({'option'}, {'select', 'datalist', 'optgroup'}),
+    'optgroup': ({'optgroup', 'option'}, {'select'}),
+    'rt': ({'rt', 'rp'}, {'ruby'}),
+    'rp': ({'rt', 'rp'}, {'ruby'}),
+}
+
+# Block-level start tags that close an open <p>
+P_CLOSERS = frozenset([
+    'address', 'article', 'aside', 'blockquote', 'details', 'div', 'dl', 'fieldset',
+    'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'header', 'hgroup', 'hr', 'main', 'menu', 'nav', 'ol', 'p', 'pre', 'section',
+    'table', 'ul',
+])
+P_SCOPE = frozenset(['button', 'td', 'th', 'li', 'table', 'caption', 'object', 'html', 'body'])
+
+# Input is fed in pieces of this size when a parser may stop early
+FEED_CHUNK_SIZE = 16 * 1024
+
+
 class NativeHTMLParser(HTMLParser, ABC):
     """
     Python 3.x HTMLParser extension with ElementTree support.
     @see https://github.com/marmelo/python-htmlparser
+
+    Void elements never stay open, end tags close up to their matching open
+    element (stray ones are ignored) and the common optional end tags (li, p,
+    td, option, ...) are implied, so the tree depth follows the document's real
+    nesting. Text goes to .text or the previous sibling's .tail as in ElementTree.
+
+    stop_after lists the regions a caller needs, each a Selector-like object
+    (tag, matches(attrs)) or a list of alternatives. Once one element of every
+    region has been closed the rest of the input is not parsed.
     """
 
-    def __init__(self):
+    def __init__(self, stop_after=None):
         self.root = None
         self.tree = []
+        self.pending = [list(g) if isinstance(g, (list, tuple)) else [g] for g in stop_after or []]
+        self.region_tags = {region.tag for group in self.pending for region in group}
+        self.stop_early = bool(self.pending)
+        self.done = False
         HTMLParser.__init__(self)
 
     def feed(self, data):
-        HTMLParser.feed(self, data)
+        if not self.stop_early:
+            HTMLParser.feed(self, data)
+            return self.root
+
+        for i in range(0, len(data), FEED_CHUNK_SIZE):
+            if self.done:
+                break
+            HTMLParser.feed(self, data[i:i + FEED_CHUNK_SIZE])
+
         return self.root
 
     def handle_starttag(self, tag, attrs):
-        if len(self.tree) == 0:
-            element = ElementTree.Element(tag, dict(self.__filter_attrs(attrs)))
-            self.tree.append(element)
-            self.root = element
-        else:
-            element = ElementTree.SubElement(self.tree[-1], tag, dict(self.__filter_attrs(attrs)))
+        if self.done:
+            return
+
+        if self.root is None:
+            if tag == 'html':
+                self.root = ElementTree.Element(tag, dict(self.__filter_attrs(attrs)))
+                self.tree.append(self.root)
+                return
+
+            # Fragments and pages without <html> get an implicit root
+            self.root = ElementTree.Element('html')
+            self.tree.append(self.root)
+        elif not self.tree:
+            # Content after </html> stays inside the document
+            self.tree.append(self.root)
+
+        self.close_implied(tag)
+
+        element = ElementTree.SubElement(self.tree[-1], tag, dict(self.__filter_attrs(attrs)))
+        if tag not in VOID_ELEMENTS:
             self.tree.append(element)
 
     def handle_endtag(self, tag):
-        self.tree.pop()
+        if self.done:
+            return
+
+        for i in range(len(self.tree) - 1, -1, -1):
+            if self.tree[i].tag == tag:
+                self.pop_to(i)
+                return
 
     def handle_startendtag(self, tag, attrs):
         self.handle_starttag(tag, attrs)
-        self.handle_endtag(tag)
-        pass
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
 
     def handle_data(self, data):
-        if self.tree:
-            self.tree[-1].text = data
+        if not self.tree or self.done:
+            return
+
+        current = self.tree[-1]
+        if len(current):
+            last = current[-1]
+            last.tail = data if last.tail is None else last.tail + data
+        else:
+            current.text = data if current.text is None else current.text + data
+
+    def close_implied(self, tag):
+        if tag in IMPLIED_END_TAGS:
+            closes, boundaries = IMPLIED_END_TAGS[tag]
+        elif tag in P_CLOSERS:
+            closes, boundaries = ('p',), P_SCOPE
+        else:
+            return
+
+        # Outermost match inside the boundary, so <tr> also closes an open <td>
+        found = None
+        for i in range(len(self.tree) - 1, 0, -1):
+            _tag = self.tree[i].tag
+            if _tag in boundaries:
+                break
+            if _tag in closes:
+                found = i
+
+        if found is not None:
+            self.pop_to(found)
+
+    def pop_to(self, i):
+        if self.pending:
+            for element in self.tree[i:]:
+                if element.tag not in self.region_tags:
+                    continue
+                self.pending = [group for group in self.pending if not any(
+                    region.tag == element.tag and region.matches(element.attrib) for region in group)]
+            if not self.pending:
+                self.done = True
+
+        del self.tree[i:]
 
     def get_root_element(self):
         return self.root
@@ -0,0 +1,220 @@
+import time
+import select
+import threading
+import http.client
+import urllib.request
+from urllib.error import URLError
+
+
+# Errors raised when a kept-alive socket has been closed by the server
+# while it was sitting idle in the pool.
+STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of idle HTTP/1.1 connections keyed by scheme and host.
+    Connections are handed back by PooledHTTPResponse once the body is fully read.
+
+    At most max_per_host connections per key are in use at once: reserve()
+    blocks for a free slot and free() gives it back when the response is
+    closed. Expired idle connections are reaped every idle_timeout seconds
+    from acquire().
+    """
+
+    def __init__(self, max_per_host=4, idle_timeout=30, enabled=True):
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.connections = {}
+        self.slots = {}
+        self.next_evict = time.monotonic() + idle_timeout
+
+    def reserve(self, key, timeout=None):
+        with self.lock:
+            slot = self.slots.get(key)
+            if slot is None:
+                slot = self.slots[key] = threading.BoundedSemaphore(self.max_per_host)
+
+        if not slot.acquire(timeout=timeout):
+            raise URLError('no free connection to %s://%s' % key)
+
+    def free(self, key):
+        with self.lock:
+            slot = self.slots.get(key)
+
+        if slot is not None:
+            slot.release()
+
+    def acquire(self, key):
+        now = time.monotonic()
+        if now >= self.next_evict:
+            self.next_evict = now + self.idle_timeout
+            self.evict_idle()
+
+        with self.lock:
+            idle = self.connections.get(key) or []
+            while idle:
+                conn, last_used = idle.pop()
+                if now - last_used <= self.idle_timeout and self.is_alive(conn):
+                    return conn
+                conn.close()
+
+        return
+
+    def release(self, key, conn):
+        if not self.enabled or conn.sock is None:
+            conn.close()
+            return
+
+        with self.lock:
+            idle = self.connections.setdefault(key, [])
+            if len(idle) < self.max_per_host:
+                idle.append((conn, time.monotonic()))
+                return
+
+        conn.close()
+
+    def evict_idle(self):
+        now = time.monotonic()
+        with self.lock:
+            for key, idle in list(self.connections.items()):
+                alive = []
+                for conn, last_used in idle:
+                    if now - last_used <= self.idle_timeout:
+                        alive.append((conn, last_used))
+                    else:
+                        conn.close()
+                if alive:
+                    self.connections[key] = alive
+                else:
+                    del self.connections[key]
+
+    def clear(self):
+        with self.lock:
+            for idle in self.connections.values():
+                for conn, _ in idle:
+                    conn.close()
+            self.connections.clear()
+
+    @staticmethod
+    def is_alive(conn):
+        if conn.sock is None:
+            return False
+
+        # An idle keep-alive socket must not be readable; if it is, the server
+        # either closed it or sent unsolicited data.
+        try:
+            readable, _, _ = select.select([conn.sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+
+        return not readable
+
+
+class PooledHTTPResponse(http.client.HTTPResponse):
+    pool = None
+    pool_key = None
+    pool_conn = None
+
+    def close(self):
+        drained = self.fp is None or (self.length == 0 and not self.chunked)
+        super().close()
+
+        conn = self.pool_conn
+        if conn is None:
+            return
+
+        self.pool_conn = None
+        if drained and not self.will_close:
+            self.pool.release(self.pool_key, conn)
+        else:
+            conn.close()
+        self.pool.free(self.pool_key)
+
+
+class PooledHandlerMixin:
+    pool = None
+
+    def do_open(self, http_class, req, **http_conn_args):
+        # Tunnelled (proxy CONNECT) requests keep urllib's one-shot behaviour.
+        if self.pool is None or not self.pool.enabled or req._tunnel_host:
+            return super().do_open(http_class, req, **http_conn_args)
+
+        host = req.host
+        if not host:
+            raise URLError('no host given')
+
+        key = (req.type, host)
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items() if k not in headers})
+        headers['Connection'] = 'keep-alive'
+        headers = {name.title(): val for name, val in headers.items()}
+
+        timeout = req.timeout if isinstance(req.timeout, (int, float)) else None
+        self.pool.reserve(key, timeout)
+        try:
+            conn = self.pool.acquire(key)
+        except Exception:
+            self.pool.free(key)
+            raise
+
+        reused = conn is not None
+        while True:
+            if conn is None:
+                conn = http_class(host, timeout=req.timeout, **http_conn_args)
+            elif conn.sock is not None:
+                conn.sock.settimeout(req.timeout)
+            conn.timeout = req.timeout
+            conn.response_class = PooledHTTPResponse
+            conn.set_debuglevel(self._debuglevel)
+
+            try:
+                try:
+                    conn.request(req.get_method(), req.selector, req.data, headers,
+                                 encode_chunked=req.has_header('Transfer-encoding'))
+                    response = conn.getresponse()
+                except STALE_ERRORS:
+                    conn.close()
+                    if not reused:
+                        raise
+                    conn = None
+                    reused = False
+                    continue
+                except OSError as err:
+                    raise URLError(err)
+            except Exception:
+                conn.close()
+                self.pool.free(key)
+                raise
+            break
+
+        response.pool = self.pool
+        response.pool_key = key
+        response.pool_conn = conn
+        response.url = req.get_full_url()
+        response.msg = response.reason
+
+        return response
+
+
+class PooledHTTPHandler(PooledHandlerMixin, urllib.request.HTTPHandler):
+    def __init__(self, pool, debuglevel=0):
+        super().__init__(debuglevel=debuglevel)
+        self.pool = pool
+
+
+class PooledHTTPSHandler(PooledHandlerMixin, urllib.request.HTTPSHandler):
+    def __init__(self, pool, debuglevel=0, context=None):
+        super().__init__(debuglevel=debuglevel, context=context)
+        self.pool = pool
+
+
+default_pool = ConnectionPool()
@@ -0,0 +1,160 @@
+import time
+import asyncio
+import threading
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations: a caller takes a token right away
+    (the balance may go negative) and is told how long to wait for it. Nobody
+    sleeps while holding the lock, so it works for threads and asyncio tasks alike.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+
+            if self.tokens >= 0:
+                return 0.0
+
+            return -self.tokens / self.rate
+
+
+class RateLimiter:
+    """
+    Per-host and per-engine request pacing shared by all fetchers.
+
+    Rates are requests per second with a burst size. A host rate also applies to
+    its subdomains unless they have their own entry. Hosts and engines without a
+    configured rate are not throttled.
+    """
+
+    def __init__(self, host_rates=None, engine_rates=None):
+        self.lock = threading.Lock()
+        self.host_rates = {}
+        self.engine_rates = {}
+        self.buckets = {}
+        self.metrics = {}
+
+        for host, rate in (host_rates or {}).items():
+            self.set_host_rate(host, *self.parse_rate(rate))
+
+        for engine, rate in (engine_rates or {}).items():
+            self.set_engine_rate(engine, *self.parse_rate(rate))
+
+    @staticmethod
+    def check_rate(rate):
+        # A bucket refilling at zero (or a negative) rate would never hand out a token
+        if not float(rate) > 0:
+            raise ValueError('rate must be above 0 requests per second, got %r' % rate)
+
+    @staticmethod
+    def parse_rate(rate):
+        if isinstance(rate, (tuple, list)):
+            return rate
+
+        return rate, 1
+
+    def set_host_rate(self, host, rate, burst=1):
+        self.check_rate(rate)
+        with self.lock:
+            self.host_rates[str(host).lower()] = (rate, burst)
+            self.buckets = {k: v for k, v in self.buckets.items() if k[0] != 'host'}
+
+    def set_engine_rate(self, engine, rate, burst=1):
+        self.check_rate(rate)
+        with self.lock:
+            self.engine_rates[engine] = (rate, burst)
+            self.buckets.pop(('engine', engine), None)
+
+    def get_host_key(self, host):
+        if not host or not self.host_rates:
+            return
+
+        labels = str(host).lower().split('.')
+        for i in range(len(labels)):
+            domain = '.'.join(labels[i:])
+            if domain in self.host_rates:
+                return domain
+
+        return
+
+    def get_buckets(self, host=None, engine=None):
+        keys = []
+        host_key = self.get_host_key(host)
+        if host_key:
+            keys.append(('host', host_key))
+        if engine and engine in self.engine_rates:
+            keys.append(('engine', engine))
+
+        if not keys:
+            return []
+
+        buckets = []
+        with self.lock:
+            for key in keys:
+                bucket = self.buckets.get(key)
+                if bucket is None:
+                    rates = self.host_rates if key[0] == 'host' else self.engine_rates
+                    rate, burst = rates[key[1]]
+                    bucket = TokenBucket(rate, burst)
+                    self.buckets[key] = bucket
+                buckets.append((key, bucket))
+
+        return buckets
+
+    def reserve(self, host=None, engine=None):
+        buckets = self.get_buckets(host, engine)
+        if not buckets:
+            return 0.0
+
+        delay = max(bucket.reserve() for _, bucket in buckets)
+        self.record([key for key, _ in buckets], delay)
+
+        return delay
+
+    def wait(self, host=None, engine=None):
+        delay = self.reserve(host, engine)
+        if delay > 0:
+            time.sleep(delay)
+
+        return delay
+
+    async def wait_async(self, host=None, engine=None):
+        delay = self.reserve(host, engine)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        return delay
+
+    def record(self, keys, delay):
+        with self.lock:
+            for key in keys:
+                metric = self.metrics.setdefault('%s:%s' % key, {
+                    'requests': 0,
+                    'delayed': 0,
+                    'wait_total': 0.0,
+                    'wait_max': 0.0,
+                })
+                metric['requests'] += 1
+                if delay > 0:
+                    metric['delayed'] += 1
+                    metric['wait_total'] += delay
+                    metric['wait_max'] = max(metric['wait_max'], delay)
+
+    def stats(self):
+        with self.lock:
+            return {key: dict(metric) for key, metric in self.metrics.items()}
+
+
+default_limiter = RateLimiter()
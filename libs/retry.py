@@ -0,0 +1,39 @@
+import random
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter for retryable fetch errors.
+
+    4xx responses are final except 429. A Retry-After header replaces the computed
+    backoff. budget caps the total time one request may spend waiting between
+    attempts; a retry that would exceed it is not made.
+    """
+
+    def __init__(self, max_retries=3, backoff=0.5, max_backoff=30, jitter=True, budget=60):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.budget = budget
+
+    def get_delay(self, attempt, error, waited=0.0):
+        """Seconds to wait before retry number attempt + 1, or None to give up."""
+        if not getattr(error, 'retryable', False) or attempt >= self.max_retries:
+            return
+
+        if error.retry_after is not None:
+            delay = error.retry_after
+        else:
+            delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+            if self.jitter:
+                delay = random.uniform(0, delay)
+
+        if waited + delay > self.budget:
+            return
+
+        return delay
+
+
+default_retry_policy = RetryPolicy()
+no_retry_policy = RetryPolicy(max_retries=0)
@@ -0,0 +1,113 @@
+import asyncio
+import weakref
+import threading
+
+
+class Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs fn, the
+    others block until it finishes and get the same result (or exception).
+    Nothing is kept once the call returns, so this is not a cache.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.shared = 0
+
+    def do(self, key, fn):
+        """Returns (result, shared); shared is True when another caller did the work."""
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                self.shared += 1
+                leader = False
+            else:
+                call = Call()
+                self.calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.done.set()
+
+        return call.result, False
+
+    def in_flight(self):
+        with self.lock:
+            return len(self.calls)
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines. Calls are kept per event loop, since a future
+    belongs to the loop that created it.
+    """
+
+    def __init__(self):
+        self.loops = weakref.WeakKeyDictionary()
+        self.shared = 0
+
+    async def do(self, key, fn):
+        """Returns (result, shared); shared is True when another caller did the work."""
+        loop = asyncio.get_running_loop()
+        calls = self.loops.setdefault(loop, {})
+
+        while key in calls:
+            future = calls[key]
+            self.shared += 1
+            try:
+                # Shielded, so a cancelled follower leaves the leader running
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled; the next caller in line does the work
+
+        future = calls[key] = loop.create_future()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as err:
+            future.set_exception(err)
+            # Marks the error as seen, there may be no follower to retrieve it
+            future.exception()
+            raise
+        finally:
+            calls.pop(key, None)
+
+        future.set_result(result)
+
+        return result, False
+
+    def in_flight(self):
+        try:
+            return len(self.loops.get(asyncio.get_running_loop()) or {})
+        except RuntimeError:
+            return 0
+
+
+default_flight = SingleFlight()
+default_async_flight = AsyncSingleFlight()
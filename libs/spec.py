@@ -0,0 +1,359 @@
+import os
+import re
+import json
+import threading
+from html import unescape
+from urllib.parse import urljoin, unquote
+from utils.helper import validate_url
+from libs.document import Document
+from libs.embedded_json import find_results
+from libs.strategy import StrategyChain
+
+
+SPEC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'engine', 'specs')
+
+REGEX_FLAGS = {'i': re.I, 'm': re.M, 's': re.S, 'x': re.X}
+
+GOOGLE_CACHE = re.compile(r'(https?://)webcache\.googleusercontent\.[^/]+/search\?q=cache:[^:]+:'
+                          r'(https?://)?(.+?)(\+?(&cd=[^&]+)(&hl=[^&]+)?(&ct=[^&]+)?(&gl=[^&]+)?.*)', re.I)
+
+
+def decode_google_cache(value):
+    cache_link = GOOGLE_CACHE.search(value)
+    if cache_link:
+        return '%s%s' % (cache_link.group(1), cache_link.group(3))
+
+    return value
+
+
+def decode_json_string(value):
+    return value.replace('\\u0026', '&').replace('\\/', '/')
+
+
+DECODERS = {
+    'unquote': unquote,
+    'unescape': unescape,
+    'google_cache': decode_google_cache,
+    'json_string': decode_json_string,
+}
+
+
+def register_decoder(name, func):
+    DECODERS[name] = func
+
+
+def compile_regex(pattern, flags=''):
+    value = 0
+    for flag in flags or '':
+        value |= REGEX_FLAGS[flag]
+
+    return re.compile(pattern, value)
+
+
+def compile_raw_regex(pattern, flags=''):
+    """Bytes twin of compile_regex for scanning undecoded pages; None if pattern is not ASCII."""
+    if not pattern or not pattern.isascii():
+        return
+
+    return compile_regex(pattern.encode('ascii'), flags)
+
+
+class Stage:
+    """
+    One extraction step of a spec section. A stage either decodes the JSON the
+    page embeds in scripts (json: a marker to start after, or true for every
+    script; key and require pick the result objects), walks the parsed tree
+    (xpath, optional class_contains/text filters, attr; text is matched against
+    the element's own text, not its children's) or scans the raw text
+    (regex, optionally narrowed by region and refined by inner), then runs the
+    values through decode, exclude, join and validate. A stage with "when" only
+    runs on pages containing that marker.
+
+    Plain regex stages also get a bytes pattern so they can run on the raw
+    response and decode just the matched values.
+    """
+
+    def __init__(self, config):
+        flags = config.get('flags') or ''
+        self.json = config.get('json')
+        self.key = config.get('key') or 'url'
+        self.require = config.get('require') or []
+        self.xpath = config.get('xpath')
+        self.attr = config.get('attr') or 'href'
+        self.class_contains = config.get('class_contains') or []
+        self.text = compile_regex(config['text'], 'i') if config.get('text') else None
+        self.regex = compile_regex(config['regex'], flags) if config.get('regex') else None
+        self.inner = compile_regex(config['inner'], flags) if config.get('inner') else None
+        self.region = [compile_regex(p, flags) for p in config.get('region') or []]
+        self.exclude = compile_regex(config['exclude'], 'i') if config.get('exclude') else None
+        self.join = config.get('join') or False
+        self.validate = config.get('validate', True)
+        self.keep_going = config.get('continue') or False
+        self.when = config.get('when')
+        self.raw_regex = compile_raw_regex(config.get('regex'), flags)
+        self.raw_inner = compile_raw_regex(config.get('inner'), flags)
+        self.raw = bool(self.raw_regex and not self.region and (self.raw_inner or not self.inner))
+        self.decoders = []
+
+        for decoder in config.get('decode') or []:
+            if isinstance(decoder, dict) and 'sub' in decoder:
+                pattern, repl = decoder['sub']
+                self.decoders.append(self.make_sub(compile_regex(pattern, 'i'), repl))
+            else:
+                self.decoders.append(DECODERS[decoder])
+
+        if not self.json and not self.xpath and not self.regex:
+            raise ValueError('stage needs json, an xpath or a regex')
+
+    @staticmethod
+    def make_sub(pattern, repl):
+        return lambda value: pattern.sub(repl, value)
+
+    @staticmethod
+    def match_value(match):
+        if 'url' in match.re.groupindex:
+            return match.group('url')
+
+        for group in match.groups():
+            if group is not None:
+                return group
+
+        return match.group(0)
+
+    def get_values(self, doc, raw=False):
+        if raw:
+            for match in self.raw_regex.finditer(doc.raw):
+                if self.raw_inner:
+                    match = self.raw_inner.search(match.group(0))
+                    if not match:
+                        continue
+                value = self.match_value(match)
+                yield doc.decode_slice(value) if value else value
+            return
+
+        if self.json:
+            marker = self.json if isinstance(self.json, str) else None
+            for item in find_results(doc.json_payloads(marker), self.key, self.require):
+                yield item['url']
+            return
+
+        if self.xpath:
+            if doc.root is None:
+                return
+
+            if self.xpath == './/a':
+                # Every anchor: answer from the document's anchor index
+                if self.class_contains:
+                    elements = doc.anchors.class_contains(*self.class_contains)
+                else:
+                    elements = doc.anchors
+            else:
+                elements = doc.root.iterfind(self.xpath)
+
+            for element in elements:
+                if self.class_contains and self.xpath != './/a':
+                    _class = element.get('class', '')
+                    if not any(token in _class for token in self.class_contains):
+                        continue
+                if self.text and not self.text.search(element.text or ''):
+                    continue
+                yield element.get(self.attr)
+            return
+
+        text = doc.text
+        if self.region:
+            for pattern in self.region:
+                match = pattern.search(text)
+                if match:
+                    text = match.group(1) if match.groups() else match.group(0)
+                    break
+            else:
+                return
+
+        for match in self.regex.finditer(text):
+            if self.inner:
+                match = self.inner.search(match.group(0))
+                if not match:
+                    continue
+            yield self.match_value(match)
+
+    def run(self, doc, base_url=None, raw=False):
+        result = []
+        if self.when and not doc.contains(self.when):
+            return result
+
+        for value in self.get_values(doc, raw):
+            if not value:
+                continue
+
+            for decoder in self.decoders:
+                value = decoder(value)
+            if self.exclude and self.exclude.search(value):
+                continue
+            if self.join and base_url:
+                value = urljoin(base_url, value)
+            if self.validate:
+                value = validate_url(value)
+
+            if value:
+                result.append(value)
+
+        return result
+
+
+class Spec:
+    """
+    Compiled extraction rules for one engine, loaded from engine/specs/<name>.json.
+
+    Each section (links, next_page) is an ordered list of stages; stages are
+    tried in order and the first one that yields anything ends the section
+    unless it sets "continue". A run of "continue" stages and the stage after
+    them form one group, and groups are tried through a StrategyChain, so the
+    group that last produced results goes first. stop_if patterns mark pages
+    (captchas, "no results") that yield nothing at all.
+
+    Pages fetched as raw bytes are run on the bytes while the stages allow it;
+    the page is decoded (and the section rerun on text) only when a stage that
+    could apply needs the text or tree.
+    """
+
+    def __init__(self, config):
+        self.name = config.get('name')
+        self.stop_if = [compile_regex(p, 'i') for p in config.get('stop_if') or []]
+        self.raw_stop_if = [compile_raw_regex(p, 'i') for p in config.get('stop_if') or []]
+        self.sections = {}
+        self.chains = {}
+        for section in ('links', 'next_page'):
+            groups = []
+            group = []
+            for stage in config.get(section) or []:
+                group.append(Stage(stage))
+                if not group[-1].keep_going:
+                    groups.append(group)
+                    group = []
+            if group:
+                groups.append(group)
+
+            self.sections[section] = groups
+            chain = StrategyChain('%s.%s' % (self.name, section))
+            for index in range(len(groups)):
+                chain.add(index)
+            self.chains[section] = chain
+
+    def run(self, section, html, base_url=None):
+        result = []
+        if not html:
+            return result
+
+        doc = Document.wrap(html)
+        if doc.can_scan_raw():
+            raw_result = self.run_raw(section, doc, base_url)
+            if raw_result is not None:
+                return raw_result
+
+        for pattern in self.stop_if:
+            if pattern.search(doc.text):
+                return result
+
+        groups = self.sections.get(section)
+        if not groups:
+            return result
+
+        chain = self.chains[section]
+        for index in chain.order():
+            for stage in groups[index]:
+                result.extend(stage.run(doc, base_url))
+            chain.record(index, bool(result))
+            if result:
+                break
+
+        return list(dict.fromkeys(result))
+
+    def run_raw(self, section, doc, base_url=None):
+        """Section result from the raw bytes, or None when the decoded page is needed."""
+        if not all(self.raw_stop_if):
+            return
+
+        for pattern in self.raw_stop_if:
+            if pattern.search(doc.raw):
+                return []
+
+        result = []
+        tried = []
+        groups = self.sections.get(section) or []
+        chain = self.chains[section]
+        for index in chain.order():
+            for stage in groups[index]:
+                if stage.when and not doc.contains(stage.when):
+                    continue
+                if not stage.raw:
+                    return
+
+                result.extend(stage.run(doc, base_url, raw=True))
+            tried.append(index)
+            if result:
+                break
+
+        # Nothing here needed the decoded page, so an empty result is final too
+        for index in tried:
+            chain.record(index, bool(result) and index == tried[-1])
+
+        return list(dict.fromkeys(result))
+
+    def get_links(self, html, base_url=None):
+        return self.run('links', html, base_url)
+
+    def get_next_page(self, html, base_url=None):
+        result = self.run('next_page', html, base_url)
+
+        return result[0] if result else ''
+
+
+class SpecRegistry:
+    """Compiled specs by name; a spec file is recompiled when its mtime changes."""
+
+    def __init__(self, spec_dir=SPEC_DIR):
+        self.spec_dir = spec_dir
+        self.lock = threading.Lock()
+        self.specs = {}
+
+    def get(self, name):
+        spec_file = os.path.join(self.spec_dir, '%s.json' % name)
+        try:
+            mtime = os.stat(spec_file).st_mtime
+        except OSError as err:
+            cached = self.specs.get(name)
+            if cached:
+                return cached[1]
+            raise err
+
+        cached = self.specs.get(name)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        with self.lock:
+            cached = self.specs.get(name)
+            if cached and cached[0] == mtime:
+                return cached[1]
+
+            try:
+                with open(spec_file, 'r', encoding='utf-8') as f:
+                    spec = Spec(json.load(f))
+            except (ValueError, KeyError, re.error) as err:
+                if not cached:
+                    raise
+                # Keep serving the last good rules while the file is being edited
+                print('spec %s: %s' % (name, err))
+                self.specs[name] = (mtime, cached[1])
+                return cached[1]
+
+            self.specs[name] = (mtime, spec)
+
+            return spec
+
+
+default_registry = SpecRegistry()
+
+
+def get_spec(name):
+    return default_registry.get(name)
@@ -0,0 +1,92 @@
+import threading
+
+
+class StrategyChain:
+    """
+    Ordered fallback strategies for one extraction step (e.g. "MetaGer.links").
+
+    The strategy that last produced something is tried first and the rest keep
+    their declared order, so after a layout change only the first page pays for
+    the strategies that stopped working. Strategies are declared most precise
+    first, so a promoted fallback is only trusted for recheck runs: every
+    recheck-th run goes through the declared order again and a more precise
+    strategy that works again wins its place back. Hits and misses are
+    counted per strategy; see stats().
+    """
+
+    def __init__(self, name, strategies=None, recheck=5):
+        self.name = name
+        self.recheck = recheck
+        self.lock = threading.Lock()
+        self.names = []
+        self.funcs = {}
+        self.hits = {}
+        self.misses = {}
+        self.last = None
+        self.promoted_runs = 0
+
+        for strategy_name, func in strategies or []:
+            self.add(strategy_name, func)
+
+        default_chains[name] = self
+
+    def add(self, name, func=None):
+        with self.lock:
+            if name not in self.funcs:
+                self.names.append(name)
+                self.hits[name] = 0
+                self.misses[name] = 0
+            self.funcs[name] = func
+
+    def order(self):
+        with self.lock:
+            last = self.last
+            if last is None or last == self.names[0]:
+                return list(self.names)
+
+            self.promoted_runs += 1
+            if self.recheck and self.promoted_runs % self.recheck == 0:
+                return list(self.names)
+
+        return [last] + [name for name in self.names if name != last]
+
+    def record(self, name, found):
+        with self.lock:
+            if found:
+                self.hits[name] += 1
+                if name != self.last:
+                    self.last = name
+                    self.promoted_runs = 0
+            else:
+                self.misses[name] += 1
+
+    def run(self, *args, **kwargs):
+        """Result of the first strategy returning something truthy, or the last empty result."""
+        result = None
+        for name in self.order():
+            result = self.funcs[name](*args, **kwargs)
+            self.record(name, bool(result))
+            if result:
+                break
+
+        return result
+
+    def reset(self):
+        with self.lock:
+            self.last = None
+            self.promoted_runs = 0
+            for name in self.names:
+                self.hits[name] = 0
+                self.misses[name] = 0
+
+    def stats(self):
+        with self.lock:
+            return {name: {'hits': self.hits[name], 'misses': self.misses[name]} for name in self.names}
+
+
+default_chains = {}
+
+
+def get_stats():
+    """Hit/miss counters of every chain, keyed by chain name."""
+    return {name: chain.stats() for name, chain in default_chains.items()}
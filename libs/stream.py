@@ -0,0 +1,75 @@
+import codecs
+from utils.helper import CHARSET_SNIFF_SIZE, get_content_type_charset, get_bom_charset, get_meta_charset
+
+
+class ParserFeed:
+    """
+    Decodes response chunks as they arrive and feeds the text to a parser, so
+    parsing overlaps the download.
+
+    The charset comes from the Content-Type header, or else the BOM / <meta>
+    in the first CHARSET_SNIFF_SIZE bytes (falling back to UTF-8). If the body
+    turns out not to decode with it, feeding stops and failed is set; the
+    caller then decodes and parses the complete body the usual way.
+    """
+
+    def __init__(self, parser, content_type=None):
+        self.parser = parser
+        self.charset = get_content_type_charset(content_type)
+        self.decoder = None
+        self.head = []
+        self.head_size = 0
+        self.failed = False
+        self.stopped = False
+
+    def start(self, head):
+        charset = self.charset or get_bom_charset(head) or get_meta_charset(head) or 'utf-8'
+        self.decoder = codecs.getincrementaldecoder(charset)('strict')
+
+    def feed(self, data):
+        """Returns True once the parser needs no more input."""
+        if self.failed or not data:
+            return False
+
+        if self.decoder is None:
+            self.head.append(data)
+            self.head_size += len(data)
+            if not self.charset and self.head_size < CHARSET_SNIFF_SIZE:
+                return False
+
+            data = b''.join(self.head)
+            self.head = []
+            self.start(data)
+
+        return self.feed_text(data)
+
+    def feed_text(self, data, final=False):
+        try:
+            text = self.decoder.decode(data, final)
+        except UnicodeDecodeError:
+            self.failed = True
+            return False
+
+        if text:
+            self.parser.feed(text)
+        self.stopped = bool(self.parser.done)
+
+        return self.stopped
+
+    def close(self):
+        """Finishes the parse; returns the parser's root, or None if the stream could not be decoded."""
+        if not self.failed and not self.stopped:
+            if self.decoder is None:
+                data = b''.join(self.head)
+                self.head = []
+                self.start(data)
+                self.feed_text(data, final=True)
+            else:
+                self.feed_text(b'', final=True)
+
+        if self.failed:
+            return
+
+        self.parser.close()
+
+        return self.parser.root
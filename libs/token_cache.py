@@ -0,0 +1,58 @@
+import copy
+import time
+import threading
+
+
+class TokenCache:
+    """
+    Per-engine cache of query tokens scraped from an engine homepage (form action,
+    hidden inputs, session ids). Entries expire after ttl seconds and engines drop
+    them as soon as a search built from them comes back empty.
+    """
+
+    def __init__(self, ttl=1800):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def get(self, engine):
+        with self.lock:
+            entry = self.entries.get(engine)
+            if not entry:
+                return
+
+            tokens, expires = entry
+            if expires < time.monotonic():
+                del self.entries[engine]
+                return
+
+        return copy.deepcopy(tokens)
+
+    def set(self, engine, tokens, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if not ttl:
+            return
+
+        with self.lock:
+            self.entries[engine] = (copy.deepcopy(tokens), time.monotonic() + ttl)
+
+    def invalidate(self, engine):
+        with self.lock:
+            self.entries.pop(engine, None)
+
+    def invalidate_on_empty(self, engine, value):
+        """
+        Drops the tokens of engine when value (a search URL, first page or its
+        links, all built from those tokens) is empty, and returns value.
+        """
+        if engine and not value:
+            self.invalidate(engine)
+
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+default_token_cache = TokenCache()
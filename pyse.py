@@ -1,9 +1,17 @@
 import os
 import sys
+import asyncio
 import argparse
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from logging import DEBUG
 from utils.helper import setup_logger
+from libs.pool import default_pool
+from libs.cache import ResponseCache, set_default_cache
+from libs.canonical import canonicalize_url, get_dedup_key
+from libs.ratelimit import default_limiter
+from libs.blocklist import default_blocklist
+from libs.strategy import get_stats as get_strategy_stats
 from engine.aol import Aol
 from engine.ask import Ask
 from engine.bing import Bing
@@ -33,8 +41,12 @@ def save_links(links, filename='results.txt'):
         with open(filename, 'r') as f:
             current_links = f.read().splitlines()
 
+    # Links already saved by other engines in another spelling are skipped
+    current_keys = {get_dedup_key(link) for link in current_links}
     for link in links:
-        if link not in current_links:
+        key = get_dedup_key(link)
+        if key not in current_keys:
+            link = canonicalize_url(link)
             with open(filename, 'a', encoding='utf-8', errors='replace') as f:
                 try:
                     f.write('%s\n' % link)
@@ -43,7 +55,7 @@ def save_links(links, filename='results.txt'):
                 except Exception as err:
                     logger.error(err)
 
-            current_links.append(link)
+            current_keys.add(key)
 
 
 def engine_tasks(engine, keyword, output=None):
@@ -54,7 +66,30 @@ def engine_tasks(engine, keyword, output=None):
         save_links(links)
 
 
-def engine_start(keyword, output=None, debug_mode=False, searxng_host=None, searxng_key=None):
+async def engine_tasks_async(engine, keyword, output=None):
+    if getattr(engine, 'async_pages', False):
+        links = await engine.search_async(keyword)
+    else:
+        links = await asyncio.to_thread(engine.search, keyword)
+
+    if output:
+        save_links(links, output)
+    else:
+        save_links(links)
+
+
+async def engine_gather(engines, keyword, output=None):
+    # Token lookups and blocking engines run in threads; one per engine so none waits
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=len(engines)))
+
+    results = await asyncio.gather(*[engine_tasks_async(engine, keyword, output) for engine in engines],
+                                   return_exceptions=True)
+    for engine, error in zip(engines, results):
+        if isinstance(error, Exception):
+            logger.error('%s: %s' % (engine.__class__.__name__, error))
+
+
+def engine_start(keyword, output=None, debug_mode=False, searxng_host=None, searxng_key=None, use_threads=False):
     logger.info('Start search with keyword: %s' % keyword)
 
     engines = [
@@ -78,9 +113,13 @@ def engine_start(keyword, output=None, debug_mode=False, searxng_host=None, sear
 
     threads = []
 
-    for engine in engines:
-        t = threading.Thread(target=engine_tasks, args=(engine, keyword, output))
-        threads.append(t)
+    if use_threads:
+        for engine in engines:
+            t = threading.Thread(target=engine_tasks, args=(engine, keyword, output))
+            threads.append(t)
+    else:
+        # Result pages of all engines are fetched concurrently on one event loop
+        asyncio.run(engine_gather(engines, keyword, output))
 
     if threads:
         for thread in threads:
@@ -89,6 +128,33 @@ def engine_start(keyword, output=None, debug_mode=False, searxng_host=None, sear
         for thread in threads:
             thread.join()
 
+    if debug_mode:
+        for key, metric in default_limiter.stats().items():
+            logger.debug('[RATE] %s requests=%d delayed=%d wait=%.2fs max=%.2fs' % (
+                key, metric['requests'], metric['delayed'], metric['wait_total'], metric['wait_max']))
+        for chain, strategies in get_strategy_stats().items():
+            for name, metric in strategies.items():
+                if metric['hits'] or metric['misses']:
+                    logger.debug('[STRATEGY] %s %s hits=%d misses=%d' % (chain, name, metric['hits'], metric['misses']))
+
+
+def rate_arg(value):
+    """argparse type of --host-rate and --engine-rate: NAME=RATE[:BURST]."""
+    name, _, spec = value.partition('=')
+    rate, _, burst = spec.partition(':')
+    try:
+        rate, burst = float(rate), int(burst or 1)
+    except ValueError:
+        rate = None
+
+    if not name or rate is None:
+        raise argparse.ArgumentTypeError('invalid rate %r, expected NAME=RATE[:BURST]' % value)
+
+    if not rate > 0:
+        raise argparse.ArgumentTypeError('invalid rate %r, RATE must be above 0 requests per second' % value)
+
+    return name, rate, burst
+
 
 def main():
     parser = argparse.ArgumentParser(usage='%(prog)s [options]')
@@ -121,6 +187,57 @@ def main():
                         default='',
                         help='API key for private SearXNG host (X-API-Key header)',
                         action='store')
+    parser.add_argument('--no-keep-alive',
+                        dest='no_keep_alive',
+                        help='Open a new connection for every request',
+                        action='store_true')
+    parser.add_argument('--threads',
+                        dest='use_threads',
+                        help='Run every engine in its own thread with the blocking client',
+                        action='store_true')
+    parser.add_argument('--cache-dir',
+                        dest='cache_dir',
+                        default='',
+                        help='Cache search pages in this directory',
+                        action='store')
+    parser.add_argument('--cache-ttl',
+                        dest='cache_ttl',
+                        default=3600,
+                        type=int,
+                        help='Seconds a cached page stays valid (default 3600)',
+                        action='store')
+    parser.add_argument('--cache-engine-ttl',
+                        dest='cache_engine_ttl',
+                        default=[],
+                        metavar='ENGINE=SECONDS',
+                        help='Per-engine cache TTL, e.g. Google=600 (repeatable)',
+                        action='append')
+    parser.add_argument('--cache-size',
+                        dest='cache_size',
+                        default=256,
+                        type=int,
+                        help='Cache size limit in MB (default 256)',
+                        action='store')
+    parser.add_argument('--host-rate',
+                        dest='host_rates',
+                        default=[],
+                        metavar='HOST=RATE[:BURST]',
+                        type=rate_arg,
+                        help='Max requests per second to a host and its subdomains (repeatable)',
+                        action='append')
+    parser.add_argument('--engine-rate',
+                        dest='engine_rates',
+                        default=[],
+                        metavar='ENGINE=RATE[:BURST]',
+                        type=rate_arg,
+                        help='Max requests per second for an engine, e.g. Google=0.5:2 (repeatable)',
+                        action='append')
+    parser.add_argument('--blocklist',
+                        dest='blocklists',
+                        default=[],
+                        metavar='FILE',
+                        help='Skip domains / URL prefixes listed in FILE, reloaded when it changes (repeatable)',
+                        action='append')
 
     args = parser.parse_args()
 
@@ -131,13 +248,43 @@ def main():
     if args.debug_mode:
         logger.setLevel(DEBUG)
 
+    if args.no_keep_alive:
+        default_pool.enabled = False
+
+    for host, rate, burst in args.host_rates:
+        default_limiter.set_host_rate(host, rate, burst)
+
+    for engine, rate, burst in args.engine_rates:
+        default_limiter.set_engine_rate(engine, rate, burst)
+
+    for blocklist_file in args.blocklists:
+        if not (os.path.exists(blocklist_file) and os.path.isfile(blocklist_file)):
+            sys.exit('Blocklist not found: %s' % blocklist_file)
+        try:
+            default_blocklist.add(blocklist_file)
+        except (OSError, ValueError) as err:
+            sys.exit('Blocklist %s: %s' % (blocklist_file, err))
+
+    if args.cache_dir:
+        engine_ttl = {}
+        for item in args.cache_engine_ttl:
+            name, _, ttl = item.partition('=')
+            if name and ttl.isdigit():
+                engine_ttl[name] = int(ttl)
+
+        set_default_cache(ResponseCache(cache_dir=args.cache_dir,
+                                        max_bytes=args.cache_size * 1024 * 1024,
+                                        ttl=args.cache_ttl,
+                                        engine_ttl=engine_ttl))
+
     searxng_host = args.searxng_host
     searxng_key = args.searxng_key
 
     if args.keyword:
         engine_start(keyword=args.keyword, output=args.output_file,
                      debug_mode=args.debug_mode,
-                     searxng_host=searxng_host, searxng_key=searxng_key)
+                     searxng_host=searxng_host, searxng_key=searxng_key,
+                     use_threads=args.use_threads)
     elif args.keyword_list:
         if os.path.exists(args.keyword_list) and os.path.isfile(args.keyword_list):
             with open(args.keyword_list, 'r') as fp:
@@ -145,7 +292,8 @@ def main():
                 for line in lines:
                     engine_start(keyword=line, output=args.output_file,
                                  debug_mode=args.debug_mode,
-                                 searxng_host=searxng_host, searxng_key=searxng_key)
+                                 searxng_host=searxng_host, searxng_key=searxng_key,
+                                 use_threads=args.use_threads)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,46 @@
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class LocalHandler(BaseHTTPRequestHandler):
+    """Answers every GET with body and records the client port of each request."""
+
+    protocol_version = 'HTTP/1.1'
+    body = b'hello'
+
+    def do_GET(self):
+        self.server.ports.append(self.client_address[1])
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalServer:
+    """HTTP server on a free localhost port, run in a background thread."""
+
+    def __init__(self, handler=LocalHandler):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.ports = []
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d/' % self.httpd.server_address[1]
+
+    @property
+    def ports(self):
+        return self.httpd.ports
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,49 @@
+import unittest
+from array import array
+from libs.anchors import AnchorIndex
+from libs.html_parser import NativeHTMLParser
+
+
+HTML = '''<html><body>
+<div id="results">
+  <div class="result"><a class="result-link title" href="https://example.com/1">First <b>hit</b></a></div>
+  <div class="result"><a class="result-link" href="https://example.com/2">Second</a></div>
+</div>
+<div id="pager"><a class="next-page" href="/page/2">Next</a></div>
+</body></html>'''
+
+
+def build(html):
+    parser = NativeHTMLParser()
+    parser.feed(html)
+    parser.close()
+
+    return AnchorIndex(parser.root)
+
+
+class AnchorIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = build(HTML)
+
+    def hrefs(self, elements):
+        return [a.get('href') for a in elements]
+
+    def test_lookups(self):
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.hrefs(self.index.with_class('result-link')),
+                         ['https://example.com/1', 'https://example.com/2'])
+        self.assertEqual(self.hrefs(self.index.class_contains('next', 'title')),
+                         ['https://example.com/1', '/page/2'])
+        self.assertEqual(self.hrefs(self.index.class_contains('link title')), ['https://example.com/1'])
+        self.assertEqual(self.hrefs(self.index.inside('pager')), ['/page/2'])
+        self.assertEqual(self.hrefs(self.index.text_matches(r'first hit')), ['https://example.com/1'])
+
+    def test_compact_columns(self):
+        self.assertIsInstance(self.index.depths, array)
+        self.assertIsInstance(self.index.by_class['result-link'], array)
+        self.assertIsInstance(self.index.by_ancestor['results'], array)
+        self.assertIs(self.index.classes[1], build(HTML).classes[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
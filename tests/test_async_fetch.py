@@ -0,0 +1,195 @@
+import gzip
+import asyncio
+import tempfile
+import unittest
+from libs.async_fetch import AsyncFetchRequest
+from libs.cache import ResponseCache
+from libs.cookie import CookieStore
+from libs.errors import FetchTimeout
+from libs.retry import no_retry_policy
+
+
+class RecordingFetch(AsyncFetchRequest):
+    """Keeps every stream it opens so the test can check they were closed."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.streams = []
+
+    async def connect(self, request):
+        stream = await super().connect(request)
+        self.streams.append(stream)
+        return stream
+
+
+class AsyncFetchTest(unittest.TestCase):
+    def setUp(self):
+        self.cookie_dir = tempfile.TemporaryDirectory()
+        self.cookie_store = CookieStore(self.cookie_dir.name)
+
+    def tearDown(self):
+        self.cookie_store.close()
+        self.cookie_dir.cleanup()
+
+    def test_closes_stream_when_body_stalls(self):
+        async def stalled(reader, writer):
+            await reader.readuntil(b'\r\n\r\n')
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 100\r\n\r\npartial')
+            await writer.drain()
+            await asyncio.sleep(5)
+            writer.close()
+
+        async def run():
+            server = await asyncio.start_server(stalled, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            fetch = RecordingFetch(timeout=0.3, cookie_store=self.cookie_store,
+                                   retry_policy=no_retry_policy, raise_errors=True)
+            try:
+                with self.assertRaises(FetchTimeout):
+                    await fetch.get('http://127.0.0.1:%d/' % port)
+            finally:
+                server.close()
+
+            self.assertEqual(len(fetch.streams), 1)
+            self.assertTrue(fetch.streams[0][1].is_closing())
+            self.assertFalse(fetch.connections)
+
+        asyncio.run(run())
+
+    def test_decodes_chunked_gzip(self):
+        body = b'<html>' + b'result ' * 5000 + b'</html>'
+        data = gzip.compress(body)
+
+        async def chunked(reader, writer):
+            await reader.readuntil(b'\r\n\r\n')
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n'
+                         b'Content-Encoding: gzip\r\nTransfer-Encoding: chunked\r\n\r\n')
+            for i in range(0, len(data), 100):
+                chunk = data[i:i + 100]
+                writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            writer.write(b'0\r\n\r\n')
+            await writer.drain()
+            writer.close()
+
+        async def run():
+            server = await asyncio.start_server(chunked, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            fetch = AsyncFetchRequest(cookie_store=self.cookie_store, keep_alive=False,
+                                      retry_policy=no_retry_policy, raise_errors=True)
+            try:
+                html = await fetch.get('http://127.0.0.1:%d/' % port)
+            finally:
+                server.close()
+
+            self.assertEqual(html, body.decode())
+            self.assertEqual(fetch.last_transfer['compressed'], len(data))
+            self.assertEqual(fetch.last_transfer['uncompressed'], len(body))
+
+        asyncio.run(run())
+
+
+class AsyncLimitsTest(unittest.TestCase):
+    """Per-host connection limit, per-loop state, coalescing and caching."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cookie_store = CookieStore(self.tmp.name)
+        self.requests = []
+        self.open = 0
+        self.max_open = 0
+
+    def tearDown(self):
+        self.cookie_store.close()
+        self.tmp.cleanup()
+
+    async def slow(self, reader, writer):
+        self.open += 1
+        self.max_open = max(self.max_open, self.open)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break
+                self.requests.append(head.split(b' ', 2)[1])
+                await asyncio.sleep(0.05)
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nContent-Length: 2\r\n\r\nok')
+                await writer.drain()
+        finally:
+            self.open -= 1
+            writer.close()
+
+    def fetcher(self, **kwargs):
+        return AsyncFetchRequest(cookie_store=self.cookie_store, retry_policy=no_retry_policy,
+                                 raise_errors=True, **kwargs)
+
+    def serve(self, fetch, fn, close=True):
+        async def run():
+            server = await asyncio.start_server(self.slow, '127.0.0.1', 0)
+            try:
+                await fn('http://127.0.0.1:%d/' % server.sockets[0].getsockname()[1])
+            finally:
+                if close:
+                    await fetch.close()
+                # Lets the handlers see the closed connections before the loop goes
+                await asyncio.sleep(0.01)
+                server.close()
+
+        asyncio.run(run())
+
+    def test_limits_open_connections_per_host(self):
+        fetch = self.fetcher(max_per_host=2, keep_alive=False)
+
+        async def run(url):
+            pages = await fetch.get_many(['%s%d' % (url, i) for i in range(6)])
+            self.assertEqual(pages, ['ok'] * 6)
+
+        self.serve(fetch, run)
+        self.assertEqual(len(self.requests), 6)
+        self.assertEqual(self.max_open, 2)
+
+    def test_reused_across_event_loops(self):
+        fetch = self.fetcher()
+
+        async def run(url):
+            # The stream left idle by the previous loop is not handed out here
+            self.assertFalse(fetch.connections)
+            self.assertEqual(await fetch.get(url), 'ok')
+            self.assertTrue(fetch.connections)
+
+        self.serve(fetch, run, close=False)
+        self.serve(fetch, run)
+        self.assertEqual(len(self.requests), 2)
+
+    def test_coalesces_identical_gets(self):
+        fetch = self.fetcher()
+
+        async def run(url):
+            pages = await fetch.get_many([url] * 3)
+            self.assertEqual(pages, ['ok'] * 3)
+
+        self.serve(fetch, run)
+        self.assertEqual(self.requests, [b'/'])
+
+    def test_pending_pages_are_cached_once_kept(self):
+        cache = ResponseCache(cache_dir=self.tmp.name + '/cache')
+        fetch = self.fetcher(cache=cache)
+
+        async def run(url):
+            await fetch.get_document(url + 'a', store=False)
+            fetch.keep_pending(False)
+            await fetch.get_document(url + 'b', store=False)
+            fetch.keep_pending(True)
+            for page in ('a', 'b'):
+                doc = await fetch.get_document(url + page)
+                self.assertEqual(doc.text, 'ok')
+
+        try:
+            self.serve(fetch, run)
+        finally:
+            cache.db.close()
+        self.assertEqual(self.requests, [b'/a', b'/b', b'/a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
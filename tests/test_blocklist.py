@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from libs.blocklist import Blocklist, compile_blocklist, normalize_entry
+
+
+ENTRIES = '''# comment
+0.0.0.0 tracker.example.net
+*.ads.example.org
+https://example.com/ads
+example.com/promo/
+Shop.Example.COM.
+'''
+
+
+class BlocklistTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'block.txt')
+        self.write(ENTRIES)
+        self.blocklist = Blocklist(self.path, check_interval=0)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, text, mtime=None):
+        with open(self.path, 'w') as f:
+            f.write(text)
+        if mtime:
+            os.utime(self.path, ns=(mtime, mtime))
+
+    def test_normalize_entry(self):
+        self.assertEqual(normalize_entry('0.0.0.0 Tracker.Example.NET # ads'), 'tracker.example.net')
+        self.assertEqual(normalize_entry('https://example.com/Ads/'), 'example.com/Ads/')
+        self.assertIsNone(normalize_entry('   # only a comment'))
+
+    def test_domains_and_subdomains(self):
+        is_blocked = self.blocklist.is_blocked
+        self.assertTrue(is_blocked('tracker.example.net'))
+        self.assertTrue(is_blocked('cdn.tracker.example.net'))
+        self.assertTrue(is_blocked('x.ads.example.org'))
+        self.assertTrue(is_blocked('shop.example.com'))
+        self.assertFalse(is_blocked('badtracker.example.net'))
+        self.assertFalse(is_blocked('example.net'))
+
+    def test_prefix_boundaries(self):
+        is_blocked = self.blocklist.is_blocked
+        self.assertTrue(is_blocked('example.com', '/ads'))
+        self.assertTrue(is_blocked('example.com', '/ads/'))
+        self.assertTrue(is_blocked('example.com', '/ads/banner.js'))
+        self.assertFalse(is_blocked('example.com', '/adsense'))
+        self.assertFalse(is_blocked('example.com', '/downloads/ads'))
+        self.assertTrue(is_blocked('example.com', '/promo/spring'))
+        self.assertFalse(is_blocked('example.com', '/promotions'))
+        self.assertFalse(is_blocked('example.com', '/'))
+        self.assertFalse(is_blocked('www.example.com', '/ads'))
+
+    def test_reloads_changed_source(self):
+        self.assertFalse(self.blocklist.is_blocked('new.example'))
+        self.write('new.example\n', mtime=os.stat(self.path).st_mtime_ns + 10 ** 9)
+        self.assertTrue(self.blocklist.is_blocked('new.example'))
+        self.assertFalse(self.blocklist.is_blocked('tracker.example.net'))
+
+    def test_external_sort_matches_in_memory(self):
+        lines = ['host%d.example\nexample.org/p%d/\nhost%d.example\n' % (i % 37, i, i % 37) for i in range(200)]
+        self.write(''.join(lines))
+        whole = os.path.join(self.tmp_dir.name, 'whole.sorted')
+        chunked = os.path.join(self.tmp_dir.name, 'chunked.sorted')
+        compile_blocklist(self.path, whole)
+        compile_blocklist(self.path, chunked, chunk_size=16)
+
+        with open(whole, 'rb') as f:
+            expected = f.read()
+        with open(chunked, 'rb') as f:
+            self.assertEqual(f.read(), expected)
+
+        header, *entries = expected.splitlines()
+        self.assertEqual(int(header.split()[2]), 200)
+        self.assertEqual(len(entries), 237)
+        self.assertEqual(entries, sorted(set(entries)))
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)),
+                         ['block.txt', 'block.txt.sorted', 'chunked.sorted', 'whole.sorted'])
+
+
+if __name__ == '__main__':
+    unittest.main()
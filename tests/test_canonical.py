@@ -0,0 +1,44 @@
+import unittest
+from libs.canonical import UrlCanonicalizer
+
+
+class UrlCanonicalizerTest(unittest.TestCase):
+    def setUp(self):
+        self.canonicalizer = UrlCanonicalizer()
+
+    def test_canonical_form(self):
+        canonicalize = self.canonicalizer.canonicalize
+        self.assertEqual(canonicalize('HTTP://WWW.Example.COM:80/a%7eb/%2f?b=2&utm_source=x&a=1#top'),
+                         'http://www.example.com/a~b/%2F?a=1&b=2')
+        self.assertEqual(canonicalize('https://example.com:8443'), 'https://example.com:8443/')
+        self.assertEqual(canonicalize('https://bücher.example/straße'),
+                         'https://xn--bcher-kva.example/stra%C3%9Fe')
+        self.assertEqual(canonicalize('https://example.com/?fbclid=1&GCLID=2'), 'https://example.com/')
+
+    def test_keys_ignore_scheme_www_and_trailing_slash(self):
+        get_key = self.canonicalizer.get_key
+        self.assertEqual(get_key('http://www.example.com/a/'), 'example.com/a')
+        self.assertEqual(get_key('https://example.com/a'), 'example.com/a')
+        self.assertEqual(get_key('https://example.com/?b=1&a=2'), 'example.com/?a=2&b=1')
+        self.assertNotEqual(get_key('https://example.com/a'), get_key('https://example.com/A'))
+        self.assertNotEqual(get_key('https://example.com/a?x=1'), get_key('https://example.com/a'))
+
+    def test_rules_can_be_turned_off(self):
+        strict = UrlCanonicalizer(ignore_scheme=False, ignore_www=False, ignore_trailing_slash=False,
+                                  drop_fragment=False, sort_query=False, strip_params=[])
+        self.assertEqual(strict.get_key('http://www.example.com/a/?b=1&utm_x=2#f'),
+                         'http://www.example.com/a/?b=1&utm_x=2#f')
+        self.assertNotEqual(strict.get_key('http://example.com/a'), strict.get_key('https://example.com/a'))
+
+    def test_unparsable_urls_are_their_own_key(self):
+        self.assertEqual(self.canonicalizer.get('not a url'), ('not a url', 'not a url'))
+        self.assertEqual(self.canonicalizer.get('http://[::1'), ('http://[::1', 'http://[::1'))
+
+    def test_unique_keeps_first_spelling_order(self):
+        links = ['https://www.example.com/a/', 'http://example.com/a', 'https://example.org/',
+                 'https://example.com/a?utm_medium=x']
+        self.assertEqual(self.canonicalizer.unique(links), ['https://www.example.com/a/', 'https://example.org/'])
+
+
+if __name__ == '__main__':
+    unittest.main()
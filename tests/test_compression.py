@@ -0,0 +1,37 @@
+import gzip
+import zlib
+import unittest
+from libs.compression import StreamDecoder
+
+
+def feed(decoder, data, size):
+    return b''.join(decoder.decompress(data[i:i + size]) for i in range(0, len(data), size)) + decoder.flush()
+
+
+class StreamDecoderTest(unittest.TestCase):
+    def test_multi_member_gzip(self):
+        data = gzip.compress(b'first ') + gzip.compress(b'second ') + gzip.compress(b'third')
+        for size in (1, 7, len(data)):
+            self.assertEqual(feed(StreamDecoder('gzip'), data, size), b'first second third')
+
+    def test_deflate_zlib_and_raw(self):
+        body = b'deflated body ' * 100
+        raw = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        raw_data = raw.compress(body) + raw.flush()
+        self.assertEqual(feed(StreamDecoder('deflate'), zlib.compress(body), 16), body)
+        self.assertEqual(feed(StreamDecoder('deflate'), raw_data, 16), body)
+
+    def test_stacked_codings(self):
+        body = b'stacked'
+        data = gzip.compress(zlib.compress(body))
+        self.assertEqual(feed(StreamDecoder('deflate, gzip'), data, 5), body)
+
+    def test_identity_and_unknown(self):
+        self.assertEqual(feed(StreamDecoder(None), b'plain', 2), b'plain')
+        self.assertEqual(feed(StreamDecoder('Identity'), b'plain', 2), b'plain')
+        with self.assertRaises(ValueError):
+            StreamDecoder('compress')
+
+
+if __name__ == '__main__':
+    unittest.main()
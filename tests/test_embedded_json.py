@@ -0,0 +1,35 @@
+import unittest
+from engine.ecosia import Ecosia
+from libs.embedded_json import iter_payloads, find_results
+
+
+STATE = ('<script id="__NEXT_DATA__" type="application/json">'
+         '{"props":{"results":[{"url":"https://example.com/a","title":"A","description":"d"},'
+         '{"url":"https://tracker.example.org/","name":"t"}]}}</script>')
+CONFIG = '<script>var cfg = {"url": "https://cdn.example.net/app.js", "title": "app"};</script>'
+
+
+class EmbeddedJsonTest(unittest.TestCase):
+    def test_payloads_with_and_without_marker(self):
+        html = CONFIG + STATE
+        self.assertEqual(len(list(iter_payloads(html))), 2)
+        payloads = list(iter_payloads(html, '__NEXT_DATA__'))
+        self.assertEqual(len(payloads), 1)
+        self.assertIn('props', payloads[0])
+
+    def test_require_with_alternatives(self):
+        payloads = list(iter_payloads(CONFIG + STATE))
+        self.assertEqual(len(find_results(payloads)), 3)
+        self.assertEqual(find_results(payloads, require=('title', ('snippet', 'description'))),
+                         [{'url': 'https://example.com/a', 'title': 'A'}])
+
+    def test_engine_falls_through_to_dom(self):
+        dom = '<body><a class="result__link" href="https://dom.example.com/">d</a></body>'
+        self.assertEqual(Ecosia.get_links('<html><head>%s%s</head>%s</html>' % (CONFIG, STATE, dom)),
+                         ['https://example.com/a'])
+        self.assertEqual(Ecosia.get_links('<html><head>%s</head>%s</html>' % (CONFIG, dom)),
+                         ['https://dom.example.com/'])
+
+
+if __name__ == '__main__':
+    unittest.main()
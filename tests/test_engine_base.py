@@ -0,0 +1,119 @@
+import asyncio
+import unittest
+from engine.base import SearchEngine
+from libs.document import Document
+from libs.token_cache import default_token_cache
+
+
+class PageFetch:
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+        self.kept = []
+        self.last_error = None
+
+    def get_document(self, url, headers=None, store=True):
+        self.fetched.append((url, headers['Referer']))
+        html = self.pages.get(url)
+        if html is None:
+            self.last_error = 'HTTP Error 429'
+            return
+
+        return Document(html, url=url)
+
+    def keep_pending(self, keep=True):
+        self.kept.append(keep)
+
+
+class AsyncPageFetch(PageFetch):
+    async def get_document(self, url, headers=None, store=True):
+        await asyncio.sleep(0)
+        return super().get_document(url, headers=headers, store=store)
+
+
+class PagedEngine(SearchEngine):
+    name = 'Paged'
+    token_key = 'Paged'
+    base_url = 'https://paged.test'
+    no_results = 'Nothing found'
+
+    def __init__(self, pages):
+        self.fetch = PageFetch(pages)
+        self.parsed = []
+
+    def get_search_url(self, keyword):
+        return '%s/1' % self.base_url
+
+    def get_links(self, doc):
+        self.parsed.append(doc)
+        return [a.get('href') for a in doc.root.findall('.//a[@class="r"]')]
+
+    def get_next_page(self, doc):
+        self.parsed.append(doc)
+        found = doc.root.find('.//a[@class="next"]')
+        return found.get('href') if found is not None else ''
+
+
+def page(links, next_page=''):
+    html = ''.join('<a class="r" href="%s">r</a>' % link for link in links)
+    if next_page:
+        html += '<a class="next" href="%s">next</a>' % next_page
+    return '<html><body>%s</body></html>' % html
+
+
+class SearchEngineTest(unittest.TestCase):
+    def tearDown(self):
+        default_token_cache.clear()
+
+    def test_pages_share_one_document_and_links_are_deduplicated(self):
+        engine = PagedEngine({
+            'https://paged.test/1': page(['https://a.test/', 'https://b.test/'], 'https://paged.test/2'),
+            'https://paged.test/2': page(['https://A.test', 'https://c.test/x']),
+        })
+
+        self.assertEqual(engine.search('kw'), ['https://a.test/', 'https://b.test/', 'https://c.test/x'])
+        self.assertEqual(engine.fetch.fetched, [('https://paged.test/1', 'https://paged.test'),
+                                                ('https://paged.test/2', 'https://paged.test/1')])
+        self.assertEqual(engine.fetch.kept, [True, True])
+        self.assertIs(engine.parsed[0], engine.parsed[1])
+
+    def test_async_run_matches_blocking_run(self):
+        pages = {
+            'https://paged.test/1': page(['https://a.test/'], 'https://paged.test/2'),
+            'https://paged.test/2': page(['https://b.test/']),
+        }
+        engine = PagedEngine(pages)
+        fetch = AsyncPageFetch(pages)
+
+        links = asyncio.run(engine.search_run_async('https://paged.test/1', fetch))
+        self.assertEqual(links, engine.search('kw'))
+        self.assertEqual(fetch.fetched, engine.fetch.fetched)
+        self.assertEqual(fetch.kept, [True, True])
+
+    def test_stops_on_a_page_pointing_to_itself(self):
+        engine = PagedEngine({'https://paged.test/1': page(['https://a.test/'], 'https://paged.test/1')})
+
+        self.assertEqual(engine.search('kw'), ['https://a.test/'])
+        self.assertEqual(len(engine.fetch.fetched), 1)
+
+    def test_blocked_or_empty_first_page_drops_tokens(self):
+        default_token_cache.set('Paged', {'action': '/search'})
+        self.assertEqual(PagedEngine({}).search('kw'), [])
+        self.assertIsNone(default_token_cache.get('Paged'))
+
+        default_token_cache.set('Paged', {'action': '/search'})
+        engine = PagedEngine({'https://paged.test/1': page([])})
+        self.assertEqual(engine.search('kw'), [])
+        self.assertEqual(engine.fetch.kept, [False])
+        self.assertIsNone(default_token_cache.get('Paged'))
+
+    def test_no_results_page_ends_the_search(self):
+        engine = PagedEngine({'https://paged.test/1': '<p>Nothing found</p>' + page([], 'https://paged.test/2')})
+
+        self.assertEqual(engine.search('kw'), [])
+        self.assertEqual(engine.fetch.kept, [False])
+        self.assertEqual(len(engine.fetch.fetched), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
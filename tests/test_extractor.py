@@ -0,0 +1,53 @@
+import unittest
+from libs.extractor import Selector, SelectorExtractor, extract
+
+
+class SelectorExtractorTest(unittest.TestCase):
+    def test_attrs_classes_and_text(self):
+        html = '<div><a class="r big" href="/1">One <b>two</b></a><a class="big" href="/2">x</a><a href="/3"></a></div>'
+        results = extract(html, {
+            'links': Selector('a', classes='r'),
+            'hrefs': Selector('a', attrs={'href': None}),
+        })
+        self.assertEqual([(m.get('href'), m.text) for m in results['links']], [('/1', 'One two')])
+        self.assertEqual([m.get('href') for m in results['hrefs']], ['/1', '/2', '/3'])
+
+    def test_ancestor_scope(self):
+        html = '<a href="/out"></a><nav class="pager"><span><a href="/2">2</a></span></nav><a href="/after"></a>'
+        results = extract(html, {
+            'pages': Selector('a', ancestor=Selector('nav', classes='pager')),
+        })
+        self.assertEqual([m.get('href') for m in results['pages']], ['/2'])
+
+    def test_implied_end_tags(self):
+        html = '<ul class="res"><li><a href="/1">one<li><a href="/2">two</ul><a href="/outside">out</a>'
+        results = extract(html, {
+            'items': Selector('li'),
+            'links': Selector('a', ancestor=Selector('ul', classes='res')),
+        })
+        self.assertEqual([m.text for m in results['items']], ['one', 'two'])
+        self.assertEqual([m.get('href') for m in results['links']], ['/1', '/2'])
+
+    def test_block_closes_paragraph(self):
+        html = '<p class="s">snippet<div><a href="/x">x</a></div>'
+        results = extract(html, {
+            'snippets': Selector('p', classes='s'),
+            'inside': Selector('a', ancestor=Selector('p')),
+        })
+        self.assertEqual(results['snippets'][0].text, 'snippet')
+        self.assertEqual(results['inside'], [])
+
+    def test_table_cells(self):
+        results = extract('<table><tr><td>a<td>b<tr><td>c</table>', {'cells': Selector('td')})
+        self.assertEqual([m.text for m in results['cells']], ['a', 'b', 'c'])
+
+    def test_stop_after(self):
+        html = '<div id="results"><a href="/1">1</a></div><a href="/late">late</a>'
+        extractor = SelectorExtractor({'links': Selector('a')}, stop_after=[Selector('div', {'id': 'results'})])
+        extractor.feed(html)
+        self.assertTrue(extractor.done)
+        self.assertEqual([m.get('href') for m in extractor.close()['links']], ['/1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
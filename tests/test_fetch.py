@@ -0,0 +1,58 @@
+import tempfile
+import unittest
+from libs.cache import ResponseCache
+from libs.cookie import CookieStore
+from libs.fetch import FetchRequest
+from libs.pool import ConnectionPool
+from tests.local_server import LocalServer
+
+
+class FetchCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cookie_store = CookieStore('%s/cookie' % self.tmp_dir.name)
+        self.cache = ResponseCache('%s/cache' % self.tmp_dir.name)
+        self.pool = ConnectionPool()
+        self.fetch = FetchRequest(cookie_store=self.cookie_store, cache=self.cache, pool=self.pool)
+
+    def tearDown(self):
+        self.pool.clear()
+        self.cookie_store.close()
+        self.cache.db.close()
+        self.tmp_dir.cleanup()
+
+    def is_cached(self, url):
+        return self.cache.get(self.cache.get_key('GET', url)) is not None
+
+    def test_stores_by_default(self):
+        with LocalServer() as server:
+            self.assertEqual(self.fetch.get(server.url), 'hello')
+            self.assertTrue(self.is_cached(server.url))
+            self.assertEqual(self.fetch.get(server.url), 'hello')
+            self.assertEqual(len(server.ports), 1)
+
+    def test_deferred_store_is_dropped(self):
+        with LocalServer() as server:
+            self.assertEqual(self.fetch.get(server.url, store=False), 'hello')
+            self.assertFalse(self.is_cached(server.url))
+            self.fetch.keep_pending(False)
+            self.fetch.keep_pending()
+            self.assertFalse(self.is_cached(server.url))
+
+    def test_deferred_store_is_kept(self):
+        with LocalServer() as server:
+            self.fetch.get_parsed(server.url, store=False)
+            self.fetch.keep_pending()
+            self.assertTrue(self.is_cached(server.url))
+
+    def test_cache_bypass(self):
+        with LocalServer() as server:
+            self.fetch.get(server.url)
+            self.assertEqual(self.fetch.get(server.url, cache=False), 'hello')
+            self.assertEqual(len(server.ports), 2)
+            self.fetch.keep_pending()
+            self.assertFalse(self.fetch.pending)
+
+
+if __name__ == '__main__':
+    unittest.main()
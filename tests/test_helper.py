@@ -0,0 +1,44 @@
+import codecs
+import unittest
+from utils.helper import decode_bytes, host_charsets
+
+
+class DecodeBytesTest(unittest.TestCase):
+    def tearDown(self):
+        host_charsets.pop('charset.test', None)
+
+    def test_header_before_meta(self):
+        body = '<meta charset="utf-8">café'.encode('latin-1')
+        self.assertEqual(decode_bytes(body, 'text/html; charset=ISO-8859-1'),
+                         ('<meta charset="utf-8">café', 'iso8859-1'))
+
+    def test_undecodable_header_falls_back_to_meta(self):
+        body = '<meta charset="windows-1251">привет'.encode('cp1251')
+        text, charset = decode_bytes(body, 'text/html; charset=utf-8')
+        self.assertEqual(charset, 'cp1251')
+        self.assertTrue(text.endswith('привет'))
+
+    def test_bom_before_meta(self):
+        body = codecs.BOM_UTF8 + '<meta charset="iso-8859-1">café'.encode('utf-8')
+        self.assertEqual(decode_bytes(body), ('<meta charset="iso-8859-1">café', 'utf-8-sig'))
+
+    def test_meta_utf16_means_utf8(self):
+        body = '<meta charset="utf-16">naïve'.encode('utf-8')
+        self.assertEqual(decode_bytes(body)[1], 'utf-8')
+
+    def test_ascii_and_utf8(self):
+        self.assertEqual(decode_bytes(b'plain'), ('plain', 'ascii'))
+        self.assertEqual(decode_bytes('żółw'.encode('utf-8')), ('żółw', 'utf-8'))
+
+    def test_host_charset_after_utf8(self):
+        decode_bytes('<meta charset="koi8-r">мир'.encode('koi8-r'), host='charset.test')
+        self.assertEqual(host_charsets['charset.test'], 'koi8-r')
+
+        # Valid UTF-8 still wins over what the host used before
+        self.assertEqual(decode_bytes('мир'.encode('utf-8'), host='charset.test'), ('мир', 'utf-8'))
+        host_charsets['charset.test'] = 'koi8-r'
+        self.assertEqual(decode_bytes('мир'.encode('koi8-r'), host='charset.test'), ('мир', 'koi8-r'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import urllib.request
+from urllib.error import URLError
+from libs.pool import ConnectionPool, PooledHTTPHandler
+from tests.local_server import LocalServer, LocalHandler
+
+
+class TrustingPool(ConnectionPool):
+    """Hands out idle connections without the liveness probe, as if the server closed them unseen."""
+
+    @staticmethod
+    def is_alive(conn):
+        return conn.sock is not None
+
+
+class ClosingHandler(LocalHandler):
+    """Promises keep-alive but drops the socket after every response."""
+
+    def do_GET(self):
+        super().do_GET()
+        self.close_connection = True
+
+
+def fetch(opener, url):
+    response = opener.open(url, timeout=5)
+    try:
+        return response.read()
+    finally:
+        response.close()
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def test_reuses_connection(self):
+        pool = ConnectionPool()
+        opener = urllib.request.build_opener(PooledHTTPHandler(pool))
+        with LocalServer() as server:
+            self.assertEqual(fetch(opener, server.url), b'hello')
+            self.assertEqual(fetch(opener, server.url), b'hello')
+            self.assertEqual(len(server.ports), 2)
+            self.assertEqual(len(set(server.ports)), 1)
+        pool.clear()
+
+    def test_retries_stale_connection(self):
+        pool = TrustingPool()
+        opener = urllib.request.build_opener(PooledHTTPHandler(pool))
+        with LocalServer(ClosingHandler) as server:
+            self.assertEqual(fetch(opener, server.url), b'hello')
+            self.assertEqual(len(pool.connections[('http', server.url[7:-1])]), 1)
+            self.assertEqual(fetch(opener, server.url), b'hello')
+            self.assertEqual(len(set(server.ports)), 2)
+        pool.clear()
+
+    def test_limits_active_connections(self):
+        pool = ConnectionPool(max_per_host=1)
+        opener = urllib.request.build_opener(PooledHTTPHandler(pool))
+        with LocalServer() as server:
+            key = ('http', server.url[7:-1])
+            response = opener.open(server.url, timeout=5)
+            with self.assertRaises(URLError):
+                pool.reserve(key, timeout=0.1)
+
+            response.read()
+            response.close()
+            pool.reserve(key, timeout=0.1)
+            pool.free(key)
+        pool.clear()
+
+    def test_evicts_expired_idle_connections(self):
+        pool = ConnectionPool(idle_timeout=0)
+        opener = urllib.request.build_opener(PooledHTTPHandler(pool))
+        with LocalServer() as server:
+            fetch(opener, server.url)
+            self.assertTrue(pool.connections)
+            pool.acquire(('http', 'other'))
+            self.assertFalse(pool.connections)
+        pool.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
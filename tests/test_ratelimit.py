@@ -0,0 +1,78 @@
+import argparse
+import unittest
+from unittest import mock
+from libs.ratelimit import TokenBucket, RateLimiter
+from pyse import rate_arg
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch('libs.ratelimit.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_queue(self):
+        bucket = TokenBucket(rate=2, burst=2)
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0.0, 0.0, 0.5, 1.0])
+
+    def test_refill_is_capped_at_burst(self):
+        bucket = TokenBucket(rate=1, burst=2)
+        bucket.reserve()
+        bucket.reserve()
+        self.clock.now += 60
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 1.0])
+
+    def test_reservations_are_paid_back(self):
+        bucket = TokenBucket(rate=1)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertEqual(bucket.reserve(), 1.0)
+        self.clock.now += 1.5
+        self.assertEqual(bucket.reserve(), 0.5)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_host_rate_covers_subdomains(self):
+        limiter = RateLimiter(host_rates={'example.com': 1, 'api.example.com': (5, 5)})
+        self.assertEqual(limiter.get_host_key('www.example.com'), 'example.com')
+        self.assertEqual(limiter.get_host_key('v1.api.example.com'), 'api.example.com')
+        self.assertIsNone(limiter.get_host_key('example.org'))
+
+    def test_unconfigured_is_not_throttled(self):
+        limiter = RateLimiter(engine_rates={'Bing': 1})
+        self.assertEqual([limiter.reserve('example.org', 'Google') for _ in range(3)], [0.0] * 3)
+        self.assertEqual(limiter.reserve('example.org', 'Bing'), 0.0)
+        self.assertGreater(limiter.reserve('example.org', 'Bing'), 0.0)
+        self.assertEqual(limiter.stats()['engine:Bing']['delayed'], 1)
+
+    def test_rejects_rates_that_never_refill(self):
+        limiter = RateLimiter()
+        for rate in (0, -1, float('nan')):
+            with self.assertRaises(ValueError):
+                limiter.set_host_rate('example.com', rate)
+            with self.assertRaises(ValueError):
+                limiter.set_engine_rate('Bing', rate)
+        with self.assertRaises(ValueError):
+            RateLimiter(engine_rates={'Bing': (0, 2)})
+        self.assertFalse(limiter.host_rates or limiter.engine_rates)
+
+
+class RateArgTest(unittest.TestCase):
+    def test_parses_and_rejects_rate_arguments(self):
+        self.assertEqual(rate_arg('Google=0.5:2'), ('Google', 0.5, 2))
+        self.assertEqual(rate_arg('example.com=3'), ('example.com', 3.0, 1))
+        for value in ('Google=0', 'Google=-1:2', 'Google=nan', 'Google', '=1', 'Google=fast', 'Google=1:x'):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                rate_arg(value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import email.utils
+import time
+import unittest
+from libs.errors import error_from_status, parse_retry_after, ClientError, RateLimited, ServerError
+from libs.retry import RetryPolicy
+
+
+class RetryAfterTest(unittest.TestCase):
+    def test_parse_seconds_and_date(self):
+        self.assertEqual(parse_retry_after('120'), 120.0)
+        self.assertEqual(parse_retry_after(' 7 '), 7.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+        later = email.utils.formatdate(time.time() + 30, usegmt=True)
+        self.assertAlmostEqual(parse_retry_after(later), 30, delta=2)
+        earlier = email.utils.formatdate(time.time() - 30, usegmt=True)
+        self.assertEqual(parse_retry_after(earlier), 0.0)
+
+    def test_status_classes(self):
+        self.assertIsInstance(error_from_status(429, headers={'Retry-After': '3'}), RateLimited)
+        self.assertIsInstance(error_from_status(503, headers={}), ServerError)
+        self.assertIsInstance(error_from_status(404), ClientError)
+        self.assertEqual(error_from_status(429, headers={'Retry-After': '3'}).retry_after, 3.0)
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_retry_after_replaces_backoff(self):
+        policy = RetryPolicy(backoff=0.5, jitter=False)
+        error = error_from_status(503, headers={'Retry-After': '4'})
+        self.assertEqual(policy.get_delay(0, error), 4.0)
+        self.assertEqual(policy.get_delay(2, error), 4.0)
+
+    def test_exponential_backoff(self):
+        policy = RetryPolicy(max_retries=5, backoff=0.5, max_backoff=3, jitter=False)
+        error = error_from_status(500, headers={})
+        self.assertEqual([policy.get_delay(i, error) for i in range(5)], [0.5, 1.0, 2.0, 3, 3])
+        self.assertIsNone(policy.get_delay(5, error))
+
+    def test_jitter_stays_below_backoff(self):
+        policy = RetryPolicy(backoff=1)
+        error = error_from_status(500, headers={})
+        for _ in range(50):
+            self.assertTrue(0 <= policy.get_delay(2, error) <= 4)
+
+    def test_final_errors_and_budget(self):
+        policy = RetryPolicy(jitter=False, budget=10)
+        self.assertIsNone(policy.get_delay(0, error_from_status(404, headers={})))
+        self.assertIsNone(policy.get_delay(0, ValueError('not a fetch error')))
+
+        error = error_from_status(429, headers={'Retry-After': '6'})
+        self.assertEqual(policy.get_delay(0, error, waited=4), 6.0)
+        self.assertIsNone(policy.get_delay(1, error, waited=6))
+
+
+if __name__ == '__main__':
+    unittest.main()
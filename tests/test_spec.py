@@ -0,0 +1,28 @@
+import unittest
+from engine.startpage import Startpage
+from libs.document import Document
+
+
+PAGE = '''<html><body>
+<div class="result"><a class="result-title result-link" href="https://nextjs.org/">Next.js by Vercel</a></div>
+<div class="result"><a class="result-link" href="https://nextjs.org/docs"><h2>Next Steps</h2></a></div>
+%s
+</body></html>'''
+
+
+class StartpageNextPageTest(unittest.TestCase):
+    def test_result_titles_are_not_the_pager(self):
+        doc = Document(PAGE % '')
+        self.assertEqual(Startpage().get_next_page(doc), '')
+
+    def test_pager_link(self):
+        doc = Document(PAGE % '<form class="pagination"><a href="/do/search?page=2">Next &#8250;</a></form>')
+        self.assertEqual(Startpage().get_next_page(doc), 'https://www.startpage.com/do/search?page=2')
+
+    def test_next_url_from_page_data(self):
+        doc = Document(PAGE % '<script>{"label": "Next", "url": "/do/search?page=3"}</script>')
+        self.assertEqual(Startpage().get_next_page(doc), 'https://www.startpage.com/do/search?page=3')
+
+
+if __name__ == '__main__':
+    unittest.main()
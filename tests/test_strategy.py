@@ -0,0 +1,48 @@
+import unittest
+from libs.strategy import StrategyChain, default_chains
+
+
+class StrategyChainTest(unittest.TestCase):
+    def setUp(self):
+        self.precise = []
+        self.calls = []
+        self.chain = StrategyChain('Test.links', [
+            ('precise', self.strategy('precise', lambda: self.precise)),
+            ('broad', self.strategy('broad', lambda: ['broad'])),
+        ], recheck=3)
+        self.addCleanup(default_chains.pop, 'Test.links')
+
+    def strategy(self, name, result):
+        def run():
+            self.calls.append(name)
+            return result()
+        return run
+
+    def test_winner_is_tried_first(self):
+        self.assertEqual(self.chain.run(), ['broad'])
+        self.calls.clear()
+        self.assertEqual(self.chain.run(), ['broad'])
+        self.assertEqual(self.calls, ['broad'])
+        self.assertEqual(self.chain.stats()['precise'], {'hits': 0, 'misses': 1})
+
+    def test_promoted_fallback_is_rechecked(self):
+        self.chain.run()
+        self.precise = ['precise']
+        self.calls.clear()
+
+        self.assertEqual([self.chain.run() for _ in range(3)], [['broad'], ['broad'], ['precise']])
+        self.assertEqual(self.calls, ['broad', 'broad', 'precise'])
+        self.assertEqual(self.chain.order(), ['precise', 'broad'])
+
+    def test_recheck_keeps_fallback_while_precise_misses(self):
+        self.chain.run()
+        self.calls.clear()
+
+        for _ in range(6):
+            self.assertEqual(self.chain.run(), ['broad'])
+        self.assertEqual(self.calls.count('precise'), 2)
+        self.assertEqual(self.chain.last, 'broad')
+
+
+if __name__ == '__main__':
+    unittest.main()
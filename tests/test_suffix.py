@@ -0,0 +1,45 @@
+import unittest
+import utils.suffix
+from utils.suffix import SuffixTrie, set_default_trie, split_domain, public_suffix, registrable_domain
+
+
+RULES = ['com', 'uk', 'co.uk', 'jp', '*.kobe.jp', '!city.kobe.jp', '*.ck', '!www.ck', '// comment', '']
+
+
+class SuffixTrieTest(unittest.TestCase):
+    def setUp(self):
+        self.previous = utils.suffix.default_trie
+        set_default_trie(SuffixTrie(RULES))
+
+    def tearDown(self):
+        set_default_trie(self.previous)
+
+    def test_rules_are_counted(self):
+        self.assertEqual(SuffixTrie(RULES).size, 8)
+
+    def test_plain_rules(self):
+        self.assertEqual(split_domain('www.example.co.uk'), ('co.uk', 'example.co.uk'))
+        self.assertEqual(split_domain('example.com'), ('com', 'example.com'))
+        self.assertEqual(split_domain('co.uk'), ('co.uk', None))
+
+    def test_wildcard_rules(self):
+        self.assertEqual(split_domain('a.b.kobe.jp'), ('b.kobe.jp', 'a.b.kobe.jp'))
+        self.assertEqual(split_domain('b.kobe.jp'), ('b.kobe.jp', None))
+        self.assertEqual(public_suffix('x.y.ck'), 'y.ck')
+
+    def test_exception_rules(self):
+        self.assertEqual(split_domain('city.kobe.jp'), ('kobe.jp', 'city.kobe.jp'))
+        self.assertEqual(split_domain('www.city.kobe.jp'), ('kobe.jp', 'city.kobe.jp'))
+        self.assertEqual(registrable_domain('www.ck'), 'www.ck')
+
+    def test_unlisted_tld_and_odd_hosts(self):
+        self.assertEqual(split_domain('shop.example.zzz'), ('zzz', 'example.zzz'))
+        self.assertEqual(split_domain('WWW.Example.COM.'), ('com', 'example.com'))
+        self.assertEqual(split_domain('example.com:8080'), ('com', 'example.com'))
+        self.assertEqual(split_domain('192.168.0.1'), (None, None))
+        self.assertEqual(split_domain('bad..com'), (None, None))
+        self.assertEqual(split_domain(''), (None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from engine.aol import Aol
+from engine.lycos import Lycos
+from libs.token_cache import TokenCache, default_token_cache
+
+
+HOMEPAGE = '''<html><body>
+<form id="header-form" action="https://search.aol.com/aol/search">
+<input type="hidden" name="s_it" value="sb-home"><input name="q">
+</form></body></html>'''
+
+
+class TokenCacheTest(unittest.TestCase):
+    def test_entries_are_copies_and_expire(self):
+        cache = TokenCache(ttl=60)
+        tokens = {'action': '/search', 'inputs': {}}
+        cache.set('Engine', tokens)
+        tokens['inputs']['x'] = '1'
+        self.assertEqual(cache.get('Engine'), {'action': '/search', 'inputs': {}})
+
+        cache.set('Engine', tokens, ttl=-1)
+        self.assertIsNone(cache.get('Engine'))
+        cache.set('Engine', tokens, ttl=0)
+        self.assertIsNone(cache.get('Engine'))
+
+    def test_invalidate_on_empty(self):
+        cache = TokenCache(ttl=60)
+        cache.set('Engine', {'action': '/search'})
+        self.assertEqual(cache.invalidate_on_empty('Engine', ['https://a.test/']), ['https://a.test/'])
+        self.assertIsNotNone(cache.get('Engine'))
+        self.assertEqual(cache.invalidate_on_empty(None, []), [])
+        self.assertEqual(cache.invalidate_on_empty('Engine', ''), '')
+        self.assertIsNone(cache.get('Engine'))
+
+
+class EngineTokensTest(unittest.TestCase):
+    def tearDown(self):
+        default_token_cache.clear()
+
+    def test_caches_only_usable_tokens(self):
+        aol = Aol()
+        tokens = aol.get_query_tokens('<html><body><p>consent</p></body></html>')
+        self.assertEqual(tokens['action'], '')
+        self.assertIsNone(default_token_cache.get('Aol'))
+
+        tokens = aol.get_query_tokens(HOMEPAGE)
+        self.assertEqual(tokens, {'action': 'https://search.aol.com/aol/search', 'inputs': {'s_it': 'sb-home'}})
+        self.assertEqual(default_token_cache.get('Aol'), tokens)
+
+    def test_lycos_needs_keyvol(self):
+        Lycos().get_query_tokens('<html><body><form id="form_query" action="/web/"></form></body></html>')
+        self.assertIsNone(default_token_cache.get('Lycos'))
+
+    def test_unusable_cached_tokens_are_dropped(self):
+        default_token_cache.set('Aol', {'action': '', 'inputs': {}})
+        self.assertEqual(Aol().search('test'), [])
+        self.assertIsNone(default_token_cache.get('Aol'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
-import re
-from utils.static import domain_tlds
-from utils.helper import split_url
+from functools import lru_cache
+from utils.helper import TLDS, split_url
+from utils.suffix import registrable_domain
+from libs.blocklist import default_blocklist
 
 
 DOMAIN_COMPANY_NAME = [
@@ -38,17 +39,58 @@ DOMAIN_BLACKLIST = [
 ]
 
 
+# Built once: blacklisted domains (matched with any subdomain) and the
+# company rule as label sets, e.g. google.<tld>, google.com.<tld>, google.co.<tld>
+BLACKLIST_SUFFIXES = frozenset(DOMAIN_BLACKLIST)
+COMPANY_NAMES = frozenset(DOMAIN_COMPANY_NAME)
+COMPANY_SECOND_LEVELS = frozenset(['com', 'co'])
+COMPANY_TLDS = TLDS
+
+
+def is_company_domain(labels):
+    """
+    True if labels end in <company>[.com|.co].<tld> or <company>go.<tld>, or
+    the registrable domain is <company> under any public suffix (google.org.uk).
+    """
+    if len(labels) < 2 or labels[-1] not in COMPANY_TLDS:
+        return False
+
+    name = labels[-2]
+    if name in COMPANY_NAMES or (name.endswith('go') and name[:-2] in COMPANY_NAMES):
+        return True
+
+    if len(labels) > 2 and name in COMPANY_SECOND_LEVELS and labels[-3] in COMPANY_NAMES:
+        return True
+
+    site = registrable_domain('.'.join(labels))
+
+    return bool(site) and site.split('.', 1)[0] in COMPANY_NAMES
+
+
+@lru_cache(maxsize=65536)
+def is_blacklisted_domain(domain):
+    domain = domain.lower()
+    labels = domain.split('.')
+
+    # The domain itself, then every suffix after a dot
+    suffix = domain
+    for label in labels:
+        if suffix in BLACKLIST_SUFFIXES:
+            return True
+        suffix = suffix[len(label) + 1:]
+
+    return is_company_domain(labels)
+
+
 def is_blacklisted(url):
     spliturl = split_url(url)
     domain = spliturl.get('domain')
     if domain:
-        rdomain = r'^(.*\.)?(%s)$' % '|'.join([re.escape(d) for d in DOMAIN_BLACKLIST])
-        if re.search(rdomain, domain, re.I):
+        if is_blacklisted_domain(domain):
             return True
 
-        dcompany = '(%s)(\\.com?|go)?\\.(%s)' % ('|'.join(DOMAIN_COMPANY_NAME), '|'.join(domain_tlds))
-        rcompany = r'^(.*\.)?%s$' % dcompany
-        if re.search(rcompany, domain, re.I):
-            return True
+        # External lists loaded with --blocklist
+        if default_blocklist:
+            return default_blocklist.is_blocked(domain, spliturl.get('path'))
 
     return False
@@ -1,7 +1,12 @@
 import os
 import re
+import codecs
 import random
 import logging
+import threading
+from html import unescape
+from functools import lru_cache
+from collections import namedtuple
 from utils.static import list_charset, domain_tlds, user_agent_list
 
 
@@ -85,22 +90,117 @@ def validate_path(path, isdir=False):
     return
 
 
-def decode_bytes(val):
-    decoded = ''
-    charset = ''
+# Longest BOMs first so UTF-32 LE is not mistaken for UTF-16 LE
+CHARSET_BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+CHARSET_SNIFF_SIZE = 4096
+RE_CONTENT_TYPE_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+# Matches both <meta charset="..."> and <meta http-equiv="Content-Type" content="...; charset=...">
+RE_META_CHARSET = re.compile(rb'<meta[^>]+?charset\s*=\s*["\']?([\w.:-]+)', re.I)
+
+host_charsets = {}
+host_charsets_lock = threading.Lock()
+
+
+def lookup_charset(charset):
+    if not charset:
+        return
+
+    if isinstance(charset, bytes):
+        charset = charset.decode('ascii', 'ignore')
+
+    try:
+        return codecs.lookup(charset.strip()).name
+    except LookupError:
+        return
+
+
+def get_content_type_charset(content_type):
+    if not content_type:
+        return
+
+    match = RE_CONTENT_TYPE_CHARSET.search(str(content_type))
+    if match:
+        return lookup_charset(match.group(1))
+
+    return
+
+
+def get_bom_charset(val):
+    for bom, charset in CHARSET_BOMS:
+        if val.startswith(bom):
+            return charset
+
+    return
+
+
+def get_meta_charset(val):
+    match = RE_META_CHARSET.search(val, 0, CHARSET_SNIFF_SIZE)
+    if match:
+        charset = lookup_charset(match.group(1))
+        # A <meta> that could be read as ASCII cannot really be UTF-16/32
+        if charset and charset.startswith(('utf-16', 'utf-32')):
+            return 'utf-8'
+        return charset
+
+    return
+
+
+def try_decode(val, charset):
+    try:
+        return val.decode(charset)
+    except (UnicodeDecodeError, LookupError):
+        return
 
-    for _charset in list_charset:
-        charset = _charset
-        try:
-            decoded = val.decode(charset)
-            break
-        except UnicodeDecodeError:
-            pass
-        except LookupError:
-            pass
 
-    if decoded and charset:
-        return decoded, charset
+def remember_charset(host, charset):
+    if host and charset:
+        with host_charsets_lock:
+            host_charsets[host] = charset
+
+
+def decode_bytes(val, content_type=None, host=None):
+    """
+    Decode a page body. Declared charsets are tried first (Content-Type header,
+    BOM, <meta> in the first few KB), then UTF-8, then the charset last seen for
+    the same host; the codec list in utils.static is only the last resort.
+    """
+    declared = [
+        get_content_type_charset(content_type),
+        get_bom_charset(val),
+        get_meta_charset(val),
+    ]
+    for charset in declared:
+        if charset:
+            decoded = try_decode(val, charset)
+            if decoded is not None:
+                remember_charset(host, charset)
+                return decoded, charset
+
+    if val.isascii():
+        return val.decode('ascii'), 'ascii'
+
+    decoded = try_decode(val, 'utf-8')
+    if decoded is not None:
+        remember_charset(host, 'utf-8')
+        return decoded, 'utf-8'
+
+    charset = host_charsets.get(host) if host else None
+    if charset:
+        decoded = try_decode(val, charset)
+        if decoded is not None:
+            return decoded, charset
+
+    for charset in list_charset:
+        decoded = try_decode(val, charset)
+        if decoded is not None:
+            remember_charset(host, charset)
+            return decoded, charset
 
     charset = 'utf-8'
     decoded = val.decode(charset, 'replace')
@@ -115,19 +215,18 @@ def validate_url(url=None, allow_fragments=False):
     if not spliturl.get('url'):
         return
 
-    domain = spliturl.get('domain')
-
-    ip_addr = validate_domain_ip(domain)
-    if ip_addr:
-        return spliturl.get('url')
-
-    valid_domain = validate_domain(domain)
-    if valid_domain:
+    if is_valid_host(spliturl.get('domain')):
         return spliturl.get('url')
 
     return
 
 
+@lru_cache(maxsize=8192)
+def is_valid_host(domain):
+    """A public IP address or a domain under a known TLD (port allowed)."""
+    return bool(validate_domain_ip(domain) or validate_domain(domain))
+
+
 def validate_domain_ip(ip_addr, include_local=False):
     port = ''
 
@@ -155,6 +254,10 @@ def validate_domain_ip(ip_addr, include_local=False):
     return ip_addr
 
 
+TLDS = frozenset(domain_tlds)
+RE_DOMAIN_LABEL = re.compile(r'^[a-z0-9](([a-z0-9-]+)?([a-z0-9]+))?$', re.I)
+
+
 def validate_domain(domain: str):
     port = ''
 
@@ -174,11 +277,11 @@ def validate_domain(domain: str):
     if len(domain_split) < 2:
         return
 
-    if domain_split[-1] not in domain_tlds:
+    if domain_split[-1] not in TLDS:
         return
 
     for d in domain_split:
-        if not d or not re.match(r'^[a-z0-9](([a-z0-9-]+)?([a-z0-9]+))?$', d, re.I):
+        if not d or not RE_DOMAIN_LABEL.match(d):
             return
 
     domain = '.'.join(domain_split)
@@ -219,78 +322,76 @@ def is_local_ip(ip):
     return False
 
 
+RE_URL_WITH_SCHEME = re.compile(r'^[a-z]+://[^/?]+.*?$', re.I)
+RE_URL_LEADING_SLASHES = re.compile(r'^:?//')
+RE_URL_PATH = re.compile(r'(?<![:/])/+')
+RE_URL_SCHEME_DOMAIN = re.compile(r'^([a-z]+)://([^/?]+)', re.I)
+RE_SLASHES = re.compile(r'/+')
+
+
+class SplitUrl(namedtuple('SplitUrl', ['scheme', 'domain', 'path', 'query', 'fragment', 'url'])):
+    """Read-only result of split_url(); parts missing from the URL are None."""
+    __slots__ = ()
+
+    def get(self, name, default=None):
+        value = getattr(self, name) if name in self._fields else None
+
+        return default if value is None else value
+
+    def __bool__(self):
+        return any(value is not None for value in self)
+
+
+EMPTY_SPLIT_URL = SplitUrl(None, None, None, None, None, None)
+
+
 def split_url(url, allow_fragments=True):
-    result = {}
     if not url:
-        return result
-
-    url = str(url)
-    if not re.match(r'^[a-z]+://[^/?]+.*?$', url, re.I):
-        url = re.sub(r'^:?//', '', url)
-        url = 'http://%s' % url
-
-    url = unescape_url(url)
-
-    split_fragment = re.split(r'#', url, 1)
-    if len(split_fragment) > 1:
-        result.update({'fragment': split_fragment[1]})
-        url = split_fragment[0]
-
-    split_query = re.split(r'\?', url, 1)
-    if len(split_query) > 1:
-        result.update({'query': split_query[1]})
-        url = split_query[0]
-
-    split_path = re.split(r'(?<![:/])/+', url, 1)
-    if len(split_path) > 1:
-        result.update({'path': '/%s' % re.sub(r'[/]+', '/', split_path[1])})
-        url = split_path[0]
-
-    split_domain = re.split(r'^([a-z]+)://([^/?]+)', url, 1, re.I)
-    if len(split_domain) > 2:
-        result.update({
-            'scheme': split_domain[1].lower(),
-            'domain': split_domain[2].lower()
-        })
-
-    if result.get('scheme') and result.get('domain'):
-        new_url = '%s://%s' % (result.get('scheme'), result.get('domain'))
-
-        if result.get('path'):
-            new_url = '%s%s' % (new_url, result.get('path'))
-        else:
-            new_url = '%s/' % new_url
+        return EMPTY_SPLIT_URL
 
-        if result.get('query'):
-            new_url = '%s?%s' % (new_url, result.get('query'))
+    return parse_url(str(url), bool(allow_fragments))
 
-        if result.get('fragment') and allow_fragments:
-            new_url = '%s#%s' % (new_url, result.get('fragment'))
 
-        result.update({'url': new_url})
+@lru_cache(maxsize=8192)
+def parse_url(url, allow_fragments=True):
+    # Same URL is split by validate_url, is_blacklisted, the cookie store and the cache key
+    if not RE_URL_WITH_SCHEME.match(url):
+        url = 'http://%s' % RE_URL_LEADING_SLASHES.sub('', url)
 
-    return result
+    url = unescape(url)
 
+    url, sep, fragment = url.partition('#')
+    if not sep:
+        fragment = None
 
-def unescape_url(url):
-    try:
-        import html
-        if hasattr(html, 'unescape'):
-            return html.unescape(url)
-        elif hasattr(html, 'parser'):
-            return html.parser.HTMLParser().unescape(url)
-        else:
-            return url
-    except ModuleNotFoundError as err:
-        print('ModuleNotFoundError', err)
-        import HTMLParser # noqa
-        try:
-            return HTMLParser.HTMLParser().unescape(url)
-        except AttributeError as err:
-            print('AttributeError', err)
-            pass
+    url, sep, query = url.partition('?')
+    if not sep:
+        query = None
 
-    return url
+    path = None
+    match = RE_URL_PATH.search(url)
+    if match:
+        path = '/%s' % RE_SLASHES.sub('/', url[match.end():])
+        url = url[:match.start()]
+
+    scheme = domain = new_url = None
+    match = RE_URL_SCHEME_DOMAIN.match(url)
+    if match:
+        scheme = match.group(1).lower()
+        domain = match.group(2).lower()
+
+    if scheme and domain:
+        new_url = '%s://%s%s' % (scheme, domain, path or '/')
+        if query:
+            new_url = '%s?%s' % (new_url, query)
+        if fragment and allow_fragments:
+            new_url = '%s#%s' % (new_url, fragment)
+
+    return SplitUrl(scheme, domain, path, query, fragment, new_url)
+
+
+def unescape_url(url):
+    return unescape(url)
 
 
 def random_agent():
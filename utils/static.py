@@ -184,3 +184,44 @@ domain_tlds = [
     'yachts', 'yahoo', 'yamaxun', 'yandex', 'ye', 'yodobashi', 'yoga', 'yokohama', 'you', 'youtube', 'yt',
     'yun', 'za', 'zappos', 'zara', 'zero', 'zip', 'zm', 'zone', 'zuerich', 'zw'
 ]
+
+# Common second-level public suffixes, used when no public_suffix_list.dat is available
+public_suffixes = [
+    'ac.id', 'co.id', 'go.id', 'my.id', 'or.id', 'sch.id', 'web.id', 'net.id', 'biz.id',
+    'ac.uk', 'co.uk', 'gov.uk', 'ltd.uk', 'me.uk', 'net.uk', 'nhs.uk', 'org.uk', 'plc.uk', 'sch.uk',
+    'com.au', 'edu.au', 'gov.au', 'net.au', 'org.au', 'asn.au', 'id.au',
+    'co.nz', 'net.nz', 'org.nz', 'govt.nz', 'ac.nz',
+    'co.za', 'org.za', 'gov.za', 'ac.za', 'web.za',
+    'ac.jp', 'co.jp', 'go.jp', 'ne.jp', 'or.jp', 'gr.jp', 'ed.jp',
+    'ac.kr', 'co.kr', 'go.kr', 'ne.kr', 'or.kr', 're.kr',
+    'co.in', 'firm.in', 'gen.in', 'ind.in', 'net.in', 'org.in', 'ac.in', 'edu.in', 'gov.in',
+    'com.br', 'net.br', 'org.br', 'gov.br', 'edu.br',
+    'com.cn', 'net.cn', 'org.cn', 'gov.cn', 'edu.cn',
+    'com.hk', 'net.hk', 'org.hk', 'edu.hk', 'gov.hk',
+    'com.tw', 'net.tw', 'org.tw', 'edu.tw', 'gov.tw',
+    'com.sg', 'net.sg', 'org.sg', 'edu.sg', 'gov.sg',
+    'com.my', 'net.my', 'org.my', 'edu.my', 'gov.my',
+    'com.ph', 'net.ph', 'org.ph', 'edu.ph', 'gov.ph',
+    'co.th', 'in.th', 'or.th', 'ac.th', 'go.th',
+    'com.vn', 'net.vn', 'org.vn', 'edu.vn', 'gov.vn',
+    'com.mx', 'net.mx', 'org.mx', 'gob.mx', 'edu.mx',
+    'com.ar', 'net.ar', 'org.ar', 'gob.ar', 'edu.ar',
+    'com.tr', 'net.tr', 'org.tr', 'gov.tr', 'edu.tr',
+    'com.ua', 'net.ua', 'org.ua', 'in.ua',
+    'com.ru', 'net.ru', 'org.ru', 'msk.ru', 'spb.ru',
+    'co.il', 'org.il', 'ac.il', 'gov.il',
+    'com.sa', 'net.sa', 'org.sa', 'edu.sa', 'gov.sa',
+    'com.eg', 'net.eg', 'org.eg', 'edu.eg', 'gov.eg',
+    'com.ng', 'net.ng', 'org.ng', 'gov.ng', 'edu.ng',
+    'co.ke', 'or.ke', 'ac.ke', 'go.ke',
+    'com.pk', 'net.pk', 'org.pk', 'edu.pk', 'gov.pk',
+    'com.co', 'net.co', 'org.co', 'gov.co', 'edu.co',
+    'com.pe', 'net.pe', 'org.pe', 'gob.pe', 'edu.pe',
+    'com.es', 'nom.es', 'org.es', 'gob.es', 'edu.es',
+    'com.pl', 'net.pl', 'org.pl', 'gov.pl', 'edu.pl',
+    'co.at', 'or.at', 'ac.at', 'gv.at',
+    'com.gr', 'net.gr', 'org.gr', 'edu.gr', 'gov.gr',
+    'com.pt', 'org.pt', 'edu.pt', 'gov.pt',
+    'blogspot.com', 'github.io', 'herokuapp.com', 'appspot.com', 'cloudfront.net', 'azurewebsites.net',
+    'netlify.app', 'vercel.app', 'pages.dev', 'workers.dev', 'web.app', 'firebaseapp.com',
+]
@@ -0,0 +1,149 @@
+import os
+import threading
+from functools import lru_cache
+from utils.static import domain_tlds, public_suffixes
+
+
+# Tried in order; without one, the TLD list and utils.static.public_suffixes are used
+PUBLIC_SUFFIX_LIST_FILES = [
+    os.environ.get('PUBLIC_SUFFIX_LIST'),
+    '/usr/share/publicsuffix/public_suffix_list.dat',
+]
+
+RULE = 1
+EXCEPTION = 2
+END = ''
+
+
+class SuffixTrie:
+    """
+    Public suffix rules (publicsuffix.org format: "co.uk", "*.ck", "!www.ck")
+    as a trie of reversed labels, so matching a domain walks its labels from
+    the right with one dict lookup each.
+    """
+
+    def __init__(self, rules=None):
+        self.root = {}
+        self.size = 0
+        for rule in rules or []:
+            self.add(rule)
+
+    def add(self, rule):
+        rule = rule.strip().lower()
+        if not rule or rule.startswith('//'):
+            return
+
+        kind = RULE
+        if rule.startswith('!'):
+            kind = EXCEPTION
+            rule = rule[1:]
+
+        node = self.root
+        for label in reversed(rule.split('.')):
+            node = node.setdefault(label, {})
+        node[END] = kind
+        self.size += 1
+
+    def suffix_length(self, labels):
+        """Number of labels of the public suffix at the end of labels (at least 1)."""
+        longest = 1
+        exception = 0
+        stack = [(self.root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            kind = node.get(END)
+            if kind == EXCEPTION:
+                exception = max(exception, depth)
+            elif kind == RULE:
+                longest = max(longest, depth)
+
+            if depth < len(labels):
+                label = labels[-1 - depth]
+                for key in (label, '*'):
+                    child = node.get(key)
+                    if child is not None:
+                        stack.append((child, depth + 1))
+
+        # An exception rule wins and its suffix is the rule minus its first label
+        if exception:
+            return exception - 1
+
+        return longest
+
+
+def load_rules(path):
+    rules = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            rule = line.split(None, 1)[0] if line.strip() else ''
+            if rule and not rule.startswith('//'):
+                rules.append(rule.encode('idna').decode('ascii') if not rule.isascii() else rule)
+
+    return rules
+
+
+def load_default_trie():
+    for path in PUBLIC_SUFFIX_LIST_FILES:
+        if path and os.path.isfile(path):
+            try:
+                return SuffixTrie(load_rules(path))
+            except (OSError, UnicodeError) as err:
+                print('public suffix list %s: %s' % (path, err))
+
+    return SuffixTrie(domain_tlds + public_suffixes)
+
+
+default_trie = None
+default_trie_lock = threading.Lock()
+
+
+def get_default_trie():
+    global default_trie
+    if default_trie is None:
+        with default_trie_lock:
+            if default_trie is None:
+                default_trie = load_default_trie()
+
+    return default_trie
+
+
+def set_default_trie(trie):
+    global default_trie
+    default_trie = trie
+    split_domain.cache_clear()
+
+
+@lru_cache(maxsize=8192)
+def split_domain(domain):
+    """(public suffix, registrable domain) of a host name; either may be None."""
+    if not domain:
+        return None, None
+
+    host = domain.lower().rstrip('.')
+    if ':' in host:
+        host = host.rsplit(':', 1)[0]
+
+    labels = host.split('.')
+    # IP addresses have no public suffix
+    if not all(labels) or labels[-1].isdigit():
+        return None, None
+
+    length = get_default_trie().suffix_length(labels)
+    suffix = '.'.join(labels[-length:])
+    if len(labels) <= length:
+        return suffix, None
+
+    return suffix, '.'.join(labels[-length - 1:])
+
+
+def public_suffix(domain):
+    """Public suffix of domain, e.g. "co.uk" for www.example.co.uk."""
+    return split_domain(domain)[0]
+
+
+def registrable_domain(domain):
+    """
+    Registrable domain (eTLD+1) of a host name, e.g. "example.co.uk" for
+    www.example.co.uk; None for bare public suffixes and malformed hosts.
+    """
+    return split_domain(domain)[1]